@@ -1,12 +1,14 @@
 """Helium Extractor Analyzer"""
 
 from dataclasses import dataclass
+from functools import partial
 from shutil import Error, copytree
 
 from edf_fusion.concept import AnalyzerInfo
 from edf_fusion.helper.logging import get_logger
-from edf_fusion.server.config import FusionAnalyzerConfig
 from edf_helium_server.analyzer import Analyzer, AnalyzerTask
+from edf_helium_server.config import HeliumAnalyzerConfig
+from edf_helium_server.helper.executor import IOClass
 from edf_helium_server.storage import Storage
 
 _LOGGER = get_logger('analyzer.extractor', root='helium')
@@ -14,7 +16,7 @@ _LOGGER = get_logger('analyzer.extractor', root='helium')
 
 async def _extractor_process_impl(
     info: AnalyzerInfo,
-    config: FusionAnalyzerConfig,
+    config: HeliumAnalyzerConfig,
     storage: Storage,
     a_task: AnalyzerTask,
 ) -> bool:
@@ -27,13 +29,14 @@ async def _extractor_process_impl(
     analysis_storage.data_dir.mkdir(parents=True, exist_ok=True)
     src = collection_storage.data_dir.resolve()
     dst = analysis_storage.data_dir.resolve()
+    # copied by a worker thread: the event loop keeps the work lease alive
     try:
-        copytree(src, dst)
-    except Error:
-        analysis_storage.remove_data_dir()
+        await storage.io.run(
+            IOClass.ARCHIVE, partial(copytree, dirs_exist_ok=True), src, dst
+        )
+    except (Error, OSError):
+        _LOGGER.exception("failed to copy extracted collection")
         return False
-    analysis_storage.create_archive()
-    analysis_storage.remove_data_dir()
     return True
 
 
@@ -45,7 +48,7 @@ def main():
             tags=set(),
             version='0.1.0',
         ),
-        config_cls=FusionAnalyzerConfig,
+        config_cls=HeliumAnalyzerConfig,
         process_impl=_extractor_process_impl,
     )
     analyzer.run()
@@ -5,9 +5,9 @@ from pathlib import Path
 
 from edf_fusion.concept import AnalyzerInfo
 from edf_fusion.helper.logging import get_logger
-from edf_fusion.helper.subprocess import create_subprocess_and_wait
-from edf_fusion.server.config import FusionAnalyzerConfig
 from edf_helium_server.analyzer import Analyzer, AnalyzerTask
+from edf_helium_server.config import HeliumAnalyzerConfig
+from edf_helium_server.helper.subprocess import create_subprocess_and_wait
 from edf_helium_server.storage import Storage
 
 _HRULE = b"-----------------------------------------------------------------\n"
@@ -15,7 +15,7 @@ _LOGGER = get_logger('analyzer.hayabusa', root='helium')
 
 
 @dataclass(kw_only=True)
-class HayabusaAnalyzerConfig(FusionAnalyzerConfig):
+class HayabusaAnalyzerConfig(HeliumAnalyzerConfig):
     """Hayabusa Analyzer Config"""
 
     program: Path | None = None
@@ -186,9 +186,6 @@ async def _hayabusa_process_impl(
             )
             if not success:
                 break
-    if success:
-        analysis_storage.create_archive()
-    analysis_storage.remove_data_dir()
     return success
 
 
@@ -5,9 +5,9 @@ from pathlib import Path
 
 from edf_fusion.concept import AnalyzerInfo
 from edf_fusion.helper.logging import get_logger
-from edf_fusion.helper.subprocess import create_subprocess_and_wait
-from edf_fusion.server.config import FusionAnalyzerConfig
 from edf_helium_server.analyzer import Analyzer, AnalyzerError, AnalyzerTask
+from edf_helium_server.config import HeliumAnalyzerConfig
+from edf_helium_server.helper.subprocess import create_subprocess_and_wait
 from edf_helium_server.storage import Storage
 from edf_plasma_core.concept import Tag
 
@@ -15,7 +15,7 @@ _LOGGER = get_logger('analyzer.plasma', root='helium')
 
 
 @dataclass(kw_only=True)
-class PlasmaAnalyzerConfig(FusionAnalyzerConfig):
+class PlasmaAnalyzerConfig(HeliumAnalyzerConfig):
     """Plasma Analyzer Config"""
 
     program: Path | None = None
@@ -76,9 +76,6 @@ async def _plasma_process_impl(
     cwd = collection_storage.data_dir.resolve()
     env = {'PLASMA_LOGFILE': str(analysis_storage.log)}
     success = await create_subprocess_and_wait(argv, cwd=cwd, env=env)
-    if success:
-        analysis_storage.create_archive()
-    analysis_storage.remove_data_dir()
     return success
 
 
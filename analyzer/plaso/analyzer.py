@@ -5,9 +5,9 @@ from pathlib import Path
 
 from edf_fusion.concept import AnalyzerInfo
 from edf_fusion.helper.logging import get_logger
-from edf_fusion.helper.subprocess import create_subprocess_and_wait
-from edf_fusion.server.config import FusionAnalyzerConfig
 from edf_helium_server.analyzer import Analyzer, AnalyzerTask
+from edf_helium_server.config import HeliumAnalyzerConfig
+from edf_helium_server.helper.subprocess import create_subprocess_and_wait
 from edf_helium_server.storage import Storage
 
 _LOGGER = get_logger('analyzer.plaso', root='helium')
@@ -17,7 +17,7 @@ _PROCESS_MEMORY_LIMIT = 4294967296
 
 
 @dataclass(kw_only=True)
-class PlasoAnalyzerConfig(FusionAnalyzerConfig):
+class PlasoAnalyzerConfig(HeliumAnalyzerConfig):
     """Plaso Analyzer Config"""
 
     program: Path | None = None
@@ -62,9 +62,6 @@ async def _plaso_process_impl(
         str(collection_storage.data_dir),
     ]
     success = await create_subprocess_and_wait(argv)
-    if success:
-        analysis_storage.create_archive()
-    analysis_storage.remove_data_dir()
     return success
 
 
@@ -5,16 +5,16 @@ from pathlib import Path
 
 from edf_fusion.concept import AnalyzerInfo
 from edf_fusion.helper.logging import get_logger
-from edf_fusion.helper.subprocess import create_subprocess_and_wait
-from edf_fusion.server.config import FusionAnalyzerConfig
 from edf_helium_server.analyzer import Analyzer, AnalyzerTask
+from edf_helium_server.config import HeliumAnalyzerConfig
+from edf_helium_server.helper.subprocess import create_subprocess_and_wait
 from edf_helium_server.storage import Storage
 
 _LOGGER = get_logger('analyzer.yara', root='helium')
 
 
 @dataclass(kw_only=True)
-class YaraAnalyzerConfig(FusionAnalyzerConfig):
+class YaraAnalyzerConfig(HeliumAnalyzerConfig):
     """Yara Analyzer Config"""
 
     program: Path | None = None
@@ -54,9 +54,6 @@ async def _yara_process_impl(
             success = await create_subprocess_and_wait(
                 argv, stdout=datf, stderr=logf
             )
-    if success:
-        analysis_storage.create_archive()
-    analysis_storage.remove_data_dir()
     return success
 
 
@@ -1,27 +1,54 @@
 """Helium Client"""
 
-from collections.abc import AsyncIterator
-from dataclasses import dataclass
+from asyncio import Queue, gather, sleep, to_thread
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Mapping
+from copy import deepcopy
+from dataclasses import dataclass, field
 from pathlib import Path
+from urllib.parse import quote, urlencode
 from uuid import UUID
 
-from aiohttp import FormData
+from aiohttp import ClientError, FormData
 from edf_fusion.client import FusionClient
-from edf_fusion.concept import AnalyzerInfo, Identity, PendingDownloadKey
+from edf_fusion.concept import (
+    AnalyzerInfo,
+    Concept,
+    ConceptType,
+    Identity,
+    PendingDownloadKey,
+)
 from edf_fusion.helper.logging import get_logger
 from edf_helium_core.concept import (
     Analysis,
+    ArchiveMember,
+    Case,
     Collection,
+    CollectionOverview,
     Collector,
     CollectorSecrets,
     DiskUsage,
     Profile,
     Rule,
     Target,
+    Upload,
 )
 from generaptor.concept import Architecture, OperatingSystem
 
 _LOGGER = get_logger('client', root='carbon')
+_APPLICATION_JSON = 'application/json'
+_UPLOAD_CHUNK_SIZE = 64 * 1024 * 1024
+_UPLOAD_RETRIES = 5
+_VALIDATOR_CACHE_SIZE = 128
+_NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def _list_params(params: dict | None) -> dict | None:
+    # typed results are parsed from complete items, projection is dropped
+    if not params or 'fields' not in params:
+        return params
+    _LOGGER.warning("fields parameter is not supported, ignored")
+    return {key: value for key, value in params.items() if key != 'fields'}
 
 
 @dataclass(kw_only=True)
@@ -29,15 +56,155 @@ class HeliumClient:
     """Helium Client"""
 
     fusion_client: FusionClient
+    _validators: OrderedDict[str, tuple[str, object]] = field(
+        default_factory=OrderedDict
+    )
+
+    def _request_kwargs(self, **kwargs) -> dict:
+        """Request options from fusion client configuration"""
+        config = self.fusion_client.config
+        req_kwargs = {
+            'ssl': config.api_ssl,
+            'proxy': config.proxy_url,
+            'proxy_auth': config.proxy_auth,
+            'proxy_headers': config.proxy_headers,
+            'timeout': config.timeout,
+        }
+        req_kwargs.update(kwargs)
+        return req_kwargs
+
+    async def _get(
+        self,
+        endpoint: str,
+        concept_cls: ConceptType,
+        params: dict | None = None,
+        headers: dict | None = None,
+    ) -> tuple[int, list[Concept] | Concept | None, Mapping[str, str]]:
+        """GET request returning status, result and response headers
+
+        FusionClient.get does not expose status and headers, the request
+        is sent using the session and configuration the client was built
+        with.
+        """
+        kwargs = self._request_kwargs(params=params, headers=headers or {})
+        async with self.fusion_client.session.get(
+            endpoint, **kwargs
+        ) as response:
+            result = None
+            if response.content_type != _APPLICATION_JSON:
+                if response.status != 304:
+                    _LOGGER.error(
+                        "request failed with status=%d", response.status
+                    )
+            elif response.status >= 400:
+                body = await response.json()
+                _LOGGER.warning(
+                    "request failed with status=%d (%s)",
+                    response.status,
+                    body.get('message'),
+                )
+            else:
+                data = (await response.json()).get('data')
+                if isinstance(data, list):
+                    result = [concept_cls.from_dict(dct) for dct in data]
+                elif isinstance(data, dict):
+                    result = concept_cls.from_dict(data)
+            return response.status, result, response.headers
+
+    async def _conditional_get(
+        self,
+        endpoint: str,
+        concept_cls: ConceptType,
+        params: dict | None = None,
+    ) -> list[Concept] | Concept | None:
+        """GET request revalidating the last response using its entity tag"""
+        cache_key = endpoint
+        if params:
+            cache_key += '?' + urlencode(sorted(params.items()), doseq=True)
+        cached = self._validators.get(cache_key)
+        headers = {'If-None-Match': cached[0]} if cached else {}
+        status, result, headers = await self._get(
+            endpoint, concept_cls, params, headers
+        )
+        if cached and status == 304:
+            self._validators.move_to_end(cache_key)
+            return deepcopy(cached[1])
+        etag = headers.get('ETag')
+        if result is None or not etag:
+            self._validators.pop(cache_key, None)
+            return result
+        self._validators[cache_key] = (etag, deepcopy(result))
+        self._validators.move_to_end(cache_key)
+        if len(self._validators) > _VALIDATOR_CACHE_SIZE:
+            self._validators.popitem(last=False)
+        return result
+
+    async def _paginate(
+        self,
+        endpoint: str,
+        concept_cls: ConceptType,
+        params: dict | None = None,
+    ) -> AsyncIterator[Concept]:
+        """Yield items of every page, following next page cursor"""
+        params = dict(_list_params(params) or {})
+        while True:
+            _, page, headers = await self._get(endpoint, concept_cls, params)
+            for concept in page or []:
+                yield concept
+            cursor = headers.get(_NEXT_CURSOR_HEADER)
+            if not page or not cursor:
+                return
+            params['cursor'] = cursor
+
+    async def enumerate_cases(
+        self, params: dict | None = None
+    ) -> AsyncIterator[Case]:
+        """Enumerate cases page by page (params: filters, page size)"""
+        async for case in self._paginate('/api/cases', Case, params):
+            yield case
 
     async def create_collector(
         self, case_guid: UUID, collector: Collector
     ) -> Collector:
-        """Create collector"""
+        """Create collector, use wait_collector to wait for its build"""
         _LOGGER.info("creating collector in case %s", case_guid)
         endpoint = f'/api/case/{case_guid}/collector'
         return await self.fusion_client.post(endpoint, collector, Collector)
 
+    async def create_collectors(
+        self, case_guid: UUID, collectors: list[Collector]
+    ) -> list[Collector] | None:
+        """Create collectors, use wait_collector to wait for their builds"""
+        _LOGGER.info(
+            "creating %d collectors in case %s", len(collectors), case_guid
+        )
+        endpoint = f'/api/case/{case_guid}/collectors'
+        return await self.fusion_client.post(
+            endpoint,
+            json=[collector.to_dict() for collector in collectors],
+            concept_cls=Collector,
+        )
+
+    async def wait_collector(
+        self,
+        case_guid: UUID,
+        collector_guid: UUID,
+        period: float = 2.0,
+        timeout: float = 600.0,
+    ) -> Collector | None:
+        """Wait for collector build to be over, return None on timeout"""
+        elapsed = 0.0
+        while elapsed < timeout:
+            collector = await self.retrieve_collector(
+                case_guid, collector_guid
+            )
+            if not collector or collector.built:
+                return collector
+            await sleep(period)
+            elapsed += period
+        _LOGGER.warning("collector %s build is still running", collector_guid)
+        return None
+
     async def import_collector(
         self,
         case_guid: UUID,
@@ -97,17 +264,51 @@ class HeliumClient:
         )
 
     async def retrieve_collectors(
-        self, case_guid: UUID
+        self, case_guid: UUID, params: dict | None = None
     ) -> list[Collector] | None:
-        """Retrieve collectors"""
+        """Retrieve collectors (params: filters and limit)"""
         endpoint = f'/api/case/{case_guid}/collectors'
-        return await self.fusion_client.get(endpoint, concept_cls=Collector)
+        return await self.fusion_client.get(
+            endpoint, concept_cls=Collector, params=_list_params(params)
+        )
+
+    async def enumerate_collectors(
+        self, case_guid: UUID, params: dict | None = None
+    ) -> AsyncIterator[Collector]:
+        """Enumerate collectors page by page (params: filters, page size)"""
+        endpoint = f'/api/case/{case_guid}/collectors'
+        async for collector in self._paginate(endpoint, Collector, params):
+            yield collector
 
     async def create_collection(
-        self, case_guid: UUID, filepath: Path
+        self,
+        case_guid: UUID,
+        filepath: Path,
+        resumable: bool = False,
+        chunk_size: int = _UPLOAD_CHUNK_SIZE,
+        retries: int = _UPLOAD_RETRIES,
+        parallelism: int = 1,
+        parallel: bool = False,
     ) -> Collection | None:
-        """Create collection"""
+        """Create collection
+
+        Resumable mode uploads the file in chunks of chunk_size bytes and
+        resumes from the offset committed by the server after a failure,
+        giving up after retries consecutive failures.
+
+        Parallel mode uploads chunks as parts written at their offset using
+        parallelism connections, parallelism greater than one implies
+        parallel mode (both imply resumable mode).
+        """
         _LOGGER.info("uploading collection %s in case %s", filepath, case_guid)
+        if parallel or parallelism > 1:
+            return await self._create_collection_parallel(
+                case_guid, filepath, chunk_size, retries, parallelism
+            )
+        if resumable:
+            return await self._create_collection_resumable(
+                case_guid, filepath, chunk_size, retries
+            )
         data = FormData()
         data.add_field('file', filepath.open('rb'), filename=filepath.name)
         endpoint = f'/api/case/{case_guid}/collection'
@@ -115,6 +316,115 @@ class HeliumClient:
             endpoint, data=data, concept_cls=Collection
         )
 
+    async def _upload_request(self, method: str, endpoint: str, **kwargs):
+        func = getattr(self.fusion_client, method)
+        try:
+            return await func(endpoint, concept_cls=Upload, **kwargs)
+        except (ClientError, TimeoutError) as exc:
+            _LOGGER.warning("upload request failed: %s", exc)
+            return None
+
+    async def _create_collection_resumable(
+        self,
+        case_guid: UUID,
+        filepath: Path,
+        chunk_size: int,
+        retries: int,
+    ) -> Collection | None:
+        size = filepath.stat().st_size
+        endpoint = f'/api/case/{case_guid}/upload'
+        upload = await self._upload_request(
+            'post', endpoint, json={'size': size}
+        )
+        if not upload:
+            _LOGGER.error("failed to create upload session")
+            return None
+        endpoint = f'{endpoint}/{upload.guid}'
+        failures = 0
+        with filepath.open('rb') as fobj:
+            while upload.offset < size:
+                fobj.seek(upload.offset)
+                chunk = fobj.read(chunk_size)
+                result = await self._upload_request(
+                    'put',
+                    endpoint,
+                    params={'offset': upload.offset},
+                    data=chunk,
+                )
+                if result:
+                    upload = result
+                    failures = 0
+                    continue
+                failures += 1
+                if failures > retries:
+                    _LOGGER.error("upload %s failed, giving up", upload.guid)
+                    return None
+                await sleep(min(2**failures, 60))
+                # resume from the offset committed by the server
+                upload = await self._upload_request('get', endpoint) or upload
+        return await self.fusion_client.post(
+            f'{endpoint}/complete', json={}, concept_cls=Collection
+        )
+
+    async def _upload_part(
+        self,
+        endpoint: str,
+        filepath: Path,
+        queue: Queue,
+        chunk_size: int,
+        retries: int,
+    ) -> bool:
+        with filepath.open('rb') as fobj:
+            while not queue.empty():
+                offset = queue.get_nowait()
+                fobj.seek(offset)
+                chunk = await to_thread(fobj.read, chunk_size)
+                failures = 0
+                while not await self._upload_request(
+                    'put', endpoint, params={'offset': offset}, data=chunk
+                ):
+                    failures += 1
+                    if failures > retries:
+                        _LOGGER.error("part at offset %d failed", offset)
+                        return False
+                    await sleep(min(2**failures, 60))
+        return True
+
+    async def _create_collection_parallel(
+        self,
+        case_guid: UUID,
+        filepath: Path,
+        chunk_size: int,
+        retries: int,
+        parallelism: int,
+    ) -> Collection | None:
+        size = filepath.stat().st_size
+        endpoint = f'/api/case/{case_guid}/upload'
+        upload = await self._upload_request(
+            'post', endpoint, json={'size': size, 'parallel': True}
+        )
+        if not upload:
+            _LOGGER.error("failed to create upload session")
+            return None
+        endpoint = f'{endpoint}/{upload.guid}'
+        queue = Queue()
+        for offset in range(0, size, chunk_size):
+            queue.put_nowait(offset)
+        results = await gather(
+            *[
+                self._upload_part(
+                    endpoint, filepath, queue, chunk_size, retries
+                )
+                for _ in range(parallelism)
+            ]
+        )
+        if not all(results):
+            _LOGGER.error("upload %s failed, giving up", upload.guid)
+            return None
+        return await self.fusion_client.post(
+            f'{endpoint}/complete', json={}, concept_cls=Collection
+        )
+
     async def update_collection(
         self, case_guid: UUID, collection: Collection
     ) -> Collection | None:
@@ -139,6 +449,26 @@ class HeliumClient:
             endpoint, concept_cls=PendingDownloadKey
         )
 
+    async def retrieve_collection_files(
+        self, case_guid: UUID, collection_guid: UUID
+    ) -> list[ArchiveMember] | None:
+        """Retrieve collection archive members"""
+        endpoint = f'/api/case/{case_guid}/collection/{collection_guid}/files'
+        return await self.fusion_client.get(
+            endpoint, concept_cls=ArchiveMember
+        )
+
+    async def retrieve_collection_file(
+        self,
+        case_guid: UUID,
+        collection_guid: UUID,
+        path: str,
+        output: Path,
+    ) -> Path | None:
+        """Retrieve collection archive member content"""
+        endpoint = f'/api/case/{case_guid}/collection/{collection_guid}/file/{quote(path)}'
+        return await self.fusion_client.download(endpoint, output)
+
     async def delete_collection_cache(
         self, case_guid: UUID, collection_guid: UUID
     ) -> bool:
@@ -166,14 +496,33 @@ class HeliumClient:
     ) -> Collection | None:
         """Retrieve collection"""
         endpoint = f'/api/case/{case_guid}/collection/{collection_guid}'
-        return await self.fusion_client.get(endpoint, concept_cls=Collection)
+        return await self._conditional_get(endpoint, Collection)
 
     async def retrieve_collections(
-        self, case_guid: UUID
+        self, case_guid: UUID, params: dict | None = None
     ) -> list[Collection] | None:
-        """Retrieve collections"""
+        """Retrieve collections (params: filters and limit)"""
+        endpoint = f'/api/case/{case_guid}/collections'
+        return await self._conditional_get(
+            endpoint, Collection, _list_params(params)
+        )
+
+    async def enumerate_collections(
+        self, case_guid: UUID, params: dict | None = None
+    ) -> AsyncIterator[Collection]:
+        """Enumerate collections page by page (params: filters, page size)"""
         endpoint = f'/api/case/{case_guid}/collections'
-        return await self.fusion_client.get(endpoint, concept_cls=Collection)
+        async for collection in self._paginate(endpoint, Collection, params):
+            yield collection
+
+    async def retrieve_case_overview(
+        self, case_guid: UUID
+    ) -> list[CollectionOverview] | None:
+        """Retrieve case collections along with their analyses"""
+        endpoint = f'/api/case/{case_guid}/overview'
+        return await self.fusion_client.get(
+            endpoint, concept_cls=CollectionOverview
+        )
 
     async def create_analysis(
         self, case_guid: UUID, collection_guid: UUID, analysis: Analysis
@@ -241,7 +590,7 @@ class HeliumClient:
     ) -> Analysis | None:
         """Retrieve analysis"""
         endpoint = f'/api/case/{case_guid}/collection/{collection_guid}/analysis/{analyzer}'
-        return await self.fusion_client.get(endpoint, concept_cls=Analysis)
+        return await self._conditional_get(endpoint, Analysis)
 
     async def retrieve_analysis_log(
         self,
@@ -254,14 +603,53 @@ class HeliumClient:
         endpoint = f'/api/case/{case_guid}/collection/{collection_guid}/analysis/{analyzer}/log'
         return await self.fusion_client.download(endpoint, output)
 
+    async def retrieve_analysis_files(
+        self, case_guid: UUID, collection_guid: UUID, analyzer: str
+    ) -> list[ArchiveMember] | None:
+        """Retrieve analysis output archive members"""
+        endpoint = f'/api/case/{case_guid}/collection/{collection_guid}/analysis/{analyzer}/files'
+        return await self.fusion_client.get(
+            endpoint, concept_cls=ArchiveMember
+        )
+
+    async def retrieve_analysis_file(
+        self,
+        case_guid: UUID,
+        collection_guid: UUID,
+        analyzer: str,
+        path: str,
+        output: Path,
+    ) -> Path | None:
+        """Retrieve analysis output archive member content"""
+        endpoint = f'/api/case/{case_guid}/collection/{collection_guid}/analysis/{analyzer}/file/{quote(path)}'
+        return await self.fusion_client.download(endpoint, output)
+
     async def retrieve_analyses(
-        self, case_guid: UUID, collection_guid: UUID
+        self,
+        case_guid: UUID,
+        collection_guid: UUID,
+        params: dict | None = None,
     ) -> list[Analysis] | None:
-        """Retrieve analyses"""
+        """Retrieve analyses (params: filters and limit)"""
+        endpoint = (
+            f'/api/case/{case_guid}/collection/{collection_guid}/analyses'
+        )
+        return await self._conditional_get(
+            endpoint, Analysis, _list_params(params)
+        )
+
+    async def enumerate_analyses(
+        self,
+        case_guid: UUID,
+        collection_guid: UUID,
+        params: dict | None = None,
+    ) -> AsyncIterator[Analysis]:
+        """Enumerate analyses page by page (params: filters, page size)"""
         endpoint = (
             f'/api/case/{case_guid}/collection/{collection_guid}/analyses'
         )
-        return await self.fusion_client.get(endpoint, concept_cls=Analysis)
+        async for analysis in self._paginate(endpoint, Analysis, params):
+            yield analysis
 
     async def retrieve_analyzers(self) -> list[AnalyzerInfo]:
         """Retrieve analyzers"""
@@ -2,7 +2,7 @@
 """Helium Test Client"""
 
 from argparse import ArgumentParser
-from asyncio import run, sleep
+from asyncio import gather, run, sleep
 from pathlib import Path
 
 from edf_fusion.client import (
@@ -103,6 +103,8 @@ async def _test_collector_lifecycle(
     )
     collector = await helium_client.create_collector(case.guid, collector)
     _LOGGER.info("created collector: %s", collector)
+    collector = await helium_client.wait_collector(case.guid, collector.guid)
+    _LOGGER.info("built collector: %s", collector)
     # download collector
     pdk = await helium_client.download_collector(case.guid, collector.guid)
     output = await fusion_download_api_client.download(pdk, _TEST_OUTPUT_DIR)
@@ -117,12 +119,38 @@ async def _test_collector_lifecycle(
         case.guid, collector.guid
     )
     _LOGGER.info("retrieved collector secrets: %s", collector_secrets)
+    # create collectors
+    collectors = await helium_client.create_collectors(
+        case.guid,
+        [
+            Collector(
+                profile=profile.name,
+                distrib=Distribution(
+                    arch=arch,
+                    opsystem=OperatingSystem.LINUX,
+                ),
+            )
+            for arch in (Architecture.AMD64, Architecture.ARM64)
+        ],
+    )
+    _LOGGER.info("created collectors: %s", collectors)
+    # wait for collectors builds
+    collectors = await gather(
+        *[
+            helium_client.wait_collector(case.guid, collector.guid)
+            for collector in collectors
+        ]
+    )
+    _LOGGER.info("built collectors: %s", collectors)
     # retrieve collectors
     collectors = await helium_client.retrieve_collectors(case.guid)
     _LOGGER.info("retrieved collectors: %s", collectors)
-    # delete collector
-    deleted = await helium_client.delete_collector(case.guid, collector.guid)
-    _LOGGER.info("collector deleted: %s", deleted)
+    # delete collectors
+    for collector in collectors:
+        deleted = await helium_client.delete_collector(
+            case.guid, collector.guid
+        )
+        _LOGGER.info("collector deleted: %s", deleted)
 
 
 async def _test_collection_lifecycle(
@@ -152,6 +180,14 @@ async def _test_collection_lifecycle(
     # retrieve collections
     collections = await helium_client.retrieve_collections(case.guid)
     _LOGGER.info("retrieved collections: %s", collections)
+    # enumerate collections page by page
+    collections = [
+        collection
+        async for collection in helium_client.enumerate_collections(
+            case.guid, {'limit': 1}
+        )
+    ]
+    _LOGGER.info("enumerated collections: %s", collections)
     # delete collection
     deleted = await helium_client.delete_collection(case.guid, collection.guid)
     _LOGGER.info("collection deleted: %s", deleted)
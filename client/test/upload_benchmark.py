@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Helium Upload Benchmark"""
+
+from argparse import ArgumentParser
+from asyncio import run
+from pathlib import Path
+from time import perf_counter
+
+from edf_fusion.client import (
+    FusionAuthAPIClient,
+    FusionCaseAPIClient,
+    FusionClient,
+    FusionClientConfig,
+    create_session,
+)
+from edf_fusion.helper.logging import get_logger
+from edf_helium_core.concept import Case
+from yarl import URL
+
+from edf_helium_client import HeliumClient
+
+_LOGGER = get_logger('upload_benchmark', root='test')
+_PARALLELISMS = (1, 4, 8)
+
+
+async def _playbook(
+    fusion_client: FusionClient, filepath: Path, chunk_size: int
+):
+    fusion_case_api_client = FusionCaseAPIClient(
+        case_cls=Case, fusion_client=fusion_client
+    )
+    helium_client = HeliumClient(fusion_client=fusion_client)
+    case = await fusion_case_api_client.create_case(
+        Case(tsid=None, name='B', description='Upload benchmark', acs={'test'})
+    )
+    size = filepath.stat().st_size
+    try:
+        for parallelism in _PARALLELISMS:
+            start = perf_counter()
+            collection = await helium_client.create_collection(
+                case.guid,
+                filepath,
+                resumable=True,
+                chunk_size=chunk_size,
+                parallelism=parallelism,
+                parallel=True,
+            )
+            elapsed = perf_counter() - start
+            if not collection:
+                _LOGGER.error("upload failed (parallelism=%d)", parallelism)
+                continue
+            _LOGGER.info(
+                "parallelism=%d: %.2fs (%.1f MiB/s)",
+                parallelism,
+                elapsed,
+                size / elapsed / 1024 / 1024,
+            )
+            await helium_client.delete_collection(case.guid, collection.guid)
+    finally:
+        await fusion_case_api_client.delete_case(case.guid)
+
+
+def _parse_args():
+    parser = ArgumentParser()
+    parser.add_argument(
+        '--api-url',
+        type=URL,
+        default=URL('http://127.0.0.1:8080/'),
+        help="API URL (use a loopback address to measure server overhead)",
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=16 * 1024 * 1024,
+        help="Upload chunk size in bytes",
+    )
+    parser.add_argument('filepath', type=Path, help="Collection archive")
+    return parser.parse_args()
+
+
+async def app():
+    """Application entrypoint"""
+    args = _parse_args()
+    config = FusionClientConfig(api_url=args.api_url)
+    session = create_session(config, unsafe=True)
+    async with session:
+        fusion_client = FusionClient(config=config, session=session)
+        fusion_auth_api_client = FusionAuthAPIClient(
+            fusion_client=fusion_client
+        )
+        identity = await fusion_auth_api_client.login('test', 'test')
+        if not identity:
+            return
+        _LOGGER.info("logged as: %s", identity)
+        try:
+            await _playbook(fusion_client, args.filepath, args.chunk_size)
+        finally:
+            await fusion_auth_api_client.logout()
+
+
+if __name__ == '__main__':
+    run(app())
@@ -17,6 +17,9 @@ from .collector import (
 from .constant import Constant
 from .disk_usage import CaseDiskUsage, DiskUsage
 from .event import Event
+from .member import ArchiveMember
+from .overview import CollectionOverview
 from .profile import Profile
 from .rule import Rule
 from .target import Target
+from .upload import Upload
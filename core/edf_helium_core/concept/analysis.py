@@ -38,6 +38,9 @@ class Analysis(Concept):
     status: Status = Status.PENDING
     analyzer: str
     priority: Priority = Priority.MEDIUM
+    archive_format: str | None = None
+    archive_size: int | None = None
+    archive_duration: float | None = None
 
     @property
     def completed(self) -> bool:
@@ -53,6 +56,9 @@ class Analysis(Concept):
             status=Status(dct['status']),
             analyzer=dct['analyzer'],
             priority=Priority(dct['priority']),
+            archive_format=dct.get('archive_format'),
+            archive_size=dct.get('archive_size'),
+            archive_duration=dct.get('archive_duration'),
         )
 
     def to_dict(self):
@@ -63,6 +69,9 @@ class Analysis(Concept):
             'status': self.status.value,
             'analyzer': self.analyzer,
             'priority': self.priority.value,
+            'archive_format': self.archive_format,
+            'archive_size': self.archive_size,
+            'archive_duration': self.archive_duration,
         }
 
     def update(self, dct):
@@ -79,3 +88,4 @@ class Analysis(Concept):
             self.status = status
         # analyzer cannot be updated
         self.priority = Priority(dct.get('priority', self.priority))
+        # archive properties cannot be updated
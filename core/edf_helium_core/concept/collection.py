@@ -29,6 +29,10 @@ class Collection(Concept):
     hostname: str | None = None
     collected: datetime | None = None
     fingerprint: str | None = None
+    size: int | None = None
+    md5: str | None = None
+    sha1: str | None = None
+    sha256: str | None = None
 
     @classmethod
     def from_dict(cls, dct):
@@ -46,6 +50,10 @@ class Collection(Concept):
             collected=from_iso_or_none(dct['collected']),
             fingerprint=dct['fingerprint'],
             description=dct['description'],
+            size=dct.get('size'),
+            md5=dct.get('md5'),
+            sha1=dct.get('sha1'),
+            sha256=dct.get('sha256'),
         )
 
     def to_dict(self):
@@ -61,6 +69,10 @@ class Collection(Concept):
             'hostname': self.hostname,
             'collected': to_iso_or_none(self.collected),
             'fingerprint': self.fingerprint,
+            'size': self.size,
+            'md5': self.md5,
+            'sha1': self.sha1,
+            'sha256': self.sha256,
         }
 
     def update(self, dct):
@@ -78,3 +90,4 @@ class Collection(Concept):
         )
         self.description = dct.get('description', self.description)
         # fingerprint cannot be updated
+        # size and digests cannot be updated
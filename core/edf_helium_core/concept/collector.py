@@ -3,7 +3,7 @@
 from dataclasses import dataclass, field
 from uuid import UUID, uuid4
 
-from edf_fusion.concept import Concept
+from edf_fusion.concept import Concept, Status
 from edf_fusion.helper.datetime import datetime, from_iso, to_iso, utcnow
 from generaptor.concept import Architecture, Distribution, OperatingSystem
 
@@ -23,6 +23,12 @@ class Collector(Concept):
     dont_be_lazy: bool | None = None
     vss_analysis_age: int | None = None
     use_auto_accessor: bool | None = None
+    status: Status = Status.SUCCESS
+
+    @property
+    def built(self) -> bool:
+        """Determine if collector build is over"""
+        return self.status in (Status.SUCCESS, Status.FAILURE)
 
     @classmethod
     def from_dict(cls, dct):
@@ -41,6 +47,7 @@ class Collector(Concept):
             dont_be_lazy=dct['dont_be_lazy'],
             vss_analysis_age=dct['vss_analysis_age'],
             use_auto_accessor=dct['use_auto_accessor'],
+            status=Status(dct.get('status', Status.SUCCESS.value)),
         )
 
     def to_dict(self):
@@ -57,6 +64,7 @@ class Collector(Concept):
             'dont_be_lazy': self.dont_be_lazy,
             'vss_analysis_age': self.vss_analysis_age,
             'use_auto_accessor': self.use_auto_accessor,
+            'status': self.status.value,
         }
 
     def update(self, dct):
@@ -0,0 +1,40 @@
+"""Helium Archive Member"""
+
+from dataclasses import dataclass
+
+from edf_fusion.concept import Concept
+from edf_fusion.helper.datetime import (
+    datetime,
+    from_iso_or_none,
+    to_iso_or_none,
+)
+
+
+@dataclass(kw_only=True)
+class ArchiveMember(Concept):
+    """Helium Archive Member"""
+
+    name: str
+    size: int
+    compressed_size: int
+    modified: datetime | None = None
+
+    @classmethod
+    def from_dict(cls, dct):
+        return cls(
+            name=dct['name'],
+            size=dct['size'],
+            compressed_size=dct['compressed_size'],
+            modified=from_iso_or_none(dct.get('modified')),
+        )
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'size': self.size,
+            'compressed_size': self.compressed_size,
+            'modified': to_iso_or_none(self.modified),
+        }
+
+    def update(self, dct):
+        raise NotImplementedError("ArchiveMember.update shall not be called!")
@@ -0,0 +1,34 @@
+"""Helium Collection Overview"""
+
+from dataclasses import dataclass, field
+
+from edf_fusion.concept import Concept
+
+from .analysis import Analysis
+from .collection import Collection
+
+
+@dataclass(kw_only=True)
+class CollectionOverview(Concept):
+    """Helium Collection Overview (collection and its analyses)"""
+
+    collection: Collection
+    analyses: list[Analysis] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, dct):
+        return cls(
+            collection=Collection.from_dict(dct['collection']),
+            analyses=[Analysis.from_dict(item) for item in dct['analyses']],
+        )
+
+    def to_dict(self):
+        return {
+            'collection': self.collection.to_dict(),
+            'analyses': [analysis.to_dict() for analysis in self.analyses],
+        }
+
+    def update(self, dct):
+        raise NotImplementedError(
+            "CollectionOverview.update shall not be called!"
+        )
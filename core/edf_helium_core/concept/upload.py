@@ -0,0 +1,69 @@
+"""Helium Upload"""
+
+from dataclasses import dataclass, field
+from uuid import UUID, uuid4
+
+from edf_fusion.concept import Concept
+from edf_fusion.helper.datetime import datetime, from_iso, to_iso, utcnow
+
+
+@dataclass(kw_only=True)
+class Upload(Concept):
+    """Helium Upload Session"""
+
+    guid: UUID = field(default_factory=uuid4)
+    created: datetime = field(default_factory=utcnow)
+    updated: datetime = field(default_factory=utcnow)
+    size: int | None = None
+    offset: int = 0
+    parallel: bool = False
+    ranges: list[tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def received(self) -> bool:
+        """Determine if every byte was received"""
+        return not self.size or self.ranges == [(0, self.size)]
+
+    def add_range(self, start: int, end: int):
+        """Merge received range [start, end) and update committed offset"""
+        ranges = []
+        for rng_start, rng_end in sorted(self.ranges + [(start, end)]):
+            if ranges and rng_start <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], rng_end))
+                continue
+            ranges.append((rng_start, rng_end))
+        self.ranges = ranges
+        self.offset = ranges[0][1] if ranges[0][0] == 0 else 0
+        self.updated = utcnow()
+
+    @classmethod
+    def from_dict(cls, dct):
+        return cls(
+            guid=UUID(dct['guid']),
+            created=from_iso(dct['created']),
+            updated=from_iso(dct['updated']),
+            size=dct['size'],
+            offset=dct['offset'],
+            parallel=dct.get('parallel', False),
+            ranges=[tuple(rng) for rng in dct.get('ranges', [])],
+        )
+
+    def to_dict(self):
+        return {
+            'guid': str(self.guid),
+            'created': to_iso(self.created),
+            'updated': to_iso(self.updated),
+            'size': self.size,
+            'offset': self.offset,
+            'parallel': self.parallel,
+            'ranges': [list(rng) for rng in self.ranges],
+        }
+
+    def update(self, dct):
+        # guid cannot be updated
+        # created cannot be updated
+        # size cannot be updated
+        # parallel cannot be updated
+        # ranges cannot be updated
+        self.offset = dct.get('offset', self.offset)
+        self.updated = utcnow()
@@ -20,6 +20,9 @@ case "${ROLE}" in
     server)
         exec /venv/bin/helium-server --config /conf/helium.yml
         ;;
+    catalog)
+        exec /venv/bin/helium-catalog --config /conf/helium.yml
+        ;;
     disk-usage)
         exec /venv/bin/helium-disk-usage --config /conf/helium.yml
         ;;
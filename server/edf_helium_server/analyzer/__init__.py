@@ -1,40 +1,39 @@
 """Helium Analyzer ABC"""
 
 from argparse import ArgumentParser
-from asyncio import (
-    Event,
-    PriorityQueue,
-    create_task,
-    gather,
-    get_running_loop,
-    run,
-    wait_for,
-)
+from asyncio import Event, gather, get_running_loop, run, wait_for
 from collections.abc import Awaitable, Callable
+from contextlib import suppress
 from dataclasses import dataclass, field
 from functools import cached_property
 from pathlib import Path
 from signal import SIGINT, SIGTERM
+from time import monotonic
+from typing import Type
 
 from edf_fusion.concept import AnalyzerInfo
 from edf_fusion.helper.logging import get_logger
 from edf_fusion.helper.notifier import FusionNotifier, create_notifier_session
 from edf_fusion.helper.redis import Redis, close_redis, create_redis
-from edf_fusion.server.config import (
-    FusionAnalyzerConfig,
-    FusionAnalyzerConfigType,
-)
-from edf_helium_core.concept import PRIORITY_INT
+from edf_helium_core.concept import PRIORITY_INT, Analysis, Case, Collection
 from edf_helium_core.concept import Event as HeliumEvent
 from edf_helium_core.concept import Status
+from redis.exceptions import RedisError
 
-from ..config import HeliumServerConfig
+from ..config import HeliumAnalyzerConfig, HeliumServerConfig
+from ..helper.cache import CacheLease, ExtractionCache
+from ..helper.work import (
+    LeaseLostError,
+    WorkLease,
+    WorkListener,
+    WorkQueue,
+)
 from ..storage import Storage
 from .helper import (
     check_analyzer_info,
     extract_collection,
-    find_pending_analyses,
-    perform_analyses_recovery,
+    find_analyses,
+    find_analysis,
 )
 from .task import AnalyzerTask
 
@@ -50,20 +49,24 @@ class Analyzer:
     """Helium Base Analyzer"""
 
     info: AnalyzerInfo
-    config_cls: FusionAnalyzerConfigType
+    config_cls: Type[HeliumAnalyzerConfig]
+    # cancelled when the work lease is lost, tools must be run using
+    # helper.subprocess so that they are terminated on cancellation
     process_impl: Callable[
-        [AnalyzerInfo, FusionAnalyzerConfig, Storage, AnalyzerTask],
+        [AnalyzerInfo, HeliumAnalyzerConfig, Storage, AnalyzerTask],
         Awaitable[bool],
     ]
     _event: Event = field(default_factory=Event)
-    _queue: PriorityQueue = field(default_factory=PriorityQueue)
+    _wakeup: Event = field(default_factory=Event)
     _redis: Redis | None = None
+    _work: WorkQueue | None = None
     _config: HeliumServerConfig | None = None
     _storage: Storage | None = None
+    _cache: ExtractionCache | None = None
     _notifier: FusionNotifier | None = None
 
     @cached_property
-    def config(self) -> FusionAnalyzerConfig:
+    def config(self) -> HeliumAnalyzerConfig:
         """Analyzer configuration"""
         return self._config.analyzer.get(self.info.name, self.config_cls)
 
@@ -107,62 +110,168 @@ class Analyzer:
         )
         await self._notifier.notify(event)
 
-    async def _task_startup(self, a_task: AnalyzerTask) -> bool:
+    async def _task_startup(self, a_task: AnalyzerTask) -> CacheLease:
         await self.update_analysis_status(a_task, Status.EXTRACTING)
-        extracted = await extract_collection(
-            self._redis, self.storage, a_task.case.guid, a_task.collection.guid
+        lease = await extract_collection(
+            self._cache,
+            a_task.case.guid,
+            a_task.collection.guid,
+            self.config.include,
         )
-        if not extracted:
+        if not lease:
             raise AnalyzerError("extracted data is not available")
+        return lease
 
     async def _task_cleanup(self, a_task: AnalyzerTask, success: bool):
+        args = (
+            a_task.case.guid,
+            a_task.collection.guid,
+            a_task.analysis.analyzer,
+        )
+        if success:
+            analysis = await self.storage.archive_analysis(
+                *args, self.config.archive
+            )
+            success = analysis is not None
+        else:
+            await self.storage.delete_analysis_output(*args)
         status = Status.SUCCESS if success else Status.FAILURE
         await self.update_analysis_status(a_task, status)
 
+    async def _prepare_task(self, lease: WorkLease) -> AnalyzerTask | None:
+        found = await find_analysis(
+            self.storage,
+            self.info.name,
+            lease.case_guid,
+            lease.collection_guid,
+        )
+        if not found:
+            return None
+        case, collection, analysis = found
+        a_task = AnalyzerTask(
+            priority=PRIORITY_INT[analysis.priority],
+            created=analysis.created,
+            case=case,
+            collection=collection,
+            analysis=analysis,
+        )
+        status = analysis.status
+        if status in (Status.EXTRACTING, Status.PROCESSING):
+            # lease of the replica processing this analysis expired
+            _LOGGER.warning("restarting analysis %s", analysis.guid)
+            await self.update_analysis_status(a_task, Status.PENDING)
+            status = Status.PENDING
+        if status == Status.PENDING:
+            await self.update_analysis_status(a_task, Status.QUEUED)
+            status = Status.QUEUED
+        if status != Status.QUEUED:
+            return None
+        return a_task
+
+    async def _process(self, a_task: AnalyzerTask, work_lease: WorkLease):
+        _LOGGER.info(
+            "analyzer %s processing collection %s",
+            a_task.analysis.analyzer,
+            a_task.collection.guid,
+        )
+        success = False
+        lease = None
+        try:
+            lease = await self._task_startup(a_task)
+            if work_lease.lost:
+                raise LeaseLostError(work_lease.member)
+            await self.update_analysis_status(a_task, Status.PROCESSING)
+            success = await work_lease.guard(
+                self.process_impl(self.info, self.config, self.storage, a_task)
+            )
+        except AnalyzerError as exc:
+            _LOGGER.error("analyzer error: %s", exc)
+        except LeaseLostError:
+            _LOGGER.error("abandoned analysis %s", a_task.analysis.guid)
+        finally:
+            # analysis belongs to another replica once lease is lost
+            if not work_lease.lost:
+                await self._task_cleanup(a_task, success)
+            if lease:
+                await lease.release()
+
+    async def _claim(self) -> WorkLease | None:
+        try:
+            return await self._work.claim()
+        except RedisError:
+            _LOGGER.warning("failed to claim analysis")
+            return None
+
     async def _consumer(self):
         while not self._event.is_set():
-            try:
-                a_task = await wait_for(self._queue.get(), 5)
-            except TimeoutError:
+            self._wakeup.clear()
+            lease = await self._claim()
+            if not lease:
+                with suppress(TimeoutError):
+                    await wait_for(self._wakeup.wait(), 1)
                 continue
-            _LOGGER.info(
-                "analyzer %s processing collection %s",
-                a_task.analysis.analyzer,
-                a_task.collection.guid,
-            )
-            success = False
             try:
-                await self._task_startup(a_task)
-                await self.update_analysis_status(a_task, Status.PROCESSING)
-                success = await self.process_impl(
-                    self.info, self.config, self.storage, a_task
-                )
-            except AnalyzerError as exc:
-                _LOGGER.error("analyzer error: %s", exc)
+                a_task = await self._prepare_task(lease)
+                if a_task:
+                    await self._process(a_task, lease)
             finally:
-                await self._task_cleanup(a_task, success)
+                await lease.release()
+
+    async def _enqueue(
+        self, case: Case, collection: Collection, analysis: Analysis
+    ):
+        if analysis.completed:
+            return
+        try:
+            queued = await self._work.enqueue(
+                case.guid,
+                collection.guid,
+                PRIORITY_INT[analysis.priority],
+                analysis.created,
+            )
+        except RedisError:
+            # found again by next reconciliation
+            _LOGGER.warning("failed to queue analysis %s", analysis.guid)
+            return
+        if queued:
+            _LOGGER.info("producer queueing analysis %s", analysis.guid)
+            self._wakeup.set()
+
+    async def _reconcile(self):
+        # incomplete analyses neither queued nor leased (lost signal, redis
+        # data loss, interrupted analysis) are queued again
+        _LOGGER.info("producer is looking for incomplete analyses...")
+        async for case, collection, analysis in find_analyses(
+            self.storage, self.info.name
+        ):
+            await self._enqueue(case, collection, analysis)
 
     async def _producer(self):
         _LOGGER.info("producer is starting...")
-        while not self._event.is_set():
-            _LOGGER.info("producer is looking for pending analyses...")
-            async for case, collection, analysis in find_pending_analyses(
-                self.storage, self.info.name
-            ):
-                a_task = AnalyzerTask(
-                    priority=PRIORITY_INT[analysis.priority],
-                    created=analysis.created,
-                    case=case,
-                    collection=collection,
-                    analysis=analysis,
-                )
-                _LOGGER.info("producer queueing analysis %s", analysis.guid)
-                await self._queue.put(a_task)
-                await self.update_analysis_status(a_task, Status.QUEUED)
-            try:
-                await wait_for(self._event.wait(), 30)
-            except TimeoutError:
-                continue
+        listener = WorkListener(redis=self._redis, analyzer=self.info.name)
+        reconcile = 0.0
+        try:
+            while not self._event.is_set():
+                timeout = min(5.0, max(0.0, reconcile - monotonic()))
+                signaled = await listener.receive(timeout)
+                if signaled is None:
+                    # (re)subscribed, signals sent before were missed
+                    reconcile = 0.0
+                    signaled = []
+                for case_guid, collection_guid in signaled:
+                    found = await find_analysis(
+                        self.storage,
+                        self.info.name,
+                        case_guid,
+                        collection_guid,
+                    )
+                    if found:
+                        await self._enqueue(*found)
+                if monotonic() >= reconcile:
+                    await self._reconcile()
+                    reconcile = monotonic() + self.config.reconcile
+        finally:
+            await listener.close()
         _LOGGER.info("producer shutdown")
 
     async def _register_analyzer(self) -> bool:
@@ -170,13 +279,6 @@ class Analyzer:
         await self._storage.register_analyzer(self.info)
         _LOGGER.info("registered %s", self.info.name)
 
-    async def _recover_incomplete_analyses(self):
-        _LOGGER.info("analyses recovery in progress...")
-        recovered = await perform_analyses_recovery(
-            self.storage, self.info.name
-        )
-        _LOGGER.info("recovered %d analyses...", recovered)
-
     async def _produce_and_consume(self):
         coros = [self._producer()]
         coros.extend([self._consumer() for _ in range(self.config.workers)])
@@ -191,6 +293,12 @@ class Analyzer:
         )
         self._redis = create_redis(self._config.server.redis_url)
         self._storage = Storage(config=self._config.storage)
+        self._cache = ExtractionCache(redis=self._redis, storage=self._storage)
+        self._work = WorkQueue(
+            redis=self._redis,
+            analyzer=self.info.name,
+            lease_ttl=self.config.lease_ttl,
+        )
         async with session:
             self._notifier = FusionNotifier(
                 redis=self._redis,
@@ -199,11 +307,12 @@ class Analyzer:
                 webhooks=[self._config.event_api.webhook],
             )
             await self._register_analyzer()
-            await self._recover_incomplete_analyses()
             try:
                 await self._produce_and_consume()
             finally:
                 self._notifier = None
+                self._work = None
+                self._cache = None
                 await close_redis(self._redis)
                 self._redis = None
 
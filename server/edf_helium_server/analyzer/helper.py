@@ -6,11 +6,19 @@ from uuid import UUID
 
 from edf_fusion.concept import AnalyzerInfo
 from edf_fusion.helper.logging import get_logger
-from edf_fusion.helper.redis import Redis, create_redis_lock
-from edf_fusion.helper.zip import extract_zip
-from edf_helium_core.concept import Analysis, Case, Collection, Status
+from edf_helium_core.concept import Analysis, Case, Collection
 from generaptor.concept import Outcome
 
+from ..helper.cache import (
+    CacheLease,
+    ExtractionCache,
+    extracted_include,
+    extraction_lock,
+    is_extracted,
+    record_include,
+)
+from ..helper.executor import IOClass
+from ..helper.extract import extract_zip_parallel
 from ..storage import CollectionStorage, Storage
 
 _LOGGER = get_logger('server.analyzer.helper', root='helium')
@@ -33,53 +41,45 @@ async def find_analyses(
     storage: Storage, analyzer: str
 ) -> AsyncIterator[Case, Collection, Analysis]:
     """Find all analyzer analyses in storage"""
-    async for case in storage.enumerate_cases():
-        if case.closed:
-            continue
-        async for collection in storage.enumerate_collections(case.guid):
-            a_storage = storage.analysis_storage(
-                case.guid, collection.guid, analyzer
-            )
-            if not a_storage.metadata.is_file():
-                continue
-            analysis = await storage.retrieve_analysis(
-                case.guid, collection.guid, analyzer
-            )
-            yield case, collection, analysis
-
-
-async def find_pending_analyses(
-    storage: Storage, analyzer: str
-) -> AsyncIterator[Case, Collection, Analysis]:
-    """Find pending analyzer analyses in storage"""
-    async for case, collection, analysis in find_analyses(storage, analyzer):
-        if analysis.status != Status.PENDING:
-            continue
+    async for case, collection, analysis in storage.find_analyses(analyzer):
         yield case, collection, analysis
 
 
-async def perform_analyses_recovery(storage: Storage, analyzer: str) -> int:
-    """Perform analysis recovery when service was stopped while ananyzing"""
-    recovered = 0
-    async for case, collection, analysis in find_analyses(storage, analyzer):
-        if analysis.completed:
-            continue
-        if analysis.status == Status.PENDING:
-            continue
-        await storage.update_analysis(
-            case.guid,
-            collection.guid,
-            analysis.analyzer,
-            {'status': Status.PENDING.value},
-        )
-        recovered += 1
-    return recovered
+async def find_analysis(
+    storage: Storage, analyzer: str, case_guid: UUID, collection_guid: UUID
+) -> tuple[Case, Collection, Analysis] | None:
+    """Find analyzer analysis of a collection in an open case"""
+    case = await storage.retrieve_case(case_guid)
+    if not case or case.closed:
+        return None
+    analysis = await storage.retrieve_analysis(
+        case_guid, collection_guid, analyzer
+    )
+    if not analysis:
+        return None
+    collection = await storage.retrieve_collection(case_guid, collection_guid)
+    if not collection:
+        return None
+    return case, collection, analysis
 
 
 async def _extract_simple_zip(
+    storage: Storage,
     collection_storage: CollectionStorage,
+    include: list[str] | None,
 ) -> Outcome:
-    extract_zip(collection_storage.data, collection_storage.data_dir)
+    config = storage.config.extract
+    outcome = await storage.io.run(
+        IOClass.ARCHIVE,
+        extract_zip_parallel,
+        collection_storage.data,
+        collection_storage.data_dir,
+        config.workers,
+        config.processes,
+        include,
+    )
+    if outcome == Outcome.FAILURE or include is not None:
+        return outcome
     try:
         next(collection_storage.data_dir.iterdir())
     except (StopIteration, OSError):
@@ -93,13 +93,12 @@ async def _extract_generaptor_zip(
     case_guid: UUID,
     collection: Collection,
     collection_storage: CollectionStorage,
+    include: list[str] | None,
 ) -> Outcome:
     # find matching collector
-    collector_guid = None
-    async for collector in storage.enumerate_collectors(case_guid):
-        if collector.fingerprint != collection.fingerprint:
-            continue
-        collector_guid = collector.guid
+    collector_guid = await storage.find_collector_guid(
+        case_guid, collection.fingerprint
+    )
     if not collector_guid:
         _LOGGER.error(
             "cannot find a collector matching collection fingerprint %s",
@@ -116,15 +115,24 @@ async def _extract_generaptor_zip(
         )
         return Outcome.FAILURE
     # extract collection
-    return storage.generaptor.extract_collection(
+    config = storage.config.extract
+    return await storage.io.run(
+        IOClass.ARCHIVE,
+        storage.generaptor.extract_collection,
         collector_secrets,
         collection_storage.data,
         collection_storage.data_dir,
+        config.workers,
+        config.processes,
+        include,
     )
 
 
 async def _extract_collection(
-    storage: Storage, case_guid: UUID, collection_guid: UUID
+    storage: Storage,
+    case_guid: UUID,
+    collection_guid: UUID,
+    include: list[str] | None,
 ) -> Outcome:
     _LOGGER.info("extracting collection %s", collection_guid)
     # retrieve collection metadata
@@ -142,43 +150,61 @@ async def _extract_collection(
     # collection fingerprint is not set (not an generaptor collection)
     if not collection.fingerprint:
         _LOGGER.info("extracting collection using 'simple zip' strategy")
-        return await _extract_simple_zip(collection_storage)
+        return await _extract_simple_zip(storage, collection_storage, include)
     # collection fingerprint is set (generaptor collection)
     _LOGGER.info("extracting collection using 'generaptor zip' strategy")
     return await _extract_generaptor_zip(
-        storage, case_guid, collection, collection_storage
+        storage, case_guid, collection, collection_storage, include
     )
 
 
 async def extract_collection(
-    redis: Redis, storage: Storage, case_guid: UUID, collection_guid: UUID
-) -> bool:
-    """Extract collection (with system-wide mutex)"""
+    cache: ExtractionCache,
+    case_guid: UUID,
+    collection_guid: UUID,
+    include: list[str] | None = None,
+) -> CacheLease | None:
+    """Extract collection (with system-wide mutex)
+
+    Only members matching include globs are extracted when given, members
+    extracted for other analyzers are reused. Returned lease prevents
+    eviction of extracted data until released.
+    """
+    storage = cache.storage
     collection_storage = storage.collection_storage(case_guid, collection_guid)
-    extracted_flag = collection_storage.data_dir / '__extracted__'
-    lock_name = f'collection-extract-lock-{collection_guid}'
-    lock = create_redis_lock(redis, lock_name)
-    _LOGGER.info("waiting for %s", lock_name)
+    lease = cache.lease(collection_guid)
+    lock = extraction_lock(cache.redis, collection_guid)
+    _LOGGER.info("waiting for extraction lock of %s", collection_guid)
     async with lock:
-        if extracted_flag.is_dir():
+        satisfied = await storage.io.run(
+            IOClass.METADATA, extracted_include, collection_storage
+        )
+        if is_extracted(satisfied, include):
             _LOGGER.info(
                 "extraction skipped for collection %s", collection_guid
             )
-            return True
+            await lease.acquire()
+            await cache.hit(collection_storage)
+            return lease
         outcome = await _extract_collection(
-            storage, case_guid, collection_guid
+            storage, case_guid, collection_guid, include
         )
         if outcome != Outcome.SUCCESS:
             _LOGGER.error(
                 "extraction failure for collection %s", collection_guid
             )
-            return False
-        try:
-            extracted_flag.mkdir(parents=False, exist_ok=False)
-        except FileExistsError:
-            _LOGGER.error(
-                "extracted flag found in collection %s", collection_guid
-            )
-            return False
+            return None
+        await storage.io.run(
+            IOClass.METADATA,
+            record_include,
+            collection_storage,
+            satisfied,
+            include,
+        )
         _LOGGER.info("extraction complete for collection %s", collection_guid)
-        return True
+        await lease.acquire()
+        await cache.miss(collection_storage)
+    evicted = await cache.enforce()
+    if evicted:
+        _LOGGER.info("evicted %d extracted collections", evicted)
+    return lease
@@ -7,13 +7,18 @@ from .case import (
     api_analyses_get,
     api_analysis_delete,
     api_analysis_download_get,
+    api_analysis_file_get,
+    api_analysis_files_get,
     api_analysis_get,
     api_analysis_log_get,
     api_analysis_post,
     api_analysis_put,
+    api_case_overview_get,
     api_collection_cache_delete,
     api_collection_delete,
     api_collection_download_get,
+    api_collection_file_get,
+    api_collection_files_get,
     api_collection_get,
     api_collection_post,
     api_collection_put,
@@ -25,6 +30,12 @@ from .case import (
     api_collector_post,
     api_collector_secrets_get,
     api_collectors_get,
+    api_collectors_post,
+    api_upload_complete_post,
+    api_upload_delete,
+    api_upload_get,
+    api_upload_post,
+    api_upload_put,
     attach_case_impl,
     create_case_impl,
     delete_case_impl,
@@ -39,6 +50,7 @@ from .config import (
     api_targets_get,
 )
 from .disk_usage import api_disk_usage_get
+from .metrics import api_metrics_get
 
 _LOGGER = get_logger('server.api', root='helium')
 
@@ -48,8 +60,10 @@ def setup_api(webapp: Application):
     _LOGGER.info("install helium api...")
     webapp.add_routes(
         [
+            get('/api/case/{case_guid}/overview', api_case_overview_get),
             get('/api/case/{case_guid}/collectors', api_collectors_get),
             post('/api/case/{case_guid}/collector', api_collector_post),
+            post('/api/case/{case_guid}/collectors', api_collectors_post),
             post(
                 '/api/case/{case_guid}/collector/import',
                 api_collector_import_post,
@@ -72,6 +86,17 @@ def setup_api(webapp: Application):
             ),
             get('/api/case/{case_guid}/collections', api_collections_get),
             post('/api/case/{case_guid}/collection', api_collection_post),
+            post('/api/case/{case_guid}/upload', api_upload_post),
+            get('/api/case/{case_guid}/upload/{upload_guid}', api_upload_get),
+            put('/api/case/{case_guid}/upload/{upload_guid}', api_upload_put),
+            post(
+                '/api/case/{case_guid}/upload/{upload_guid}/complete',
+                api_upload_complete_post,
+            ),
+            delete(
+                '/api/case/{case_guid}/upload/{upload_guid}',
+                api_upload_delete,
+            ),
             delete(
                 '/api/case/{case_guid}/collection/{collection_guid}',
                 api_collection_delete,
@@ -92,6 +117,14 @@ def setup_api(webapp: Application):
                 '/api/case/{case_guid}/collection/{collection_guid}/download',
                 api_collection_download_get,
             ),
+            get(
+                '/api/case/{case_guid}/collection/{collection_guid}/files',
+                api_collection_files_get,
+            ),
+            get(
+                '/api/case/{case_guid}/collection/{collection_guid}/file/{path:.+}',
+                api_collection_file_get,
+            ),
             get(
                 '/api/case/{case_guid}/collection/{collection_guid}/analyses',
                 api_analyses_get,
@@ -120,11 +153,20 @@ def setup_api(webapp: Application):
                 '/api/case/{case_guid}/collection/{collection_guid}/analysis/{analyzer}/download',
                 api_analysis_download_get,
             ),
+            get(
+                '/api/case/{case_guid}/collection/{collection_guid}/analysis/{analyzer}/files',
+                api_analysis_files_get,
+            ),
+            get(
+                '/api/case/{case_guid}/collection/{collection_guid}/analysis/{analyzer}/file/{path:.+}',
+                api_analysis_file_get,
+            ),
             get('/api/config/analyzers', api_analyzers_get),
             get('/api/config/{opsystem}/profiles', api_profiles_get),
             get('/api/config/{opsystem}/targets', api_targets_get),
             get('/api/config/{opsystem}/rules', api_rules_get),
             get('/api/disk_usage', api_disk_usage_get),
+            get('/api/metrics', api_metrics_get),
         ]
     )
     _LOGGER.info("helium api installed...")
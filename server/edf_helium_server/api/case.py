@@ -9,8 +9,10 @@ from edf_fusion.helper.aiohttp import (
     stream_multipart_parts,
     stream_response,
 )
+from edf_fusion.helper.config import ConfigError
 from edf_fusion.helper.logging import get_logger
 from edf_fusion.helper.streaming import stream_from_file
+from edf_fusion.server.auth import get_fusion_auth_api
 from edf_fusion.server.case import (
     AttachContext,
     CreateContext,
@@ -24,7 +26,22 @@ from edf_fusion.server.event import get_fusion_evt_api
 from edf_fusion.server.storage import get_fusion_storage
 from edf_helium_core.concept import Case, Status
 
-from ..helper.aiohttp import prologue
+from ..config import HeliumAnalyzerConfig, get_helium_config
+from ..helper.aiohttp import (
+    member_response,
+    not_modified,
+    paged_response,
+    prologue,
+    tagged_response,
+)
+from ..helper.download import get_helium_dl_api
+from ..helper.query import (
+    Query,
+    analysis_sort_key,
+    collection_sort_key,
+    collector_sort_key,
+    page_of,
+)
 
 _LOGGER = get_logger('server.api.case', root='helium')
 
@@ -78,9 +95,25 @@ async def retrieve_case_impl(ctx: RetrieveContext) -> Case | None:
 
 
 async def enumerate_cases_impl(ctx: EnumerateContext) -> list[Case]:
-    """Enumerate cases"""
+    """Enumerate cases (limit, cursor and filters from query string)"""
     storage = get_fusion_storage(ctx.request)
-    return [case async for case in storage.enumerate_cases()]
+    fusion_auth_api = get_fusion_auth_api(ctx.request)
+    try:
+        query = Query.from_request(ctx.request)
+    except ValueError:
+        _LOGGER.warning("invalid case enumeration query, ignored")
+        query = Query()
+    # access filtering happens after storage enumeration, limit is applied
+    # on accessible cases only
+    limit, query.limit = query.limit, None
+    cases = []
+    async for case in storage.enumerate_cases(query):
+        if not fusion_auth_api.can_access_case(ctx.identity, case):
+            continue
+        cases.append(case)
+        if limit and len(cases) >= limit:
+            break
+    return cases
 
 
 async def api_analyses_get(request: Request):
@@ -92,14 +125,22 @@ async def api_analyses_get(request: Request):
         'enumerate_analyses',
         context={'case_guid': case_guid, 'collection_guid': collection_guid},
     )
-    return json_response(
-        data=[
-            analysis.to_dict()
-            async for analysis in storage.enumerate_analyses(
-                case_guid, collection_guid
-            )
-        ]
+    try:
+        query = Query.from_request(request)
+    except ValueError:
+        return json_response(status=400, message="Invalid query")
+    etag = await storage.analyses_etag(
+        case_guid, collection_guid, salt=request.query_string
+    )
+    response = not_modified(request, etag)
+    if response:
+        return response
+    data, cursor = await page_of(
+        storage.enumerate_analyses(case_guid, collection_guid, query),
+        query,
+        analysis_sort_key,
     )
+    return paged_response(data, cursor, etag)
 
 
 async def api_analysis_delete(request: Request):
@@ -165,11 +206,20 @@ async def api_analysis_log_get(request: Request) -> StreamResponse:
     return response
 
 
+def _analysis_archive_config(request: Request, analyzer: str):
+    config = get_helium_config(request)
+    try:
+        analyzer_config = config.analyzer.get(analyzer, HeliumAnalyzerConfig)
+    except ConfigError:
+        return None
+    return analyzer_config.archive
+
+
 async def api_analysis_download_get(request: Request):
     """Retrieve analysis pending download key"""
     case_guid = get_guid(request, 'case_guid')
     collection_guid = get_guid(request, 'collection_guid')
-    fusion_dl_api = get_fusion_dl_api(request)
+    helium_dl_api = get_helium_dl_api(request)
     analyzer = request.match_info['analyzer']
     _, storage = await prologue(
         request,
@@ -180,13 +230,30 @@ async def api_analysis_download_get(request: Request):
             'analyzer': analyzer,
         },
     )
-    filepath = await storage.retrieve_analysis_data(
+    analysis = await storage.retrieve_analysis(
         case_guid, collection_guid, analyzer
     )
-    if not filepath:
+    if not analysis:
         return json_response(status=404, message="Analysis not found")
-    filename = f'{collection_guid}_{analyzer}.zip'
-    pdk = await fusion_dl_api.prepare(filepath, filename)
+    extension = analysis.archive_format or 'zip'
+    filename = f'{collection_guid}_{analyzer}.{extension}'
+    stream = None
+    if analysis.status == Status.SUCCESS:
+        stream = await storage.retrieve_analysis_stream(
+            case_guid,
+            collection_guid,
+            analyzer,
+            _analysis_archive_config(request, analyzer),
+        )
+    if stream:
+        pdk = await helium_dl_api.prepare_stream(stream, filename)
+    else:
+        filepath = await storage.retrieve_analysis_data(
+            case_guid, collection_guid, analyzer
+        )
+        if not filepath:
+            return json_response(status=404, message="Analysis not found")
+        pdk = await helium_dl_api.prepare(filepath, filename)
     if not pdk:
         return json_response(
             status=503, message="Cannot process more download requests for now"
@@ -194,6 +261,51 @@ async def api_analysis_download_get(request: Request):
     return json_response(data=pdk.to_dict())
 
 
+async def api_analysis_files_get(request: Request):
+    """Retrieve analysis output archive members"""
+    case_guid = get_guid(request, 'case_guid')
+    collection_guid = get_guid(request, 'collection_guid')
+    analyzer = request.match_info['analyzer']
+    _, storage = await prologue(
+        request,
+        'enumerate_analysis_files',
+        context={
+            'case_guid': case_guid,
+            'collection_guid': collection_guid,
+            'analyzer': analyzer,
+        },
+    )
+    members = await storage.retrieve_analysis_members(
+        case_guid, collection_guid, analyzer
+    )
+    if members is None:
+        return json_response(status=404, message="Analysis not found")
+    return json_response(data=[member.to_dict() for member in members])
+
+
+async def api_analysis_file_get(request: Request):
+    """Retrieve analysis output archive member content"""
+    case_guid = get_guid(request, 'case_guid')
+    collection_guid = get_guid(request, 'collection_guid')
+    analyzer = request.match_info['analyzer']
+    path = request.match_info['path']
+    _, storage = await prologue(
+        request,
+        'retrieve_analysis_file',
+        context={
+            'case_guid': case_guid,
+            'collection_guid': collection_guid,
+            'analyzer': analyzer,
+        },
+    )
+    reader = await storage.retrieve_analysis_member(
+        case_guid, collection_guid, analyzer, path
+    )
+    if not reader:
+        return json_response(status=404, message="File not found")
+    return await member_response(request, storage, reader)
+
+
 async def api_analysis_get(request: Request):
     """Retrieve case collection analysis metadata"""
     case_guid = get_guid(request, 'case_guid')
@@ -208,12 +320,16 @@ async def api_analysis_get(request: Request):
             'analyzer': analyzer,
         },
     )
+    etag = await storage.analysis_etag(case_guid, collection_guid, analyzer)
+    response = not_modified(request, etag)
+    if response:
+        return response
     analysis = await storage.retrieve_analysis(
         case_guid, collection_guid, analyzer
     )
     if not analysis:
         return json_response(status=404, message="Analysis not found")
-    return json_response(data=analysis.to_dict())
+    return tagged_response(analysis.to_dict(), etag)
 
 
 async def api_analysis_post(request: Request):
@@ -350,6 +466,41 @@ async def api_collection_download_get(request: Request):
     return json_response(data=pdk.to_dict())
 
 
+async def api_collection_files_get(request: Request):
+    """Retrieve collection archive members"""
+    case_guid = get_guid(request, 'case_guid')
+    collection_guid = get_guid(request, 'collection_guid')
+    _, storage = await prologue(
+        request,
+        'enumerate_collection_files',
+        context={'case_guid': case_guid, 'collection_guid': collection_guid},
+    )
+    members = await storage.retrieve_collection_members(
+        case_guid, collection_guid
+    )
+    if members is None:
+        return json_response(status=404, message="Collection not found")
+    return json_response(data=[member.to_dict() for member in members])
+
+
+async def api_collection_file_get(request: Request):
+    """Retrieve collection archive member content"""
+    case_guid = get_guid(request, 'case_guid')
+    collection_guid = get_guid(request, 'collection_guid')
+    path = request.match_info['path']
+    _, storage = await prologue(
+        request,
+        'retrieve_collection_file',
+        context={'case_guid': case_guid, 'collection_guid': collection_guid},
+    )
+    reader = await storage.retrieve_collection_member(
+        case_guid, collection_guid, path
+    )
+    if not reader:
+        return json_response(status=404, message="File not found")
+    return await member_response(request, storage, reader)
+
+
 async def api_collection_get(request: Request):
     """Retrieve case collection metadata"""
     case_guid = get_guid(request, 'case_guid')
@@ -359,10 +510,14 @@ async def api_collection_get(request: Request):
         'retrieve_collection',
         context={'case_guid': case_guid, 'collection_guid': collection_guid},
     )
+    etag = await storage.collection_etag(case_guid, collection_guid)
+    response = not_modified(request, etag)
+    if response:
+        return response
     collection = await storage.retrieve_collection(case_guid, collection_guid)
     if not collection:
         return json_response(status=404, message="Collection not found")
-    return json_response(data=collection.to_dict())
+    return tagged_response(collection.to_dict(), etag)
 
 
 async def api_collection_post(request: Request):
@@ -397,6 +552,121 @@ async def api_collection_post(request: Request):
     return json_response(data=collection_dct)
 
 
+async def api_upload_post(request: Request):
+    """Create case upload session"""
+    case_guid = get_guid(request, 'case_guid')
+    _, storage = await prologue(
+        request,
+        'create_upload',
+        context={'case_guid': case_guid, 'case_open_check': True},
+    )
+    body = await get_json_body(request)
+    if body is None:
+        return json_response(status=400, message="Invalid upload")
+    try:
+        upload = await storage.create_upload(case_guid, body)
+    except ValueError as exc:
+        return json_response(status=400, message=str(exc))
+    return json_response(data=upload.to_dict())
+
+
+async def api_upload_get(request: Request):
+    """Retrieve case upload session"""
+    case_guid = get_guid(request, 'case_guid')
+    upload_guid = get_guid(request, 'upload_guid')
+    _, storage = await prologue(
+        request,
+        'retrieve_upload',
+        context={'case_guid': case_guid, 'upload_guid': upload_guid},
+    )
+    upload = await storage.retrieve_upload(case_guid, upload_guid)
+    if not upload:
+        return json_response(status=404, message="Upload not found")
+    return json_response(data=upload.to_dict())
+
+
+async def api_upload_put(request: Request):
+    """Append chunk to case upload session"""
+    case_guid = get_guid(request, 'case_guid')
+    upload_guid = get_guid(request, 'upload_guid')
+    _, storage = await prologue(
+        request,
+        'update_upload',
+        context={
+            'case_guid': case_guid,
+            'upload_guid': upload_guid,
+            'case_open_check': True,
+        },
+    )
+    try:
+        offset = int(request.query['offset'])
+    except (KeyError, ValueError):
+        return json_response(status=400, message="Invalid offset")
+    try:
+        upload = await storage.append_upload(
+            case_guid, upload_guid, offset, request.content.iter_any()
+        )
+    except ValueError as exc:
+        return json_response(status=416, message=str(exc))
+    if upload:
+        return json_response(data=upload.to_dict())
+    upload = await storage.retrieve_upload(case_guid, upload_guid)
+    if not upload:
+        return json_response(status=404, message="Upload not found")
+    return json_response(
+        status=409, message=f"Offset mismatch, expected {upload.offset}"
+    )
+
+
+async def api_upload_complete_post(request: Request):
+    """Turn case upload session into a collection"""
+    case_guid = get_guid(request, 'case_guid')
+    upload_guid = get_guid(request, 'upload_guid')
+    fusion_evt_api = get_fusion_evt_api(request)
+    _, storage = await prologue(
+        request,
+        'complete_upload',
+        context={
+            'case_guid': case_guid,
+            'upload_guid': upload_guid,
+            'case_open_check': True,
+        },
+    )
+    body = await get_json_body(request)
+    if body is None:
+        return json_response(status=400, message="Invalid upload")
+    collection = await storage.complete_upload(case_guid, upload_guid, body)
+    if not collection:
+        return json_response(status=400, message="Invalid collection")
+    case = await storage.retrieve_case(case_guid)
+    collection_dct = collection.to_dict()
+    await fusion_evt_api.notify(
+        category='create_collection',
+        case=case,
+        ext=collection_dct,
+    )
+    return json_response(data=collection_dct)
+
+
+async def api_upload_delete(request: Request):
+    """Delete case upload session"""
+    case_guid = get_guid(request, 'case_guid')
+    upload_guid = get_guid(request, 'upload_guid')
+    _, storage = await prologue(
+        request,
+        'delete_upload',
+        context={
+            'case_guid': case_guid,
+            'upload_guid': upload_guid,
+            'is_delete_op': True,
+        },
+    )
+    deleted = await storage.delete_upload(case_guid, upload_guid)
+    if not deleted:
+        return json_response(status=404, message="Upload not found")
+    return json_response(data={})
+
+
 async def api_collection_put(request: Request):
     """Update case collection"""
     case_guid = get_guid(request, 'case_guid')
@@ -435,12 +705,30 @@ async def api_collections_get(request: Request):
     _, storage = await prologue(
         request, 'enumerate_collections', context={'case_guid': case_guid}
     )
-    return json_response(
-        data=[
-            collection.to_dict()
-            async for collection in storage.enumerate_collections(case_guid)
-        ]
+    try:
+        query = Query.from_request(request)
+    except ValueError:
+        return json_response(status=400, message="Invalid query")
+    etag = await storage.collections_etag(case_guid, salt=request.query_string)
+    response = not_modified(request, etag)
+    if response:
+        return response
+    data, cursor = await page_of(
+        storage.enumerate_collections(case_guid, query),
+        query,
+        collection_sort_key,
+    )
+    return paged_response(data, cursor, etag)
+
+
+async def api_case_overview_get(request: Request):
+    """Retrieve case collections along with their analyses"""
+    case_guid = get_guid(request, 'case_guid')
+    _, storage = await prologue(
+        request, 'retrieve_case_overview', context={'case_guid': case_guid}
     )
+    overview = await storage.case_overview(case_guid)
+    return json_response(data=[item.to_dict() for item in overview])
 
 
 async def api_collector_delete(request: Request):
@@ -481,6 +769,9 @@ async def api_collector_download_get(request: Request):
         'download_collector',
         context={'case_guid': case_guid, 'collector_guid': collector_guid},
     )
+    collector = await storage.retrieve_collector(case_guid, collector_guid)
+    if collector and not collector.built:
+        return json_response(status=409, message="Collector is being built")
     executable = await storage.retrieve_collector_executable(
         case_guid, collector_guid
     )
@@ -510,7 +801,7 @@ async def api_collector_get(request: Request):
 
 
 async def api_collector_post(request: Request):
-    """Create case collector"""
+    """Create case collector, built in background"""
     case_guid = get_guid(request, 'case_guid')
     fusion_evt_api = get_fusion_evt_api(request)
     _, storage = await prologue(
@@ -529,7 +820,33 @@ async def api_collector_post(request: Request):
         case=case,
         ext=collector_dct,
     )
-    return json_response(data=collector_dct)
+    return json_response(status=202, data=collector_dct)
+
+
+async def api_collectors_post(request: Request):
+    """Create case collectors, respond before they are built"""
+    case_guid = get_guid(request, 'case_guid')
+    fusion_evt_api = get_fusion_evt_api(request)
+    _, storage = await prologue(
+        request,
+        'create_collector',
+        context={'case_guid': case_guid, 'case_open_check': True},
+    )
+    body = await get_json_body(request)
+    if not isinstance(body, list) or not body:
+        return json_response(status=400, message="Invalid collector batch")
+    collectors = await storage.create_collectors(case_guid, body)
+    if collectors is None:
+        return json_response(status=400, message="Invalid collector batch")
+    case = await storage.retrieve_case(case_guid)
+    collector_dcts = [collector.to_dict() for collector in collectors]
+    for collector_dct in collector_dcts:
+        await fusion_evt_api.notify(
+            category='create_collector',
+            case=case,
+            ext=collector_dct,
+        )
+    return json_response(status=202, data=collector_dcts)
 
 
 async def api_collector_import_post(request: Request):
@@ -578,9 +895,13 @@ async def api_collectors_get(request: Request):
     _, storage = await prologue(
         request, 'enumerate_collectors', context={'case_guid': case_guid}
     )
-    return json_response(
-        data=[
-            collector.to_dict()
-            async for collector in storage.enumerate_collectors(case_guid)
-        ]
-    )
+    try:
+        query = Query.from_request(request)
+    except ValueError:
+        return json_response(status=400, message="Invalid query")
+    data, cursor = await page_of(
+        storage.enumerate_collectors(case_guid, query),
+        query,
+        collector_sort_key,
+    )
+    return paged_response(data, cursor)
@@ -3,16 +3,13 @@
 from aiohttp.web import Request
 from edf_fusion.helper.aiohttp import json_response
 from edf_fusion.server.config import FusionAnalyzerConfig
-from edf_helium_core.concept import Profile, Rule, Target
-from generaptor.concept import (
-    OperatingSystem,
-    get_profile_mapping,
-    get_rule_set,
-    get_target_set,
-)
+from generaptor.concept import OperatingSystem
 
 from ..config import get_helium_config
-from ..helper.aiohttp import prologue
+from ..helper.aiohttp import not_modified, prologue, serialized_response
+from ..helper.executor import IOClass
+from ..helper.generaptor import Resolution
+from ..storage import Storage
 
 
 def _get_opsystem(request: Request) -> OperatingSystem | None:
@@ -22,25 +19,23 @@ def _get_opsystem(request: Request) -> OperatingSystem | None:
         return None
 
 
+async def _resolve(storage: Storage, opsystem: OperatingSystem) -> Resolution:
+    return await storage.io.run(
+        IOClass.METADATA, storage.generaptor.resolve, opsystem
+    )
+
+
 async def api_profiles_get(request: Request):
     """Retrieve collection profiles for given operating system"""
     opsystem = _get_opsystem(request)
     _, storage = await prologue(
         request, 'enumerate_profiles', context={'opsystem': opsystem.value}
     )
-    profile_mapping = get_profile_mapping(
-        storage.generaptor.cache,
-        storage.generaptor.config,
-        opsystem,
-    )
-    if not profile_mapping:
-        return json_response(data=[])
-    return json_response(
-        data=[
-            Profile(name=name, targets=set(profile.targets)).to_dict()
-            for name, profile in profile_mapping.items()
-        ]
-    )
+    resolution = await _resolve(storage, opsystem)
+    response = not_modified(request, resolution.etag)
+    if response:
+        return response
+    return serialized_response(resolution.profiles, resolution.etag)
 
 
 async def api_rules_get(request: Request):
@@ -49,26 +44,13 @@ async def api_rules_get(request: Request):
     _, storage = await prologue(
         request, 'enumerate_rules', context={'opsystem': opsystem.value}
     )
-    _, rule_set = get_rule_set(
-        storage.generaptor.cache,
-        storage.generaptor.config,
-        opsystem,
-    )
-    if not rule_set:
+    resolution = await _resolve(storage, opsystem)
+    if resolution.rules is None:
         return json_response(status=404, message="RuleSet not found")
-    return json_response(
-        data=[
-            Rule(
-                uid=rule.uid,
-                name=rule.name,
-                category=rule.category,
-                glob=rule.glob,
-                accessor=rule.accessor,
-                comment=rule.comment,
-            ).to_dict()
-            for rule in rule_set.rules.values()
-        ]
-    )
+    response = not_modified(request, resolution.etag)
+    if response:
+        return response
+    return serialized_response(resolution.rules, resolution.etag)
 
 
 async def api_targets_get(request: Request):
@@ -77,23 +59,11 @@ async def api_targets_get(request: Request):
     _, storage = await prologue(
         request, 'enumerate_targets', context={'opsystem': opsystem.value}
     )
-    max_uid, _ = get_rule_set(
-        storage.generaptor.cache,
-        storage.generaptor.config,
-        opsystem,
-    )
-    target_set = get_target_set(
-        storage.generaptor.cache,
-        storage.generaptor.config,
-        opsystem,
-        max_uid,
-    )
-    return json_response(
-        data=[
-            Target(name=target.name, rule_uids=target.rule_uids).to_dict()
-            for target in target_set.targets.values()
-        ]
-    )
+    resolution = await _resolve(storage, opsystem)
+    response = not_modified(request, resolution.etag)
+    if response:
+        return response
+    return serialized_response(resolution.targets, resolution.etag)
 
 
 async def api_analyzers_get(request: Request):
@@ -0,0 +1,22 @@
+"""/api/metrics route implementation"""
+
+from aiohttp.web import Request
+from edf_fusion.helper.aiohttp import json_response
+from edf_fusion.helper.redis import get_redis
+from edf_fusion.server.storage import get_fusion_storage
+
+from ..helper.aiohttp import prologue
+from ..helper.cache import cache_stats
+
+
+async def api_metrics_get(request: Request):
+    """Retrieve extracted collection cache and key pool counters"""
+    await prologue(request, 'metrics', context={})
+    redis = get_redis(request)
+    storage = get_fusion_storage(request)
+    return json_response(
+        data={
+            'cache': await cache_stats(redis),
+            'key_pool': storage.key_pool.stats(),
+        }
+    )
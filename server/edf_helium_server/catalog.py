@@ -0,0 +1,48 @@
+"""Helium Catalog"""
+
+from argparse import ArgumentParser, Namespace
+from asyncio import run
+from pathlib import Path
+
+from edf_fusion.helper.datetime import utcnow
+from edf_fusion.helper.logging import get_logger
+
+from .__version__ import version
+from .config import HeliumServerConfig
+from .storage import Storage
+
+_LOGGER = get_logger('server.catalog', root='helium')
+
+
+def _parse_args() -> Namespace:
+    parser = ArgumentParser(description="Helium Catalog Rebuild")
+    parser.add_argument(
+        '--config',
+        '-c',
+        type=Path,
+        default=Path('helium.yml'),
+        help="Helium configuration file",
+    )
+    return parser.parse_args()
+
+
+async def _rebuild_catalog(storage: Storage):
+    _LOGGER.info("rebuilding catalog...")
+    start = utcnow()
+    if not await storage.rebuild_catalog():
+        return
+    storage.catalog.close()
+    _LOGGER.info("rebuilding catalog took %s", utcnow() - start)
+
+
+def app():
+    """Helium catalog entrypoint"""
+    _LOGGER.info("Helium Catalog %s", version)
+    args = _parse_args()
+    try:
+        config = HeliumServerConfig.from_filepath(args.config)
+    except:
+        _LOGGER.exception("invalid configuration file: %s", args.config)
+        return
+    storage = Storage(config=config.storage)
+    run(_rebuild_catalog(storage))
@@ -1,6 +1,7 @@
 """Configuration"""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from os import cpu_count
 from pathlib import Path
 from typing import Self
 
@@ -10,6 +11,7 @@ from edf_fusion.helper.serializing import Loadable
 from edf_fusion.server.auth import FusionAuthAPIConfig
 from edf_fusion.server.case import FusionCaseAPIConfig
 from edf_fusion.server.config import (
+    FusionAnalyzerConfig,
     FusionAnalyzerMapping,
     FusionServerConfig,
     FusionStorageConfig,
@@ -20,22 +22,154 @@ from edf_fusion.server.download import FusionDownloadAPIConfig
 from edf_fusion.server.event import FusionEventAPIConfig
 from edf_fusion.server.info import FusionInfoAPIConfig
 
+from .helper.archive import Compression
+from .helper.digest import DIGEST_ALGORITHMS
+
 _LOGGER = get_logger('server.config', root='helium')
 _HELIUM_CONFIG = '__helium_config'
 
 
+def _cpu_count() -> int:
+    return cpu_count() or 1
+
+
 @dataclass(kw_only=True)
 class GeneraptorConfig(Loadable):
     """Generaptor configuration"""
 
     cache: Path
     config: Path
+    key_ttl: int = 600
 
     @classmethod
     def from_dict(cls, dct: dict) -> Self:
         return cls(
             cache=Path(dct['cache']),
             config=Path(dct['config']),
+            key_ttl=max(0, dct.get('key_ttl', 600)),
+        )
+
+
+@dataclass(kw_only=True)
+class ArchiveConfig(Loadable):
+    """Analysis archive configuration"""
+
+    compression: Compression = Compression.DEFLATE
+    level: int | None = None
+    threads: int = 1
+    store: list[str] | None = None
+    stream: bool = False
+
+    @classmethod
+    def from_dict(cls, dct: dict) -> Self:
+        return cls(
+            compression=Compression(dct.get('compression', 'deflate')),
+            level=dct.get('level'),
+            threads=max(1, dct.get('threads', 1)),
+            store=dct.get('store', []),
+            stream=dct.get('stream', False),
+        )
+
+
+@dataclass(kw_only=True)
+class HeliumAnalyzerConfig(FusionAnalyzerConfig):
+    """Helium analyzer configuration"""
+
+    archive: ArchiveConfig | None = None
+    include: list[str] | None = None
+    reconcile: int = 600
+    lease_ttl: int = 60
+
+    @classmethod
+    def from_dict(cls, dct):
+        config = super().from_dict(dct)
+        config.archive = ArchiveConfig.from_dict(dct.get('archive', {}))
+        config.include = dct.get('include')
+        config.reconcile = max(30, dct.get('reconcile', 600))
+        config.lease_ttl = max(15, dct.get('lease_ttl', 60))
+        return config
+
+
+@dataclass(kw_only=True)
+class IOConfig(Loadable):
+    """Storage i/o concurrency configuration"""
+
+    metadata: int = 8
+    delete: int = 2
+    archive: int = 2
+    upload: int = 8
+
+    @classmethod
+    def from_dict(cls, dct: dict) -> Self:
+        return cls(
+            metadata=max(1, dct.get('metadata', 8)),
+            delete=max(1, dct.get('delete', 2)),
+            archive=max(1, dct.get('archive', 2)),
+            upload=max(1, dct.get('upload', 8)),
+        )
+
+
+@dataclass(kw_only=True)
+class ExtractConfig(Loadable):
+    """Collection extraction configuration"""
+
+    workers: int = 1
+    processes: bool = False
+
+    @classmethod
+    def from_dict(cls, dct: dict) -> Self:
+        return cls(
+            workers=max(1, dct.get('workers', 1)),
+            processes=dct.get('processes', False),
+        )
+
+
+@dataclass(kw_only=True)
+class BuildConfig(Loadable):
+    """Collector build configuration (workers default to CPU count)"""
+
+    workers: int = field(default_factory=_cpu_count)
+
+    @classmethod
+    def from_dict(cls, dct: dict) -> Self:
+        workers = dct.get('workers')
+        return cls(workers=max(1, workers) if workers else _cpu_count())
+
+
+@dataclass(kw_only=True)
+class KeyPoolConfig(Loadable):
+    """Collector key pair pool configuration (size 0 disables the pool)"""
+
+    size: int = 4
+    low_water: int = 1
+
+    @classmethod
+    def from_dict(cls, dct: dict) -> Self:
+        size = max(0, dct.get('size', 4))
+        return cls(
+            size=size,
+            low_water=min(size, max(0, dct.get('low_water', 1))),
+        )
+
+
+@dataclass(kw_only=True)
+class CacheConfig(Loadable):
+    """Extracted collection cache configuration
+
+    Quota is a number of bytes, quota_percent a percentage of the size of
+    the volume holding extractions, the lowest applies when both are set.
+    """
+
+    quota: int | None = None
+    quota_percent: float | None = None
+    lease_ttl: int = 300
+
+    @classmethod
+    def from_dict(cls, dct: dict) -> Self:
+        return cls(
+            quota=dct.get('quota'),
+            quota_percent=dct.get('quota_percent'),
+            lease_ttl=max(30, dct.get('lease_ttl', 300)),
         )
 
 
@@ -44,11 +178,42 @@ class HeliumStorageConfig(FusionStorageConfig):
     """Storage configuration"""
 
     generaptor: GeneraptorConfig | None = None
+    index: bool = False
+    catalog: Path | None = None
+    scratch_directory: Path | None = None
+    io: IOConfig | None = None
+    cache: CacheConfig | None = None
+    extract: ExtractConfig | None = None
+    key_pool: KeyPoolConfig | None = None
+    build: BuildConfig | None = None
+    digests: list[str] | None = None
+    dedup: bool = False
+    upload_expiry: int = 86400
 
     @classmethod
     def from_dict(cls, dct: dict) -> Self:
         config = super().from_dict(dct)
         config.generaptor = GeneraptorConfig.from_dict(dct['generaptor'])
+        config.index = dct.get('index', False)
+        catalog = dct.get('catalog')
+        config.catalog = Path(catalog) if catalog else None
+        scratch_directory = dct.get('scratch_directory')
+        config.scratch_directory = (
+            Path(scratch_directory) if scratch_directory else None
+        )
+        config.io = IOConfig.from_dict(dct.get('io', {}))
+        config.cache = CacheConfig.from_dict(dct.get('cache', {}))
+        config.extract = ExtractConfig.from_dict(dct.get('extract', {}))
+        config.key_pool = KeyPoolConfig.from_dict(dct.get('key_pool', {}))
+        config.build = BuildConfig.from_dict(dct.get('build', {}))
+        config.dedup = dct.get('dedup', False)
+        config.upload_expiry = dct.get('upload_expiry', 86400)
+        config.digests = []
+        for algorithm in dct.get('digests', []):
+            if algorithm not in DIGEST_ALGORITHMS:
+                _LOGGER.warning("ignored unsupported digest: %s", algorithm)
+                continue
+            config.digests.append(algorithm)
         return config
 
 
@@ -1,11 +1,19 @@
 """Helium aiohttp Helper"""
 
-from aiohttp.web import Request
+from mimetypes import guess_type
+from re import compile as regex
+
+from aiohttp.web import Request, Response, StreamResponse
 from edf_fusion.concept import Identity
+from edf_fusion.helper.aiohttp import json_response
 from edf_fusion.server.auth import get_fusion_auth_api
 from edf_fusion.server.storage import get_fusion_storage
 
 from ..storage import Storage
+from .executor import IOClass
+from .member import MemberReader
+
+_RANGE_PATTERN = regex(r'bytes=(\d*)-(\d*)')
 
 
 async def prologue(
@@ -18,3 +26,94 @@ async def prologue(
     )
     storage = get_fusion_storage(request)
     return identity, storage
+
+
+def paged_response(
+    data: list[dict], cursor: str | None, etag: str | None = None
+) -> Response:
+    """JSON response carrying next page cursor in X-Next-Cursor header"""
+    response = json_response(data=data)
+    if cursor:
+        response.headers['X-Next-Cursor'] = cursor
+    response.etag = etag
+    return response
+
+
+def not_modified(request: Request, etag: str | None) -> Response | None:
+    """Not modified response if If-None-Match header matches etag"""
+    if not etag or not request.if_none_match:
+        return None
+    if not any(tag.value in (etag, '*') for tag in request.if_none_match):
+        return None
+    response = Response(status=304)
+    response.etag = etag
+    return response
+
+
+def serialized_response(body: bytes, etag: str | None) -> Response:
+    """Precomputed JSON response carrying an entity tag"""
+    response = Response(body=body, content_type='application/json')
+    response.etag = etag
+    return response
+
+
+def tagged_response(data: dict, etag: str | None) -> Response:
+    """JSON response carrying an entity tag"""
+    response = json_response(data=data)
+    response.etag = etag
+    return response
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse single byte range header into [start, end) bounds"""
+    match = _RANGE_PATTERN.fullmatch(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        return max(0, size - int(last)), size
+    start = int(first)
+    end = min(int(last) + 1, size) if last else size
+    if start >= end:
+        return None
+    return start, end
+
+
+async def member_response(
+    request: Request, storage: Storage, reader: MemberReader
+) -> StreamResponse:
+    """Stream archive member content, honoring single byte range requests"""
+    size = reader.member.size
+    start, end = 0, size
+    status = 200
+    header = request.headers.get('Range')
+    if header:
+        bounds = _parse_range(header, size)
+        if not bounds:
+            response = json_response(
+                status=416, message="Range not satisfiable"
+            )
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response
+        start, end = bounds
+        status = 206
+    content_type, _ = guess_type(reader.member.name)
+    filename = reader.member.name.rsplit('/', 1)[-1].replace('"', '')
+    response = StreamResponse(
+        status=status,
+        headers={
+            'Accept-Ranges': 'bytes',
+            'Content-Type': content_type or 'application/octet-stream',
+            'Content-Disposition': f'inline; filename="{filename}"',
+        },
+    )
+    if status == 206:
+        response.headers['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+    response.content_length = end - start
+    await response.prepare(request)
+    async for chunk in storage.io.iterate(
+        IOClass.ARCHIVE, reader.chunks(start, end)
+    ):
+        await response.write(chunk)
+    await response.write_eof()
+    return response
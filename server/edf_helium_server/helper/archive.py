@@ -0,0 +1,365 @@
+"""Helium Archive Helper"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from fnmatch import fnmatch
+from pathlib import Path
+from struct import pack
+from tarfile import TarFile
+from time import perf_counter
+from typing import Iterator
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+from zlib import DEFLATED, MAX_WBITS, Z_DEFAULT_COMPRESSION, compressobj, crc32
+from zlib import error as ZlibError
+
+from edf_fusion.helper.logging import get_logger
+
+try:
+    from zstandard import ZstdCompressor, ZstdDecompressor, ZstdError
+except ImportError:
+    ZstdCompressor = None
+    ZstdDecompressor = None
+    ZstdError = OSError
+
+_LOGGER = get_logger('server.helper.archive', root='helium')
+# errors raised by archive creation: i/o, compressor and invalid level
+ARCHIVE_ERRORS = (OSError, ValueError, ZlibError, ZstdError)
+_ZIP_MAGIC = b'PK'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_READ_SIZE = 1024 * 1024
+_ZIP64_VERSION = 45
+_ZIP_FLAGS = 0x0808  # data descriptor + utf-8 names
+_ZIP64_MARKER = 0xFFFFFFFF
+_LOCAL_HEADER_SIZE = 30 + 20
+_DATA_DESCRIPTOR_SIZE = 24
+_CENTRAL_HEADER_SIZE = 46 + 28
+_END_RECORDS_SIZE = 56 + 20 + 22
+
+
+class Compression(Enum):
+    """Archive compression"""
+
+    STORE = 'store'
+    DEFLATE = 'deflate'
+    ZSTD = 'zstd'
+
+
+class ArchiveFormat(Enum):
+    """Archive format (also used as file extension)"""
+
+    ZIP = 'zip'
+    TAR_ZST = 'tar.zst'
+
+
+@dataclass(kw_only=True)
+class ArchiveInfo:
+    """Archive creation information"""
+
+    format: ArchiveFormat
+    size: int
+    duration: float
+
+
+def archive_items(
+    files: list[Path], directories: list[Path]
+) -> list[tuple[Path, str]]:
+    """Archive items, directories are archived under their own name"""
+    items = [(item, item.name) for item in files if item.is_file()]
+    for directory in directories:
+        if not directory.is_dir():
+            continue
+        items.extend(
+            (item, str(item.relative_to(directory.parent)))
+            for item in sorted(directory.rglob('*'))
+            if item.is_file()
+        )
+    return items
+
+
+def _dos_datetime(timestamp: float) -> tuple[int, int]:
+    dtv = datetime.fromtimestamp(timestamp)
+    if dtv.year < 1980:
+        return 0, (1 << 5) | 1
+    dos_time = (dtv.hour << 11) | (dtv.minute << 5) | (dtv.second // 2)
+    dos_date = ((dtv.year - 1980) << 9) | (dtv.month << 5) | dtv.day
+    return dos_time, dos_date
+
+
+@dataclass(kw_only=True)
+class _ZipStreamMember:
+    filepath: Path
+    arcname: bytes
+    size: int
+    mode: int
+    mtime: float
+    deflate: bool
+
+
+@dataclass(kw_only=True)
+class ZipStream:
+    """Zip64 archive generated on the fly from files
+
+    Members are written sequentially followed by a data descriptor so that
+    nothing needs to be buffered or written to disk. When every member is
+    stored, the exact archive size is known before streaming starts.
+    """
+
+    members: list[_ZipStreamMember]
+    level: int | None = None
+
+    @classmethod
+    def from_items(
+        cls,
+        items: list[tuple[Path, str]],
+        compression: Compression = Compression.DEFLATE,
+        level: int | None = None,
+        store_patterns: list[str] | None = None,
+    ) -> 'ZipStream':
+        """Build stream from (filepath, arcname) items"""
+        members = []
+        for filepath, arcname in items:
+            stat = filepath.stat()
+            deflate = compression != Compression.STORE and not any(
+                fnmatch(filepath.name, pattern)
+                for pattern in store_patterns or []
+            )
+            members.append(
+                _ZipStreamMember(
+                    filepath=filepath,
+                    arcname=arcname.encode(),
+                    size=stat.st_size,
+                    mode=stat.st_mode,
+                    mtime=stat.st_mtime,
+                    deflate=deflate,
+                )
+            )
+        return cls(members=members, level=level)
+
+    @property
+    def size(self) -> int | None:
+        """Exact archive size, None if at least one member is deflated"""
+        if any(member.deflate for member in self.members):
+            return None
+        return _END_RECORDS_SIZE + sum(
+            _LOCAL_HEADER_SIZE
+            + _DATA_DESCRIPTOR_SIZE
+            + _CENTRAL_HEADER_SIZE
+            + 2 * len(member.arcname)
+            + member.size
+            for member in self.members
+        )
+
+    @property
+    def content_size(self) -> int:
+        """Total size of members content"""
+        return sum(member.size for member in self.members)
+
+    def _member_chunks(
+        self, member: _ZipStreamMember, record: dict
+    ) -> Iterator[bytes]:
+        crc = 0
+        compressed_size = 0
+        compressor = None
+        if member.deflate:
+            level = Z_DEFAULT_COMPRESSION if self.level is None else self.level
+            compressor = compressobj(level, DEFLATED, -MAX_WBITS)
+        with member.filepath.open('rb') as fobj:
+            while chunk := fobj.read(_READ_SIZE):
+                crc = crc32(chunk, crc)
+                if compressor:
+                    chunk = compressor.compress(chunk)
+                compressed_size += len(chunk)
+                if chunk:
+                    yield chunk
+        if compressor:
+            chunk = compressor.flush()
+            compressed_size += len(chunk)
+            yield chunk
+        record['crc'] = crc
+        record['compressed_size'] = compressed_size
+
+    def chunks(self) -> Iterator[bytes]:
+        """Generate archive content"""
+        offset = 0
+        records = []
+        for member in self.members:
+            method = 8 if member.deflate else 0
+            dos_time, dos_date = _dos_datetime(member.mtime)
+            record = {
+                'member': member,
+                'method': method,
+                'dos_time': dos_time,
+                'dos_date': dos_date,
+                'offset': offset,
+            }
+            header = pack(
+                '<IHHHHHIIIHH',
+                0x04034B50,
+                _ZIP64_VERSION,
+                _ZIP_FLAGS,
+                method,
+                dos_time,
+                dos_date,
+                0,
+                _ZIP64_MARKER,
+                _ZIP64_MARKER,
+                len(member.arcname),
+                20,
+            )
+            header += member.arcname + pack('<HHQQ', 0x0001, 16, 0, 0)
+            yield header
+            yield from self._member_chunks(member, record)
+            yield pack(
+                '<IIQQ',
+                0x08074B50,
+                record['crc'],
+                record['compressed_size'],
+                member.size,
+            )
+            offset += (
+                len(header) + record['compressed_size'] + _DATA_DESCRIPTOR_SIZE
+            )
+            records.append(record)
+        cd_offset = offset
+        for record in records:
+            member = record['member']
+            header = pack(
+                '<IHHHHHHIIIHHHHHII',
+                0x02014B50,
+                (3 << 8) | _ZIP64_VERSION,
+                _ZIP64_VERSION,
+                _ZIP_FLAGS,
+                record['method'],
+                record['dos_time'],
+                record['dos_date'],
+                record['crc'],
+                _ZIP64_MARKER,
+                _ZIP64_MARKER,
+                len(member.arcname),
+                28,
+                0,
+                0,
+                0,
+                (member.mode & 0xFFFF) << 16,
+                _ZIP64_MARKER,
+            )
+            header += member.arcname + pack(
+                '<HHQQQ',
+                0x0001,
+                24,
+                member.size,
+                record['compressed_size'],
+                record['offset'],
+            )
+            offset += len(header)
+            yield header
+        cd_size = offset - cd_offset
+        count = len(records)
+        yield pack(
+            '<IQHHIIQQQQ',
+            0x06064B50,
+            44,
+            _ZIP64_VERSION,
+            _ZIP64_VERSION,
+            0,
+            0,
+            count,
+            count,
+            cd_size,
+            cd_offset,
+        )
+        yield pack('<IIQI', 0x07064B50, 0, offset, 1)
+        yield pack(
+            '<IHHHHIIH',
+            0x06054B50,
+            0,
+            0,
+            0xFFFF,
+            0xFFFF,
+            _ZIP64_MARKER,
+            _ZIP64_MARKER,
+            0,
+        )
+
+
+def _create_zip(
+    archive: Path,
+    items: list[tuple[Path, str]],
+    compression: Compression,
+    level: int | None,
+    store_patterns: list[str],
+):
+    compress_type = ZIP_DEFLATED
+    if compression == Compression.STORE:
+        compress_type = ZIP_STORED
+    with ZipFile(archive, 'w', compression=compress_type) as zipf:
+        for item, arcname in items:
+            member_compress_type = compress_type
+            if any(fnmatch(item.name, pattern) for pattern in store_patterns):
+                member_compress_type = ZIP_STORED
+            zipf.write(
+                item,
+                arcname=arcname,
+                compress_type=member_compress_type,
+                compresslevel=level,
+            )
+
+
+def _create_tar_zst(
+    archive: Path,
+    items: list[tuple[Path, str]],
+    level: int | None,
+    threads: int,
+):
+    compressor = ZstdCompressor(level=level or 3, threads=threads)
+    with archive.open('wb') as fobj:
+        with compressor.stream_writer(fobj, closefd=False) as writer:
+            with TarFile.open(fileobj=writer, mode='w|') as tarf:
+                for item, arcname in items:
+                    tarf.add(item, arcname=arcname, recursive=False)
+
+
+def create_archive(
+    archive: Path,
+    files: list[Path] | None = None,
+    directories: list[Path] | None = None,
+    compression: Compression = Compression.DEFLATE,
+    level: int | None = None,
+    threads: int = 1,
+    store_patterns: list[str] | None = None,
+) -> ArchiveInfo:
+    """Create archive from given items using given compression
+
+    Zip is used for store and deflate compressions, members matching one
+    of store_patterns are stored as-is. Zstandard compression produces a
+    tar archive compressed using threads workers.
+    """
+    start = perf_counter()
+    items = archive_items(files or [], directories or [])
+    if compression == Compression.ZSTD and ZstdCompressor is None:
+        _LOGGER.warning("zstandard is not installed, using deflate instead")
+        compression = Compression.DEFLATE
+    _LOGGER.info("creating %s archive: %s", compression.value, archive)
+    if compression == Compression.ZSTD:
+        archive_format = ArchiveFormat.TAR_ZST
+        _create_tar_zst(archive, items, level, threads)
+    else:
+        archive_format = ArchiveFormat.ZIP
+        _create_zip(archive, items, compression, level, store_patterns or [])
+    return ArchiveInfo(
+        format=archive_format,
+        size=archive.stat().st_size,
+        duration=perf_counter() - start,
+    )
+
+
+def detect_archive_format(archive: Path) -> ArchiveFormat | None:
+    """Detect archive format using magic bytes"""
+    with archive.open('rb') as fobj:
+        magic = fobj.read(4)
+    if magic.startswith(_ZIP_MAGIC):
+        return ArchiveFormat.ZIP
+    if magic == _ZSTD_MAGIC:
+        return ArchiveFormat.TAR_ZST
+    return None
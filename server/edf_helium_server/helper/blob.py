@@ -0,0 +1,59 @@
+"""Helium Blob Store Helper"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+
+from edf_fusion.helper.logging import get_logger
+
+_LOGGER = get_logger('server.helper.blob', root='helium')
+
+
+@dataclass(kw_only=True)
+class BlobStore:
+    """Content-addressed store of uploaded files
+
+    Each blob is hardlinked into every storage using it, the filesystem
+    link count is the reference count: a blob linked only once is not
+    referenced anymore and can be removed.
+    """
+
+    directory: Path
+    _lock: Lock = field(default_factory=Lock)
+
+    def _blob(self, sha256: str) -> Path:
+        return self.directory / sha256[:2] / sha256
+
+    def adopt(self, filepath: Path, sha256: str) -> bool:
+        """Replace filepath with a link to the matching blob
+
+        Returns True if an existing blob was reused, False if filepath
+        became a new blob.
+        """
+        blob = self._blob(sha256)
+        with self._lock:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            if blob.is_file():
+                tmp = filepath.with_name(f'.{filepath.name}.link')
+                tmp.unlink(missing_ok=True)
+                tmp.hardlink_to(blob)
+                tmp.replace(filepath)
+                _LOGGER.info("reused blob %s for %s", sha256, filepath)
+                return True
+            blob.hardlink_to(filepath)
+        _LOGGER.info("created blob %s from %s", sha256, filepath)
+        return False
+
+    def release(self, digests: list[str]):
+        """Remove blobs which are not referenced anymore"""
+        with self._lock:
+            for sha256 in digests:
+                blob = self._blob(sha256)
+                try:
+                    nlink = blob.stat().st_nlink
+                except FileNotFoundError:
+                    continue
+                if nlink > 1:
+                    continue
+                blob.unlink()
+                _LOGGER.info("removed blob %s", sha256)
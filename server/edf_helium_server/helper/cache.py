@@ -0,0 +1,320 @@
+"""Helium Extracted Collection Cache Helper"""
+
+from asyncio import CancelledError, Task, create_task, sleep
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import cached_property
+from json import JSONDecodeError, dumps, loads
+from os import utime, walk
+from pathlib import Path
+from shutil import disk_usage, rmtree
+from uuid import UUID, uuid4
+
+from edf_fusion.helper.filesystem import GUID_GLOB
+from edf_fusion.helper.logging import get_logger
+from edf_fusion.helper.redis import Redis, create_redis_lock
+from redis.asyncio.lock import Lock
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+
+from ..config import CacheConfig
+from ..storage import CaseStorage, CollectionStorage, Storage
+from .executor import IOClass
+
+_LOGGER = get_logger('server.helper.cache', root='helium')
+_EXTRACTED_FLAG = '__extracted__'
+_SIZE_FILE = 'size'
+_INCLUDE_FILE = 'include.json'
+_INCLUDE_ALL = '*'
+_STATS_KEY = 'helium-extraction-cache-stats'
+_LEASE_PREFIX = 'helium-extraction-lease'
+_STATS = ('hits', 'misses', 'evictions', 'evicted_bytes')
+# redis time is used so that replicas do not depend on their own clocks
+_NOW = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+"""
+# leases of a collection are members of a sorted set scored by expiry, the
+# set itself expires with its last lease if holders vanish
+# KEYS: leases / ARGV: member, ttl
+_HOLD = _NOW + """
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[1])
+local last = redis.call('ZRANGE', KEYS[1], -1, -1, 'WITHSCORES')
+redis.call('PEXPIRE', KEYS[1], tonumber(last[2]) - now)
+return 1
+"""
+# KEYS: leases
+_HELD = _NOW + """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+return redis.call('ZCARD', KEYS[1])
+"""
+
+
+def extracted_flag(collection_storage: CollectionStorage) -> Path:
+    """Directory created once collection extraction succeeded"""
+    return collection_storage.data_dir / _EXTRACTED_FLAG
+
+
+def extracted_include(collection_storage: CollectionStorage) -> list[str]:
+    """Include globs satisfied by previous extractions
+
+    An extracted flag without include file denotes a complete extraction.
+    """
+    flag = extracted_flag(collection_storage)
+    if not flag.is_dir():
+        return []
+    try:
+        return loads((flag / _INCLUDE_FILE).read_text())
+    except FileNotFoundError:
+        return [_INCLUDE_ALL]
+    except (OSError, JSONDecodeError):
+        _LOGGER.warning("invalid include file in %s", flag)
+        return []
+
+
+def is_extracted(satisfied: list[str], include: list[str] | None) -> bool:
+    """Determine if satisfied globs cover include globs (None: everything)"""
+    if _INCLUDE_ALL in satisfied:
+        return True
+    if include is None:
+        return False
+    return set(include).issubset(satisfied)
+
+
+def record_include(
+    collection_storage: CollectionStorage,
+    satisfied: list[str],
+    include: list[str] | None,
+):
+    """Record include globs satisfied by an extraction"""
+    flag = extracted_flag(collection_storage)
+    flag.mkdir(parents=False, exist_ok=True)
+    globs = [_INCLUDE_ALL]
+    if include is not None:
+        globs = sorted(set(satisfied).union(include))
+    (flag / _INCLUDE_FILE).write_text(dumps(globs))
+    # extraction size changed, computed again on next access
+    (flag / _SIZE_FILE).unlink(missing_ok=True)
+
+
+def extraction_lock(redis: Redis, collection_guid: UUID | str) -> Lock:
+    """System-wide collection extraction mutex"""
+    return create_redis_lock(
+        redis, f'collection-extract-lock-{collection_guid}'
+    )
+
+
+async def cache_stats(redis: Redis) -> dict[str, int]:
+    """Retrieve cache counters shared by every analyzer"""
+    values = await redis.hgetall(_STATS_KEY)
+    return {name: int(values.get(name.encode(), 0)) for name in _STATS}
+
+
+def _tree_size(directory: Path) -> int:
+    size = 0
+    for root, _, filenames in walk(directory):
+        for filename in filenames:
+            with suppress(OSError):
+                size += (Path(root) / filename).lstat().st_size
+    return size
+
+
+@dataclass(kw_only=True)
+class _CacheEntry:
+    collection_storage: CollectionStorage
+    accessed: float
+    size: int
+
+
+def _cache_entry(collection_storage: CollectionStorage) -> _CacheEntry | None:
+    flag = extracted_flag(collection_storage)
+    try:
+        accessed = flag.stat().st_mtime
+    except OSError:
+        return None
+    size_file = flag / _SIZE_FILE
+    try:
+        size = int(size_file.read_text())
+    except (OSError, ValueError):
+        # computed once, writing the size file must not count as an access
+        size = _tree_size(collection_storage.data_dir)
+        with suppress(OSError):
+            size_file.write_text(str(size))
+            utime(flag, (accessed, accessed))
+    return _CacheEntry(
+        collection_storage=collection_storage, accessed=accessed, size=size
+    )
+
+
+def _cache_entries(directory: Path) -> list[_CacheEntry]:
+    # storage and scratch directories share the same layout
+    entries = []
+    for case_dir in directory.glob(GUID_GLOB):
+        if not case_dir.is_dir():
+            continue
+        case_storage = CaseStorage(directory=case_dir)
+        for collection_storage in case_storage.collections():
+            entry = _cache_entry(collection_storage)
+            if entry:
+                entries.append(entry)
+    entries.sort(key=lambda entry: entry.accessed)
+    return entries
+
+
+def _evict(collection_storage: CollectionStorage):
+    # flag goes first so that a partial removal is never seen as extracted
+    rmtree(extracted_flag(collection_storage), ignore_errors=True)
+    collection_storage.remove_data_dir()
+
+
+@dataclass(kw_only=True)
+class CacheLease:
+    """Prevent eviction of an extracted collection while held"""
+
+    cache: 'ExtractionCache'
+    key: str
+    member: str
+    _task: Task | None = None
+
+    async def _refresh(self):
+        while True:
+            await sleep(self.cache.config.lease_ttl / 3)
+            try:
+                await self.cache.hold(self)
+            except RedisError:
+                _LOGGER.warning("failed to refresh lease %s", self.key)
+
+    async def acquire(self):
+        """Acquire lease"""
+        await self.cache.hold(self)
+        self._task = create_task(self._refresh())
+
+    async def release(self):
+        """Release lease"""
+        if self._task:
+            self._task.cancel()
+            with suppress(CancelledError):
+                await self._task
+            self._task = None
+        await self.cache.redis.zrem(self.key, self.member)
+
+
+@dataclass(kw_only=True)
+class ExtractionCache:
+    """Extracted collection cache with quota and LRU eviction
+
+    The last access of an extraction is the mtime of its extracted flag and
+    its size is computed once then stored in the flag directory. Leases and
+    counters live in redis so that every analyzer process shares them.
+    """
+
+    redis: Redis
+    storage: Storage
+
+    @property
+    def config(self) -> CacheConfig:
+        """Cache configuration"""
+        return self.storage.config.cache
+
+    @property
+    def directory(self) -> Path:
+        """Directory holding extractions (scratch directory if any)"""
+        config = self.storage.config
+        return config.scratch_directory or config.directory
+
+    @cached_property
+    def _scripts(self) -> dict[str, AsyncScript]:
+        return {
+            name: self.redis.register_script(script)
+            for name, script in (('hold', _HOLD), ('held', _HELD))
+        }
+
+    def lease(self, collection_guid: UUID) -> CacheLease:
+        """Create collection lease, acquire it under extraction lock"""
+        return CacheLease(
+            cache=self,
+            key=f'{_LEASE_PREFIX}-{collection_guid}',
+            member=uuid4().hex,
+        )
+
+    async def hold(self, lease: CacheLease):
+        """Acquire or extend lease"""
+        await self._scripts['hold'](
+            keys=[lease.key],
+            args=[lease.member, self.config.lease_ttl * 1000],
+        )
+
+    async def hit(self, collection_storage: CollectionStorage):
+        """Record an access to an existing extraction"""
+        flag = extracted_flag(collection_storage)
+        await self.storage.io.run(IOClass.METADATA, utime, flag)
+        await self.redis.hincrby(_STATS_KEY, 'hits', 1)
+
+    async def miss(self, collection_storage: CollectionStorage):
+        """Record a new extraction"""
+        await self.storage.io.run(
+            IOClass.METADATA, _cache_entry, collection_storage
+        )
+        await self.redis.hincrby(_STATS_KEY, 'misses', 1)
+
+    def _budget(self) -> int | None:
+        budgets = []
+        if self.config.quota is not None:
+            budgets.append(self.config.quota)
+        if self.config.quota_percent is not None:
+            total = disk_usage(self.directory).total
+            budgets.append(int(total * self.config.quota_percent / 100))
+        return min(budgets) if budgets else None
+
+    async def _is_leased(self, collection_guid: str) -> bool:
+        held = await self._scripts['held'](
+            keys=[f'{_LEASE_PREFIX}-{collection_guid}']
+        )
+        return bool(held)
+
+    async def _evict_entry(self, entry: _CacheEntry) -> bool:
+        collection_storage = entry.collection_storage
+        collection_guid = collection_storage.directory.name
+        lock = extraction_lock(self.redis, collection_guid)
+        if not await lock.acquire(blocking=False):
+            return False
+        try:
+            if await self._is_leased(collection_guid):
+                return False
+            _LOGGER.info(
+                "evicting extracted collection %s (%d bytes)",
+                collection_guid,
+                entry.size,
+            )
+            await self.storage.io.run(
+                IOClass.DELETE, _evict, collection_storage
+            )
+        finally:
+            await lock.release()
+        await self.redis.hincrby(_STATS_KEY, 'evictions', 1)
+        await self.redis.hincrby(_STATS_KEY, 'evicted_bytes', entry.size)
+        return True
+
+    async def enforce(self) -> int:
+        """Evict least recently used extractions until cache fits budget"""
+        budget = self._budget()
+        if budget is None:
+            return 0
+        entries = await self.storage.io.run(
+            IOClass.METADATA, _cache_entries, self.directory
+        )
+        used = sum(entry.size for entry in entries)
+        evicted = 0
+        for entry in entries:
+            if used <= budget:
+                break
+            if await self._evict_entry(entry):
+                used -= entry.size
+                evicted += 1
+        if used > budget:
+            _LOGGER.warning(
+                "extraction cache uses %d bytes out of %d (leased)",
+                used,
+                budget,
+            )
+        return evicted
@@ -0,0 +1,36 @@
+"""Helium Case API"""
+
+from dataclasses import dataclass
+
+from aiohttp.web import Request, Response
+from edf_fusion.helper.aiohttp import json_response
+from edf_fusion.server.auth import get_fusion_auth_api
+from edf_fusion.server.case import EnumerateContext, FusionCaseAPI
+
+from .aiohttp import paged_response
+from .query import Query, case_sort_key, encode_cursor
+
+
+@dataclass(kw_only=True)
+class HeliumCaseAPI(FusionCaseAPI):
+    """Fusion Case API paging case enumeration"""
+
+    async def enumerate_cases(self, request: Request) -> Response:
+        """Enumerate cases, next page cursor in X-Next-Cursor header"""
+        fusion_auth_api = get_fusion_auth_api(request)
+        identity = await fusion_auth_api.authorize(request, 'enumerate_cases')
+        try:
+            query = Query.from_request(request)
+        except ValueError:
+            return json_response(status=400, message="Invalid query")
+        ctx = EnumerateContext(request=request, identity=identity)
+        cases = await self.enumerate_cases_impl(ctx)
+        data = [
+            query.project(case.to_dict())
+            for case in cases
+            if fusion_auth_api.can_access_case(identity, case)
+        ]
+        cursor = None
+        if cases and query.limit and len(cases) >= query.limit:
+            cursor = encode_cursor(case_sort_key(cases[-1]))
+        return paged_response(data, cursor)
@@ -0,0 +1,443 @@
+"""Helium Catalog Helper"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import cached_property
+from pathlib import Path
+from sqlite3 import Connection, connect
+from threading import RLock
+from uuid import UUID
+
+from edf_fusion.helper.datetime import to_iso
+from edf_fusion.helper.logging import get_logger
+from edf_fusion.helper.serializing import dump_json, load_json
+from edf_helium_core.concept import (
+    Analysis,
+    Case,
+    Collection,
+    CollectionOverview,
+    Collector,
+    Status,
+)
+
+from .query import Query
+
+_LOGGER = get_logger('server.helper.catalog', root='helium')
+# bump when schema or stored values change, outdated catalogs are rebuilt
+_VERSION = 1
+_TABLES = ('cases', 'collectors', 'collections', 'collection_tags', 'analyses')
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cases (
+    guid TEXT PRIMARY KEY,
+    closed INTEGER NOT NULL,
+    created TEXT NOT NULL,
+    dct TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS collectors (
+    guid TEXT PRIMARY KEY,
+    case_guid TEXT NOT NULL,
+    fingerprint TEXT,
+    opsystem TEXT NOT NULL,
+    created TEXT NOT NULL,
+    dct TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS collectors_case ON collectors (case_guid);
+CREATE INDEX IF NOT EXISTS collectors_fingerprint ON collectors (fingerprint);
+CREATE TABLE IF NOT EXISTS collections (
+    guid TEXT PRIMARY KEY,
+    case_guid TEXT NOT NULL,
+    hostname TEXT,
+    fingerprint TEXT,
+    opsystem TEXT,
+    created TEXT NOT NULL,
+    dct TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS collections_case ON collections (case_guid, created);
+CREATE INDEX IF NOT EXISTS collections_hostname ON collections (hostname);
+CREATE INDEX IF NOT EXISTS collections_fingerprint ON collections (fingerprint);
+CREATE INDEX IF NOT EXISTS collections_created ON collections (created);
+CREATE TABLE IF NOT EXISTS collection_tags (
+    collection_guid TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (collection_guid, tag)
+);
+CREATE INDEX IF NOT EXISTS collection_tags_tag ON collection_tags (tag);
+CREATE TABLE IF NOT EXISTS analyses (
+    case_guid TEXT NOT NULL,
+    collection_guid TEXT NOT NULL,
+    analyzer TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    created TEXT NOT NULL,
+    dct TEXT NOT NULL,
+    PRIMARY KEY (collection_guid, analyzer)
+);
+CREATE INDEX IF NOT EXISTS analyses_case ON analyses (case_guid);
+CREATE INDEX IF NOT EXISTS analyses_status ON analyses (analyzer, status);
+CREATE INDEX IF NOT EXISTS analyses_created ON analyses (created);
+'''
+
+
+def _iso(dtv: datetime) -> str:
+    return to_iso(dtv.astimezone(timezone.utc))
+
+
+def _page(
+    query: Query, key_column: str, clauses: list[str], parameters: list
+) -> tuple[str, tuple]:
+    """Append cursor and created range clauses, ordering and limit"""
+    if query.created_after:
+        clauses.append('created >= ?')
+        parameters.append(_iso(query.created_after))
+    if query.created_before:
+        clauses.append('created < ?')
+        parameters.append(_iso(query.created_before))
+    if query.cursor:
+        created, key = query.cursor
+        clauses.append(f'(created > ? OR (created = ? AND {key_column} > ?))')
+        parameters.extend([_iso(created), _iso(created), key])
+    statement = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+    statement += f' ORDER BY created, {key_column}'
+    if query.limit:
+        statement += ' LIMIT ?'
+        parameters.append(query.limit)
+    return statement, tuple(parameters)
+
+
+@dataclass(kw_only=True)
+class Catalog:
+    """SQLite catalog mirroring storage metadata
+
+    Metadata files remain the source of truth, the catalog is updated by
+    storage write operations and can be rebuilt from disk at any time.
+    """
+
+    filepath: Path
+    _lock: RLock = field(default_factory=RLock)
+
+    @cached_property
+    def _connection(self) -> Connection:
+        _LOGGER.info("opening catalog: %s", self.filepath)
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        connection = connect(
+            self.filepath,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.executescript(_SCHEMA)
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[Connection]:
+        """Execute statements in a single transaction"""
+        with self._lock:
+            connection = self._connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    def _query(self, statement: str, parameters: tuple) -> list[tuple]:
+        with self._lock:
+            return self._connection.execute(statement, parameters).fetchall()
+
+    def close(self):
+        """Close catalog"""
+        with self._lock:
+            if '_connection' in self.__dict__:
+                self._connection.close()
+                del self.__dict__['_connection']
+
+    def is_stale(self) -> bool:
+        """Determine if catalog shall be rebuilt (new, empty or outdated)"""
+        with self._lock:
+            connection = self._connection
+            (version,) = connection.execute('PRAGMA user_version').fetchone()
+            if version != _VERSION:
+                return True
+            return not connection.execute(
+                'SELECT 1 FROM cases LIMIT 1'
+            ).fetchone()
+
+    def clear(self, connection: Connection):
+        """Remove every entry and recreate schema at current version
+
+        Shall be called inside a transaction.
+        """
+        for table in _TABLES:
+            connection.execute(f'DROP TABLE IF EXISTS {table}')
+        for statement in filter(str.strip, _SCHEMA.split(';')):
+            connection.execute(statement)
+        connection.execute(f'PRAGMA user_version={_VERSION}')
+
+    def upsert_case(self, case: Case, connection: Connection | None = None):
+        """Insert or update case"""
+        with self._in_transaction(connection) as cnx:
+            cnx.execute(
+                'INSERT OR REPLACE INTO cases VALUES (?, ?, ?, ?)',
+                (
+                    str(case.guid),
+                    int(bool(case.closed)),
+                    to_iso(case.created),
+                    dump_json(case.to_dict()),
+                ),
+            )
+
+    def delete_case(
+        self, case_guid: UUID, connection: Connection | None = None
+    ):
+        """Delete case and everything it contains"""
+        with self._in_transaction(connection) as cnx:
+            parameters = (str(case_guid),)
+            cnx.execute(
+                'DELETE FROM collection_tags WHERE collection_guid IN '
+                '(SELECT guid FROM collections WHERE case_guid=?)',
+                parameters,
+            )
+            for table in ('collectors', 'collections', 'analyses'):
+                cnx.execute(
+                    f'DELETE FROM {table} WHERE case_guid=?', parameters
+                )
+            cnx.execute('DELETE FROM cases WHERE guid=?', parameters)
+
+    def upsert_collector(
+        self,
+        case_guid: UUID,
+        collector: Collector,
+        connection: Connection | None = None,
+    ):
+        """Insert or update collector"""
+        with self._in_transaction(connection) as cnx:
+            cnx.execute(
+                'INSERT OR REPLACE INTO collectors VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    str(collector.guid),
+                    str(case_guid),
+                    collector.fingerprint,
+                    collector.distrib.opsystem.value,
+                    to_iso(collector.created),
+                    dump_json(collector.to_dict()),
+                ),
+            )
+
+    def delete_collector(self, collector_guid: UUID):
+        """Delete collector"""
+        with self.transaction() as cnx:
+            cnx.execute(
+                'DELETE FROM collectors WHERE guid=?', (str(collector_guid),)
+            )
+
+    def upsert_collection(
+        self,
+        case_guid: UUID,
+        collection: Collection,
+        connection: Connection | None = None,
+    ):
+        """Insert or update collection"""
+        guid = str(collection.guid)
+        opsystem = collection.opsystem.value if collection.opsystem else None
+        with self._in_transaction(connection) as cnx:
+            cnx.execute(
+                'INSERT OR REPLACE INTO collections '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (
+                    guid,
+                    str(case_guid),
+                    collection.hostname,
+                    collection.fingerprint,
+                    opsystem,
+                    to_iso(collection.created),
+                    dump_json(collection.to_dict()),
+                ),
+            )
+            cnx.execute(
+                'DELETE FROM collection_tags WHERE collection_guid=?', (guid,)
+            )
+            cnx.executemany(
+                'INSERT INTO collection_tags VALUES (?, ?)',
+                [(guid, tag) for tag in collection.tags],
+            )
+
+    def delete_collection(self, collection_guid: UUID):
+        """Delete collection and its analyses"""
+        parameters = (str(collection_guid),)
+        with self.transaction() as cnx:
+            cnx.execute(
+                'DELETE FROM collection_tags WHERE collection_guid=?',
+                parameters,
+            )
+            cnx.execute(
+                'DELETE FROM analyses WHERE collection_guid=?', parameters
+            )
+            cnx.execute('DELETE FROM collections WHERE guid=?', parameters)
+
+    def upsert_analysis(
+        self,
+        case_guid: UUID,
+        collection_guid: UUID,
+        analysis: Analysis,
+        connection: Connection | None = None,
+    ):
+        """Insert or update analysis"""
+        with self._in_transaction(connection) as cnx:
+            cnx.execute(
+                'INSERT OR REPLACE INTO analyses '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (
+                    str(case_guid),
+                    str(collection_guid),
+                    analysis.analyzer,
+                    analysis.status.value,
+                    analysis.priority.value,
+                    to_iso(analysis.created),
+                    dump_json(analysis.to_dict()),
+                ),
+            )
+
+    def delete_analysis(self, collection_guid: UUID, analyzer: str):
+        """Delete analysis"""
+        with self.transaction() as cnx:
+            cnx.execute(
+                'DELETE FROM analyses WHERE collection_guid=? AND analyzer=?',
+                (str(collection_guid), analyzer),
+            )
+
+    def find_collector_guid(
+        self, case_guid: UUID, fingerprint: str
+    ) -> UUID | None:
+        """Find case collector matching fingerprint"""
+        rows = self._query(
+            'SELECT guid FROM collectors '
+            'WHERE fingerprint=? AND case_guid=? LIMIT 1',
+            (fingerprint, str(case_guid)),
+        )
+        if not rows:
+            return None
+        return UUID(rows[0][0])
+
+    def find_analyses(
+        self, analyzer: str, status: Status | None = None
+    ) -> Iterator[tuple[Case, Collection, Analysis]]:
+        """Find analyzer analyses in open cases"""
+        statement = (
+            'SELECT cases.dct, collections.dct, analyses.dct FROM analyses '
+            'JOIN cases ON cases.guid=analyses.case_guid '
+            'JOIN collections ON collections.guid=analyses.collection_guid '
+            'WHERE cases.closed=0 AND analyses.analyzer=?'
+        )
+        parameters = (analyzer,)
+        if status:
+            statement += ' AND analyses.status=?'
+            parameters += (status.value,)
+        statement += ' ORDER BY analyses.created'
+        for case_dct, collection_dct, analysis_dct in self._query(
+            statement, parameters
+        ):
+            yield (
+                Case.from_dict(load_json(case_dct)),
+                Collection.from_dict(load_json(collection_dct)),
+                Analysis.from_dict(load_json(analysis_dct)),
+            )
+
+    def enumerate_cases(self, query: Query) -> Iterator[Case]:
+        """Enumerate cases matching query"""
+        clauses, parameters = [], []
+        if query.status:
+            clauses.append('closed=?')
+            parameters.append(int(query.status == 'closed'))
+        statement, parameters = _page(query, 'guid', clauses, parameters)
+        for (dct,) in self._query(
+            'SELECT dct FROM cases' + statement, parameters
+        ):
+            yield Case.from_dict(load_json(dct))
+
+    def enumerate_collectors(
+        self, case_guid: UUID, query: Query
+    ) -> Iterator[Collector]:
+        """Enumerate case collectors matching query"""
+        clauses, parameters = ['case_guid=?'], [str(case_guid)]
+        if query.opsystem:
+            clauses.append('opsystem=?')
+            parameters.append(query.opsystem.value)
+        statement, parameters = _page(query, 'guid', clauses, parameters)
+        for (dct,) in self._query(
+            'SELECT dct FROM collectors' + statement, parameters
+        ):
+            yield Collector.from_dict(load_json(dct))
+
+    def enumerate_collections(
+        self, case_guid: UUID, query: Query
+    ) -> Iterator[Collection]:
+        """Enumerate case collections matching query"""
+        clauses, parameters = ['case_guid=?'], [str(case_guid)]
+        if query.hostname:
+            clauses.append('hostname=? COLLATE NOCASE')
+            parameters.append(query.hostname)
+        if query.opsystem:
+            clauses.append('opsystem=?')
+            parameters.append(query.opsystem.value)
+        for tag in sorted(query.tags):
+            clauses.append(
+                'guid IN (SELECT collection_guid FROM collection_tags '
+                'WHERE tag=?)'
+            )
+            parameters.append(tag)
+        statement, parameters = _page(query, 'guid', clauses, parameters)
+        for (dct,) in self._query(
+            'SELECT dct FROM collections' + statement, parameters
+        ):
+            yield Collection.from_dict(load_json(dct))
+
+    def enumerate_analyses(
+        self, collection_guid: UUID, query: Query
+    ) -> Iterator[Analysis]:
+        """Enumerate collection analyses matching query"""
+        clauses, parameters = ['collection_guid=?'], [str(collection_guid)]
+        if query.status:
+            clauses.append('status=?')
+            parameters.append(query.status)
+        statement, parameters = _page(query, 'analyzer', clauses, parameters)
+        for (dct,) in self._query(
+            'SELECT dct FROM analyses' + statement, parameters
+        ):
+            yield Analysis.from_dict(load_json(dct))
+
+    def case_overview(self, case_guid: UUID) -> Iterator[CollectionOverview]:
+        """Enumerate case collections along with their analyses"""
+        parameters = (str(case_guid),)
+        analyses = {}
+        for collection_guid, dct in self._query(
+            'SELECT collection_guid, dct FROM analyses '
+            'WHERE case_guid=? ORDER BY analyzer',
+            parameters,
+        ):
+            analyses.setdefault(collection_guid, []).append(
+                Analysis.from_dict(load_json(dct))
+            )
+        for guid, dct in self._query(
+            'SELECT guid, dct FROM collections '
+            'WHERE case_guid=? ORDER BY created, guid',
+            parameters,
+        ):
+            yield CollectionOverview(
+                collection=Collection.from_dict(load_json(dct)),
+                analyses=analyses.get(guid, []),
+            )
+
+    @contextmanager
+    def _in_transaction(
+        self, connection: Connection | None
+    ) -> Iterator[Connection]:
+        if connection:
+            yield connection
+            return
+        with self.transaction() as cnx:
+            yield cnx
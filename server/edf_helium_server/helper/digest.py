@@ -0,0 +1,79 @@
+"""Helium Digest Helper"""
+
+from dataclasses import dataclass, field
+from hashlib import new as new_hash
+from pathlib import Path
+from typing import BinaryIO
+
+from edf_fusion.helper.logging import get_logger
+
+_LOGGER = get_logger('server.helper.digest', root='helium')
+DIGEST_ALGORITHMS = ('md5', 'sha1', 'sha256')
+_READ_SIZE = 1024 * 1024
+
+
+@dataclass(kw_only=True)
+class DigestWriter:
+    """Write file sequentially while computing size and digests
+
+    Hash objects are updated with the exact chunks written to disk so that
+    digests never require reading the file again.
+    """
+
+    filepath: Path
+    algorithms: set[str]
+    size: int = 0
+    _fobj: BinaryIO | None = None
+    _hashes: dict = field(default_factory=dict)
+
+    def open(self):
+        """Truncate file and reset digests"""
+        self.size = 0
+        self._hashes = {
+            algorithm: new_hash(algorithm) for algorithm in self.algorithms
+        }
+        self._fobj = self.filepath.open('wb')
+
+    def resume(self):
+        """Open file for appending
+
+        Digests are rebuilt from file content if this writer did not write
+        it, content written after the last successful write is discarded.
+        """
+        if self._hashes and self.filepath.stat().st_size >= self.size:
+            with self.filepath.open('r+b') as fobj:
+                fobj.truncate(self.size)
+        else:
+            _LOGGER.info("rebuilding digests of %s", self.filepath)
+            self.size = 0
+            self._hashes = {
+                algorithm: new_hash(algorithm) for algorithm in self.algorithms
+            }
+            with self.filepath.open('rb') as fobj:
+                while chunk := fobj.read(_READ_SIZE):
+                    self._update(chunk)
+        self._fobj = self.filepath.open('ab')
+
+    def _update(self, chunk: bytes):
+        for hash_obj in self._hashes.values():
+            hash_obj.update(chunk)
+        self.size += len(chunk)
+
+    def write(self, chunk: bytes):
+        """Write chunk and update digests"""
+        self._fobj.write(chunk)
+        self._update(chunk)
+
+    def close(self):
+        """Flush and close file"""
+        if self._fobj is None:
+            return
+        self._fobj.close()
+        self._fobj = None
+
+    def hexdigests(self) -> dict[str, str]:
+        """Digests of the content written so far"""
+        return {
+            algorithm: hash_obj.hexdigest()
+            for algorithm, hash_obj in self._hashes.items()
+        }
@@ -0,0 +1,99 @@
+"""Helium Download API"""
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+from uuid import UUID
+
+from aiohttp.web import Request, Response, StreamResponse
+from edf_fusion.concept import PendingDownloadKey
+from edf_fusion.helper.datetime import datetime, utcnow
+from edf_fusion.helper.logging import get_logger
+from edf_fusion.server.download import FusionDownloadAPI, get_fusion_dl_api
+from edf_fusion.server.storage import get_fusion_storage
+
+from .archive import ZipStream
+from .executor import IOClass
+
+_LOGGER = get_logger('server.helper.download', root='helium')
+_FIVE_SECONDS = timedelta(seconds=5)
+
+
+@dataclass(kw_only=True)
+class _PendingStreamInfo:
+    """Pending archive stream"""
+
+    created: datetime = field(default_factory=utcnow)
+    stream: ZipStream
+    filename: str
+
+
+@dataclass(kw_only=True)
+class HeliumDownloadAPI(FusionDownloadAPI):
+    """Fusion Download API able to serve archives generated on the fly"""
+
+    _pending_streams: dict[PendingDownloadKey, _PendingStreamInfo] = field(
+        default_factory=dict
+    )
+
+    def _cleanup(self):
+        super()._cleanup()
+        now = utcnow()
+        to_pop = [
+            pdk
+            for pdk, psi in self._pending_streams.items()
+            if now - psi.created > _FIVE_SECONDS
+        ]
+        for pdk in to_pop:
+            self._pending_streams.pop(pdk, None)
+
+    async def prepare_stream(
+        self, stream: ZipStream, filename: str
+    ) -> PendingDownloadKey | None:
+        """Prepare an archive stream for download"""
+        self._cleanup()
+        pending_count = len(self._pending_downloads) + len(
+            self._pending_streams
+        )
+        if pending_count >= self.config.max_pending_count:
+            return None
+        pdk = PendingDownloadKey()
+        self._pending_streams[pdk] = _PendingStreamInfo(
+            stream=stream, filename=filename
+        )
+        return pdk
+
+    async def download(self, request: Request) -> Response | StreamResponse:
+        """Handle client request to download a file or an archive stream"""
+        # note: this route is public, no prior authentication required
+        pdk = PendingDownloadKey(
+            guid=UUID(request.match_info['guid']),
+            token=request.match_info['token'],
+        )
+        psi = self._pending_streams.pop(pdk, None)
+        if not psi:
+            return await super().download(request)
+        storage = get_fusion_storage(request)
+        filename = psi.filename.replace('"', '')
+        response = StreamResponse(
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"'
+            }
+        )
+        size = psi.stream.size
+        _LOGGER.info("streaming archive %s (size: %s)", filename, size)
+        if size is None:
+            response.enable_chunked_encoding()
+        else:
+            response.content_length = size
+        await response.prepare(request)
+        async for chunk in storage.io.iterate(
+            IOClass.ARCHIVE, psi.stream.chunks()
+        ):
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+
+
+def get_helium_dl_api(request: Request) -> HeliumDownloadAPI:
+    """Retrieve HeliumDownloadAPI instance from request"""
+    return get_fusion_dl_api(request)
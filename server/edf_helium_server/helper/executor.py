@@ -0,0 +1,90 @@
+"""Helium Executor Helper"""
+
+from asyncio import Semaphore, get_running_loop
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from functools import cached_property, partial
+from typing import Any
+
+from edf_fusion.helper.logging import get_logger
+
+from ..config import IOConfig
+
+_LOGGER = get_logger('server.helper.executor', root='helium')
+
+
+class IOClass(Enum):
+    """Blocking operation class"""
+
+    METADATA = 'metadata'
+    DELETE = 'delete'
+    ARCHIVE = 'archive'
+    UPLOAD = 'upload'
+
+
+@dataclass(kw_only=True)
+class IOExecutor:
+    """Run blocking filesystem operations in a thread pool
+
+    Each operation class has its own concurrency bound so that a few large
+    deletions or archive operations cannot starve metadata operations.
+    """
+
+    config: IOConfig
+    _semaphores: dict[IOClass, Semaphore] = field(default_factory=dict)
+
+    @cached_property
+    def _executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=sum(self._limits.values()),
+            thread_name_prefix='helium-io',
+        )
+
+    @cached_property
+    def _limits(self) -> dict[IOClass, int]:
+        return {
+            IOClass.METADATA: self.config.metadata,
+            IOClass.DELETE: self.config.delete,
+            IOClass.ARCHIVE: self.config.archive,
+            IOClass.UPLOAD: self.config.upload,
+        }
+
+    def _semaphore(self, io_class: IOClass) -> Semaphore:
+        semaphore = self._semaphores.get(io_class)
+        if semaphore is None:
+            semaphore = Semaphore(self._limits[io_class])
+            self._semaphores[io_class] = semaphore
+        return semaphore
+
+    async def run(self, io_class: IOClass, func: Callable, *args) -> Any:
+        """Run func(*args) in a worker thread, bounded by operation class"""
+        loop = get_running_loop()
+        async with self._semaphore(io_class):
+            return await loop.run_in_executor(
+                self._executor, partial(func, *args)
+            )
+
+    async def iterate(
+        self, io_class: IOClass, iterator: Iterator
+    ) -> AsyncIterator[Any]:
+        """Consume a blocking iterator, one item per worker thread call"""
+        try:
+            while True:
+                item = await self.run(io_class, next, iterator, None)
+                if item is None:
+                    break
+                yield item
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close:
+                await self.run(io_class, close)
+
+    def shutdown(self):
+        """Wait for pending operations and release worker threads"""
+        if '_executor' not in self.__dict__:
+            return
+        _LOGGER.info("waiting for pending i/o operations...")
+        self._executor.shutdown(wait=True)
+        del self.__dict__['_executor']
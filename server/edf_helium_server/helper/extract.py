@@ -0,0 +1,199 @@
+"""Helium Extraction Helper"""
+
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from fnmatch import fnmatchcase
+from os import sep
+from os.path import splitdrive
+from pathlib import Path
+from shutil import copyfileobj
+from zipfile import BadZipFile, ZipFile, ZipInfo
+
+from edf_fusion.helper.logging import get_logger
+from generaptor.concept import Outcome
+
+_LOGGER = get_logger('server.helper.extract', root='helium')
+# bounded per worker memory: one buffer of this size per member being copied
+_COPY_SIZE = 1024 * 1024
+_INVALID_PARTS = {'', '.', '..'}
+
+
+def _member_path(directory: Path, filename: str) -> Path | None:
+    # same sanitization as ZipFile.extract: drive, absolute and parent
+    # components are dropped so that members cannot escape directory
+    arcname = splitdrive(filename)[1]
+    parts = [part for part in arcname.split(sep) if part not in _INVALID_PARTS]
+    if not parts:
+        return None
+    return directory.joinpath(*parts)
+
+
+def _is_included(filename: str, include: list[str] | None) -> bool:
+    # artifacts come from case insensitive filesystems
+    if include is None:
+        return True
+    filename = filename.lower()
+    return any(fnmatchcase(filename, glob.lower()) for glob in include)
+
+
+def _is_extracted(target: Path, member: ZipInfo) -> bool:
+    try:
+        return target.stat().st_size == member.file_size
+    except OSError:
+        return False
+
+
+def is_extracted_member(directory: Path, filename: str, size: int) -> bool:
+    """Determine if member was fully extracted to directory / filename"""
+    target = _member_path(directory, filename)
+    if target is None or target != directory / filename:
+        return False
+    try:
+        return target.stat().st_size == size
+    except OSError:
+        return False
+
+
+def _select_members(
+    infolist: list[ZipInfo],
+    directory: Path,
+    include: list[str] | None = None,
+) -> dict[Path, ZipInfo]:
+    # members not matching include globs (if any) and members extracted by
+    # a previous run are skipped, last occurrence wins like ZipFile.extract
+    members = {}
+    for member in infolist:
+        if member.is_dir() or not _is_included(member.filename, include):
+            continue
+        target = _member_path(directory, member.filename)
+        if target is None:
+            continue
+        members[target] = member
+    return {
+        target: member
+        for target, member in members.items()
+        if not _is_extracted(target, member)
+    }
+
+
+def _create_parents(members: dict[Path, ZipInfo]) -> bool:
+    try:
+        for parent in sorted({target.parent for target in members}):
+            parent.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        _LOGGER.exception("failed to create extraction directories")
+        return False
+    return True
+
+
+def _outcome(failures: list[str]) -> Outcome:
+    if failures:
+        _LOGGER.warning("%d members could not be extracted", len(failures))
+        return Outcome.PARTIAL
+    return Outcome.SUCCESS
+
+
+def _copy_members(
+    zipf: ZipFile, directory: Path, filenames: list[str]
+) -> list[str]:
+    failures = []
+    for filename in filenames:
+        target = _member_path(directory, filename)
+        try:
+            with zipf.open(filename) as src, target.open('wb') as dst:
+                copyfileobj(src, dst, _COPY_SIZE)
+        except (OSError, BadZipFile) as exc:
+            _LOGGER.warning("failed to extract member: %s (%s)", filename, exc)
+            failures.append(filename)
+    return failures
+
+
+def extract_zip_sequential(
+    zipf: ZipFile,
+    directory: Path,
+    include: list[str] | None = None,
+) -> Outcome:
+    """Extract selected members of an opened zip archive in offset order
+
+    Offset order keeps seeking forward, which matters when the archive is
+    itself read from a compressed or encrypted stream.
+    """
+    members = _select_members(zipf.infolist(), directory, include)
+    _LOGGER.info("extracting %d members sequentially", len(members))
+    if not _create_parents(members):
+        return Outcome.FAILURE
+    filenames = [
+        member.filename
+        for member in sorted(
+            members.values(), key=lambda item: item.header_offset
+        )
+    ]
+    failures = _copy_members(zipf, directory, filenames)
+    return _outcome(failures)
+
+
+def _extract_members(
+    archive: Path, directory: Path, filenames: list[str]
+) -> list[str]:
+    """Extract given members using a dedicated handle, return failures"""
+    with ZipFile(archive) as zipf:
+        return _copy_members(zipf, directory, filenames)
+
+
+def _partition(members: list[ZipInfo], count: int) -> list[list[str]]:
+    # largest members first, each one goes to the least loaded bucket
+    buckets = [([], 0) for _ in range(count)]
+    for member in sorted(members, key=lambda item: -item.file_size):
+        index = min(range(count), key=lambda idx: buckets[idx][1])
+        filenames, load = buckets[index]
+        filenames.append(member.filename)
+        buckets[index] = (filenames, load + member.file_size)
+    return [filenames for filenames, _ in buckets if filenames]
+
+
+def _executor(workers: int, processes: bool) -> Executor:
+    if processes:
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix='helium-extract'
+    )
+
+
+def extract_zip_parallel(
+    archive: Path,
+    directory: Path,
+    workers: int = 1,
+    processes: bool = False,
+    include: list[str] | None = None,
+) -> Outcome:
+    """Extract zip archive to directory using workers
+
+    Members are split in balanced sets of disjoint paths, each worker opens
+    its own handle on the archive. Parent directories are created upfront
+    so that workers never race on directory creation.
+    """
+    _LOGGER.info(
+        "extracting zip archive using %d workers: %s", workers, archive
+    )
+    try:
+        with ZipFile(archive) as zipf:
+            infolist = zipf.infolist()
+    except (OSError, BadZipFile):
+        _LOGGER.exception("failed to open zip archive: %s", archive)
+        return Outcome.FAILURE
+    members = _select_members(infolist, directory, include)
+    if not _create_parents(members):
+        return Outcome.FAILURE
+    partitions = _partition(list(members.values()), max(1, workers))
+    failures = []
+    with _executor(len(partitions) or 1, processes) as executor:
+        futures = [
+            executor.submit(_extract_members, archive, directory, filenames)
+            for filenames in partitions
+        ]
+        for future in futures:
+            failures.extend(future.result())
+    return _outcome(failures)
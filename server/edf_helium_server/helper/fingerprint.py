@@ -0,0 +1,85 @@
+"""Helium Collector Fingerprint Index Helper"""
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from json import JSONDecodeError, dumps, loads
+from os import getpid
+from pathlib import Path
+from threading import Lock
+from uuid import UUID
+
+from edf_fusion.helper.logging import get_logger
+from edf_helium_core.concept import Collector
+
+_LOGGER = get_logger('server.helper.fingerprint', root='helium')
+
+
+def _load(filepath: Path) -> dict[str, str] | None:
+    try:
+        return loads(filepath.read_text())
+    except FileNotFoundError:
+        return None
+    except (OSError, JSONDecodeError):
+        _LOGGER.warning("ignored malformed fingerprint index: %s", filepath)
+        return None
+
+
+def _store(filepath: Path, fingerprints: dict[str, str]):
+    # readers in other processes never see a partially written index
+    tmp = filepath.with_name(f'.{filepath.name}.{getpid()}')
+    tmp.write_text(dumps(fingerprints))
+    tmp.replace(filepath)
+
+
+@dataclass(kw_only=True)
+class FingerprintIndex:
+    """Persistent collector fingerprint to collector guid index
+
+    One index file per case. A missing index is built from collector
+    metadata on first lookup and a lookup miss rebuilds it, an index made
+    stale by a concurrent process is therefore repaired on next lookup.
+    """
+
+    _lock: Lock = field(default_factory=Lock)
+
+    def lookup(
+        self,
+        filepath: Path,
+        fingerprint: str,
+        collectors: Callable[[], Iterable[Collector]],
+    ) -> UUID | None:
+        """Find collector guid matching fingerprint"""
+        fingerprints = _load(filepath)
+        if fingerprints is None or fingerprint not in fingerprints:
+            with self._lock:
+                fingerprints = {
+                    collector.fingerprint: str(collector.guid)
+                    for collector in collectors()
+                    if collector.fingerprint
+                }
+                if filepath.parent.is_dir():
+                    _store(filepath, fingerprints)
+        collector_guid = fingerprints.get(fingerprint)
+        return UUID(collector_guid) if collector_guid else None
+
+    def add(self, filepath: Path, fingerprint: str, collector_guid: UUID):
+        """Add collector to index (if index exists)"""
+        with self._lock:
+            fingerprints = _load(filepath)
+            if fingerprints is None:
+                return
+            fingerprints[fingerprint] = str(collector_guid)
+            _store(filepath, fingerprints)
+
+    def remove(self, filepath: Path, collector_guid: UUID):
+        """Remove collector from index (if index exists)"""
+        with self._lock:
+            fingerprints = _load(filepath)
+            if fingerprints is None:
+                return
+            fingerprints = {
+                fingerprint: guid
+                for fingerprint, guid in fingerprints.items()
+                if guid != str(collector_guid)
+            }
+            _store(filepath, fingerprints)
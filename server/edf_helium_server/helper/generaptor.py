@@ -1,22 +1,40 @@
 """Helium Generaptor Helper"""
 
-from dataclasses import dataclass
-from json import JSONDecodeError
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from json import JSONDecodeError, dumps
+from os import walk
 from pathlib import Path
 from secrets import token_urlsafe
+from threading import Lock
+from time import monotonic
+from zipfile import BadZipFile
 
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
 from edf_fusion.helper.logging import get_logger
 from edf_fusion.helper.zip import create_zip
-from edf_helium_core.concept import Collection, Collector, CollectorSecrets
+from edf_helium_core.concept import (
+    Collection,
+    Collector,
+    CollectorSecrets,
+    Profile,
+    Rule,
+    Target,
+)
 from generaptor.concept import Cache as GCache
 from generaptor.concept import Collection as GCollection
 from generaptor.concept import Collector as GCollector
 from generaptor.concept import CollectorConfig as GCollectorConfig
 from generaptor.concept import Config as GConfig
 from generaptor.concept import (
+    OperatingSystem,
     Outcome,
+    ProfileMapping,
+    RuleSet,
+    TargetSet,
     get_profile_mapping,
-    get_ruleset_from_targets,
+    get_rule_set,
+    get_target_set,
 )
 from generaptor.helper.crypto import (
     certificate_from_pem_bytes,
@@ -26,8 +44,166 @@ from generaptor.helper.crypto import (
     private_key_from_pem_bytes,
     private_key_to_pem_bytes,
 )
+from pyzipper import AESZipFile
+from pyzipper import BadZipFile as AESBadZipFile
+
+from .extract import extract_zip_parallel, extract_zip_sequential
+from .member import open_zip
 
 _LOGGER = get_logger('server.helper.generaptor', root='helium')
+_GENERAPTOR_DATA = 'data.zip'
+_BUILDERS: dict[tuple[Path, Path], 'Generaptor'] = {}
+
+
+def generate_collector_secrets() -> CollectorSecrets:
+    """Generate collector secrets (slow, suitable for a worker process)"""
+    secret = token_urlsafe(32).encode('utf-8')
+    private_key, certificate = generate_private_key_and_certificate()
+    return CollectorSecrets(
+        secret=secret,
+        key_pem=private_key_to_pem_bytes(private_key, secret),
+        crt_pem=certificate_to_pem_bytes(certificate),
+    )
+
+
+def collector_fingerprint(collector_secrets: CollectorSecrets) -> str:
+    """Fingerprint of collector certificate"""
+    return fingerprint(certificate_from_pem_bytes(collector_secrets.crt_pem))
+
+
+def build_collector(
+    cache: Path,
+    config: Path,
+    collector: Collector,
+    collector_secrets: CollectorSecrets,
+    output_dir: Path,
+) -> str | None:
+    """Build collector (slow, suitable for a worker process)"""
+    # leftovers of an interrupted build would be mistaken for its output
+    for item in output_dir.iterdir():
+        item.unlink()
+    # kept by worker processes so that resolution is memoized across builds
+    generaptor = _BUILDERS.get((cache, config))
+    if generaptor is None:
+        generaptor = Generaptor(cache=GCache(cache), config=GConfig(config))
+        _BUILDERS[(cache, config)] = generaptor
+    return generaptor.generate_collector(
+        collector, collector_secrets, output_dir
+    )
+
+
+@dataclass(kw_only=True)
+class PrivateKeyCache:
+    """In-memory cache of unlocked collector private keys
+
+    Unlocking a private key is slow by design, unlocked keys are kept in
+    memory for ttl seconds and never written anywhere.
+    """
+
+    ttl: int = 600
+    _keys: dict[tuple[bytes, bytes], tuple[float, RSAPrivateKey]] = field(
+        default_factory=dict
+    )
+    _lock: Lock = field(default_factory=Lock)
+
+    def unlock(self, collector_secrets: CollectorSecrets) -> RSAPrivateKey:
+        """Unlock collector private key"""
+        key = (collector_secrets.key_pem, collector_secrets.secret)
+        now = monotonic()
+        with self._lock:
+            self._keys = {
+                pem: item for pem, item in self._keys.items() if item[0] > now
+            }
+            item = self._keys.get(key)
+        if item:
+            return item[1]
+        private_key = private_key_from_pem_bytes(*key)
+        with self._lock:
+            self._keys[key] = (now + self.ttl, private_key)
+        return private_key
+
+
+def _signature(directories: list[Path]) -> tuple:
+    # adding, removing or modifying any file changes the signature
+    signature = []
+    for directory in directories:
+        for root, _, filenames in walk(directory):
+            for name in ['', *filenames]:
+                try:
+                    stat = (Path(root) / name).stat()
+                except OSError:
+                    continue
+                signature.append((root, name, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(signature))
+
+
+def _serialize(data: list[dict] | None) -> bytes | None:
+    # same body as json_response
+    if data is None:
+        return None
+    return dumps({'status': 200, 'data': data, 'count': len(data)}).encode()
+
+
+@dataclass(kw_only=True)
+class Resolution:
+    """Profiles, rules and targets resolved for an operating system
+
+    Serialized API response bodies are computed once with the resolution.
+    """
+
+    signature: tuple
+    etag: str
+    profile_mapping: ProfileMapping | None
+    rule_set: RuleSet | None
+    target_set: TargetSet | None
+    profiles: bytes
+    rules: bytes | None
+    targets: bytes
+
+    def select(self, targets: list[str]) -> RuleSet | None:
+        """Rule set matching given targets"""
+        if not self.rule_set or not self.target_set:
+            return None
+        return self.target_set.select(self.rule_set, targets)
+
+
+def _resolve(
+    cache: GCache, config: GConfig, opsystem: OperatingSystem, signature: tuple
+) -> Resolution:
+    profile_mapping = get_profile_mapping(cache, config, opsystem)
+    max_uid, rule_set = get_rule_set(cache, config, opsystem)
+    target_set = get_target_set(cache, config, opsystem, max_uid)
+    profiles = [
+        Profile(name=name, targets=set(profile.targets)).to_dict()
+        for name, profile in (profile_mapping or {}).items()
+    ]
+    rules = None
+    if rule_set:
+        rules = [
+            Rule(
+                uid=rule.uid,
+                name=rule.name,
+                category=rule.category,
+                glob=rule.glob,
+                accessor=rule.accessor,
+                comment=rule.comment,
+            ).to_dict()
+            for rule in rule_set.rules.values()
+        ]
+    targets = [
+        Target(name=target.name, rule_uids=target.rule_uids).to_dict()
+        for target in (target_set.targets.values() if target_set else [])
+    ]
+    return Resolution(
+        signature=signature,
+        etag=blake2b(repr(signature).encode(), digest_size=16).hexdigest(),
+        profile_mapping=profile_mapping,
+        rule_set=rule_set,
+        target_set=target_set,
+        profiles=_serialize(profiles),
+        rules=_serialize(rules),
+        targets=_serialize(targets),
+    )
 
 
 @dataclass(kw_only=True)
@@ -36,16 +212,32 @@ class Generaptor:
 
     cache: GCache
     config: GConfig
+    keys: PrivateKeyCache = field(default_factory=PrivateKeyCache)
+    _resolutions: dict[OperatingSystem, Resolution] = field(
+        default_factory=dict
+    )
+    _lock: Lock = field(default_factory=Lock)
+
+    def resolve(self, opsystem: OperatingSystem) -> Resolution:
+        """Resolve profiles, rules and targets (memoized)
 
-    def generate_collector_secrets(self) -> CollectorSecrets:
-        """Generate collector secrets"""
-        secret = token_urlsafe(32).encode('utf-8')
-        private_key, certificate = generate_private_key_and_certificate()
-        return CollectorSecrets(
-            secret=secret,
-            key_pem=private_key_to_pem_bytes(private_key, secret),
-            crt_pem=certificate_to_pem_bytes(certificate),
+        Resolution is computed again when a file of the cache or config
+        directories of the operating system changes.
+        """
+        signature = _signature(
+            [
+                self.cache.config.directory / opsystem.value,
+                self.config.directory / opsystem.value,
+            ]
         )
+        with self._lock:
+            resolution = self._resolutions.get(opsystem)
+            if resolution and resolution.signature == signature:
+                return resolution
+            _LOGGER.info("resolving %s generaptor configuration", opsystem)
+            resolution = _resolve(self.cache, self.config, opsystem, signature)
+            self._resolutions[opsystem] = resolution
+            return resolution
 
     def generate_collector(
         self,
@@ -56,10 +248,8 @@ class Generaptor:
         """Generate collector"""
         _LOGGER.info("generating collector %s", collector.guid)
         # load profile
-        profile_mapping = get_profile_mapping(
-            self.cache, self.config, collector.distrib.opsystem
-        )
-        profile = profile_mapping.get(collector.profile)
+        resolution = self.resolve(collector.distrib.opsystem)
+        profile = (resolution.profile_mapping or {}).get(collector.profile)
         if not profile:
             _LOGGER.error("unknown profile: %s", collector.profile)
             return None
@@ -67,12 +257,7 @@ class Generaptor:
         certificate = certificate_from_pem_bytes(collector_secrets.crt_pem)
         collector_config = GCollectorConfig(
             device=collector.device,
-            rule_set=get_ruleset_from_targets(
-                self.cache,
-                self.config,
-                profile.targets,
-                collector.distrib.opsystem,
-            ),
+            rule_set=resolution.select(profile.targets),
             certificate=certificate,
             distribution=collector.distrib,
             memdump=collector.memdump,
@@ -126,13 +311,53 @@ class Generaptor:
         collector_secrets: CollectorSecrets,
         collection_path: Path,
         output_dir: Path,
+        workers: int = 1,
+        processes: bool = False,
+        include: list[str] | None = None,
     ) -> Outcome:
-        """Extract collection"""
-        gcollection = GCollection(collection_path)
-        private_key = private_key_from_pem_bytes(
-            collector_secrets.key_pem, collector_secrets.secret
-        )
-        secret = gcollection.secret(private_key)
+        """Extract collection
+
+        Encrypted data.zip is decrypted first (a single member cannot be
+        split), then its members are extracted in parallel. When include
+        globs are given, matching members are read from data.zip through
+        the decrypting stream instead, nothing else is written to disk.
+        """
+        secret = self.collection_secret(collector_secrets, collection_path)
         if not secret:
             return Outcome.FAILURE
-        return gcollection.extract_to(output_dir, secret)
+        if include is not None:
+            try:
+                with open_zip(collection_path, secret) as zipf:
+                    return extract_zip_sequential(zipf, output_dir, include)
+            except (
+                OSError,
+                KeyError,
+                RuntimeError,
+                BadZipFile,
+                AESBadZipFile,
+            ):
+                _LOGGER.exception("selective extraction failed!")
+                return Outcome.FAILURE
+        _LOGGER.info("extracting and decrypting %s", _GENERAPTOR_DATA)
+        try:
+            with AESZipFile(str(collection_path), 'r') as zipf:
+                zipf.setpassword(secret.encode('utf-8'))
+                zipf.extract(_GENERAPTOR_DATA, path=str(output_dir))
+        except RuntimeError:
+            _LOGGER.exception("encrypted archive extraction failed!")
+            return Outcome.FAILURE
+        data_filepath = output_dir / _GENERAPTOR_DATA
+        try:
+            return extract_zip_parallel(
+                data_filepath, output_dir, workers, processes
+            )
+        finally:
+            data_filepath.unlink()
+
+    def collection_secret(
+        self, collector_secrets: CollectorSecrets, collection_path: Path
+    ) -> str | None:
+        """Decrypt collection archive secret"""
+        gcollection = GCollection(collection_path)
+        private_key = self.keys.unlock(collector_secrets)
+        return gcollection.secret(private_key)
@@ -0,0 +1,120 @@
+"""Helium Metadata Index Helper"""
+
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from pathlib import Path
+from threading import Lock
+from time import time_ns
+
+from edf_fusion.concept import Concept, ConceptType
+from edf_fusion.helper.logging import get_logger
+from edf_fusion.helper.serializing import dump_json, load_json
+
+_LOGGER = get_logger('server.helper.index', root='helium')
+# entries modified less than a second ago are not trusted because some
+# filesystems have a coarse mtime granularity (same strategy as git index)
+_RACY_NS = 1_000_000_000
+
+_StatKey = tuple[int, int]
+
+
+def _stat_key(item: Path) -> _StatKey | None:
+    try:
+        stat = item.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _is_racy(key: _StatKey) -> bool:
+    return time_ns() - key[0] < _RACY_NS
+
+
+def stat_etag(items: list[Path], salt: str = '') -> str | None:
+    """Strong entity tag derived from items mtime and size
+
+    None is returned when an item was modified less than a second ago,
+    such items cannot be told apart from their next revision.
+    """
+    digest = blake2b(salt.encode(), digest_size=16)
+    for item in items:
+        key = _stat_key(item)
+        if key is None:
+            digest.update(b'-;')
+            continue
+        if _is_racy(key):
+            return None
+        digest.update(f'{key[0]}:{key[1]};'.encode())
+    return digest.hexdigest()
+
+
+@dataclass(kw_only=True)
+class MetadataIndex:
+    """In-memory metadata index invalidated using mtime and size
+
+    Directory listings and parsed metadata are cached and revalidated using
+    a single stat call, changes made by other processes are detected when
+    mtime or size changes, changes made through this index are written
+    through. Methods are called from IO executor threads, every cache
+    mutation holds the lock.
+    """
+
+    _listings: dict[Path, tuple[_StatKey, list[Path]]] = field(
+        default_factory=dict
+    )
+    _metadata: dict[Path, tuple[_StatKey, dict]] = field(default_factory=dict)
+    _lock: Lock = field(default_factory=Lock)
+
+    def listdir(self, directory: Path, pattern: str) -> list[Path]:
+        """List directory items matching pattern"""
+        cache_key = directory / pattern
+        key = _stat_key(directory)
+        if key is None:
+            with self._lock:
+                self._listings.pop(cache_key, None)
+            return []
+        entry = self._listings.get(cache_key)
+        if entry and entry[0] == key:
+            return entry[1]
+        items = sorted(item for item in directory.glob(pattern))
+        if not _is_racy(key):
+            with self._lock:
+                self._listings[cache_key] = (key, items)
+        return items
+
+    def load(self, filepath: Path, concept_cls: ConceptType) -> Concept | None:
+        """Load concept from metadata file, None if file does not exist"""
+        key = _stat_key(filepath)
+        if key is None:
+            with self._lock:
+                self._metadata.pop(filepath, None)
+            return None
+        entry = self._metadata.get(filepath)
+        if entry and entry[0] == key:
+            return concept_cls.from_dict(entry[1])
+        dct = load_json(filepath.read_text(encoding='utf-8'))
+        if not _is_racy(key):
+            with self._lock:
+                self._metadata[filepath] = (key, dct)
+        return concept_cls.from_dict(dct)
+
+    def store(self, filepath: Path, concept: Concept):
+        """Write concept to metadata file and update index"""
+        dct = concept.to_dict()
+        filepath.write_text(dump_json(dct), encoding='utf-8')
+        key = _stat_key(filepath)
+        with self._lock:
+            if key is None or _is_racy(key):
+                # next load will read the file again
+                self._metadata.pop(filepath, None)
+                return
+            self._metadata[filepath] = (key, dct)
+
+    def forget(self, directory: Path):
+        """Forget every cached item located under directory"""
+        with self._lock:
+            for mapping in (self._listings, self._metadata):
+                for item in list(mapping):
+                    if item.is_relative_to(directory):
+                        del mapping[item]
+        _LOGGER.debug("forgot items under %s", directory)
@@ -0,0 +1,103 @@
+"""Helium Collector Key Pair Pool Helper"""
+
+from asyncio import CancelledError, Event, Task, create_task, get_running_loop
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from dataclasses import dataclass, field
+from time import perf_counter
+
+from edf_fusion.helper.logging import get_logger
+from edf_helium_core.concept import CollectorSecrets
+
+from ..config import KeyPoolConfig
+
+_LOGGER = get_logger('server.helper.keypool', root='helium')
+
+
+@dataclass(kw_only=True)
+class KeyPool:
+    """Pool of pre-generated collector secrets
+
+    Key pairs are generated by a worker process and kept in memory only.
+    The pool is refilled up to its size once its depth reaches low_water,
+    a pop on an empty pool generates a key pair on demand.
+    """
+
+    config: KeyPoolConfig
+    generate: Callable[[], CollectorSecrets]
+    _secrets: deque[CollectorSecrets] = field(default_factory=deque)
+    _refill: Event = field(default_factory=Event)
+    _task: Task | None = None
+    _executor: ProcessPoolExecutor | None = None
+    _generated: int = 0
+    _misses: int = 0
+    _last_latency: float = 0.0
+    _total_latency: float = 0.0
+
+    async def _generate(self) -> CollectorSecrets:
+        loop = get_running_loop()
+        start = perf_counter()
+        secrets = await loop.run_in_executor(self._executor, self.generate)
+        latency = perf_counter() - start
+        self._generated += 1
+        self._last_latency = latency
+        self._total_latency += latency
+        return secrets
+
+    async def _refill_loop(self):
+        while True:
+            await self._refill.wait()
+            self._refill.clear()
+            while len(self._secrets) < self.config.size:
+                try:
+                    self._secrets.append(await self._generate())
+                except (OSError, RuntimeError):
+                    _LOGGER.exception("key pair generation failed")
+                    break
+            _LOGGER.info("key pool refilled (%d)", len(self._secrets))
+
+    def startup(self):
+        """Start worker process and fill the pool"""
+        self._executor = ProcessPoolExecutor(max_workers=1)
+        if self.config.size:
+            self._task = create_task(self._refill_loop())
+            self._refill.set()
+
+    async def cleanup(self):
+        """Stop refill and worker process, drop pooled key pairs"""
+        if self._task:
+            self._task.cancel()
+            with suppress(CancelledError):
+                await self._task
+            self._task = None
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        self._secrets.clear()
+
+    async def pop(self) -> CollectorSecrets:
+        """Pop a key pair, generate one if the pool is empty"""
+        if self._secrets:
+            secrets = self._secrets.popleft()
+        else:
+            self._misses += 1
+            secrets = await self._generate()
+        if self._task and len(self._secrets) <= self.config.low_water:
+            self._refill.set()
+        return secrets
+
+    def stats(self) -> dict[str, int | float]:
+        """Pool depth and refill latency"""
+        average = (
+            self._total_latency / self._generated if self._generated else 0.0
+        )
+        return {
+            'depth': len(self._secrets),
+            'size': self.config.size,
+            'generated': self._generated,
+            'misses': self._misses,
+            'last_latency': round(self._last_latency, 3),
+            'average_latency': round(average, 3),
+        }
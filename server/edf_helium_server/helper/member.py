@@ -0,0 +1,197 @@
+"""Helium Archive Member Helper"""
+
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from tarfile import TarError, TarFile
+from typing import BinaryIO, Iterator
+from zipfile import BadZipFile, ZipFile, ZipInfo
+
+from edf_fusion.helper.logging import get_logger
+from edf_helium_core.concept import ArchiveMember
+from pyzipper import AESZipFile
+from pyzipper import BadZipFile as AESBadZipFile
+
+from .archive import ArchiveFormat, ZstdDecompressor, archive_items
+
+_LOGGER = get_logger('server.helper.member', root='helium')
+_READ_SIZE = 1024 * 1024
+_GENERAPTOR_DATA = 'data.zip'
+# wrong password raises RuntimeError, missing member raises KeyError
+_ARCHIVE_ERRORS = (
+    OSError,
+    KeyError,
+    RuntimeError,
+    BadZipFile,
+    AESBadZipFile,
+    TarError,
+)
+
+
+def _archive_member(zipinfo: ZipInfo) -> ArchiveMember:
+    try:
+        modified = datetime(*zipinfo.date_time, tzinfo=timezone.utc)
+    except ValueError:
+        modified = None
+    return ArchiveMember(
+        name=zipinfo.filename,
+        size=zipinfo.file_size,
+        compressed_size=zipinfo.compress_size,
+        modified=modified,
+    )
+
+
+@contextmanager
+def open_zip(filepath: Path, secret: str | None) -> Iterator[ZipFile]:
+    """Open zip archive (generaptor data.zip if secret is set)
+
+    Generaptor collections store their content in an encrypted data.zip,
+    the inner archive is read through the decrypting member file object.
+    """
+    with ExitStack() as stack:
+        if secret is None:
+            yield stack.enter_context(ZipFile(filepath))
+            return
+        outer = stack.enter_context(AESZipFile(str(filepath)))
+        outer.setpassword(secret.encode('utf-8'))
+        inner = stack.enter_context(outer.open(_GENERAPTOR_DATA))
+        yield stack.enter_context(ZipFile(inner))
+
+
+@contextmanager
+def _open_tar_zst(filepath: Path) -> Iterator[TarFile]:
+    # zstandard frames are not seekable, members are read sequentially
+    if ZstdDecompressor is None:
+        raise RuntimeError("zstandard is not installed")
+    with ExitStack() as stack:
+        fobj = stack.enter_context(filepath.open('rb'))
+        reader = stack.enter_context(
+            ZstdDecompressor().stream_reader(fobj, closefd=False)
+        )
+        yield stack.enter_context(TarFile.open(fileobj=reader, mode='r|'))
+
+
+def _list_zip(filepath: Path, secret: str | None) -> list[ArchiveMember]:
+    with open_zip(filepath, secret) as zipf:
+        return [
+            _archive_member(zipinfo)
+            for zipinfo in zipf.infolist()
+            if not zipinfo.is_dir()
+        ]
+
+
+def _list_tar_zst(filepath: Path) -> list[ArchiveMember]:
+    with _open_tar_zst(filepath) as tarf:
+        return [
+            ArchiveMember(
+                name=tarinfo.name,
+                size=tarinfo.size,
+                compressed_size=tarinfo.size,
+                modified=datetime.fromtimestamp(tarinfo.mtime, timezone.utc),
+            )
+            for tarinfo in tarf
+            if tarinfo.isfile()
+        ]
+
+
+def list_members(
+    filepath: Path,
+    secret: str | None = None,
+    archive_format: ArchiveFormat = ArchiveFormat.ZIP,
+) -> list[ArchiveMember] | None:
+    """List archive members (generaptor data.zip members if secret is set)"""
+    try:
+        if archive_format == ArchiveFormat.TAR_ZST:
+            return _list_tar_zst(filepath)
+        return _list_zip(filepath, secret)
+    except _ARCHIVE_ERRORS:
+        _LOGGER.exception("failed to list archive members: %s", filepath)
+        return None
+
+
+def list_files(
+    files: list[Path], directories: list[Path]
+) -> list[ArchiveMember]:
+    """List files as archive members named like archive_items does"""
+    members = []
+    for filepath, arcname in archive_items(files, directories):
+        stat = filepath.stat()
+        members.append(
+            ArchiveMember(
+                name=arcname,
+                size=stat.st_size,
+                compressed_size=stat.st_size,
+                modified=datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+            )
+        )
+    return members
+
+
+@dataclass(kw_only=True)
+class MemberReader:
+    """Read a single archive member without extracting the archive
+
+    When archive_format is None, filepath is the root directory of a
+    member kept as a regular file.
+    """
+
+    filepath: Path
+    member: ArchiveMember
+    secret: str | None = None
+    archive_format: ArchiveFormat | None = ArchiveFormat.ZIP
+
+    def _open(self, stack: ExitStack) -> BinaryIO:
+        name = self.member.name
+        if self.archive_format is None:
+            return stack.enter_context((self.filepath / name).open('rb'))
+        if self.archive_format == ArchiveFormat.TAR_ZST:
+            tarf = stack.enter_context(_open_tar_zst(self.filepath))
+            for tarinfo in tarf:
+                if tarinfo.name == name:
+                    return tarf.extractfile(tarinfo)
+            raise KeyError(name)
+        zipf = stack.enter_context(open_zip(self.filepath, self.secret))
+        return stack.enter_context(zipf.open(name))
+
+    def chunks(
+        self, start: int = 0, end: int | None = None
+    ) -> Iterator[bytes]:
+        """Decompress member content from start to end (excluded)"""
+        end = self.member.size if end is None else end
+        try:
+            with ExitStack() as stack:
+                fobj = self._open(stack)
+                # tar stream members can only be read forward
+                seekable = self.archive_format != ArchiveFormat.TAR_ZST
+                yield from _read_range(fobj, start, end, seekable)
+        except _ARCHIVE_ERRORS:
+            _LOGGER.exception(
+                "failed to read archive member: %s", self.member.name
+            )
+
+
+def _skip(fobj: BinaryIO, count: int, seekable: bool):
+    if seekable:
+        fobj.seek(count)
+        return
+    while count > 0:
+        chunk = fobj.read(min(_READ_SIZE, count))
+        if not chunk:
+            break
+        count -= len(chunk)
+
+
+def _read_range(
+    fobj: BinaryIO, start: int, end: int, seekable: bool
+) -> Iterator[bytes]:
+    if start:
+        _skip(fobj, start, seekable)
+    remaining = end - start
+    while remaining > 0:
+        chunk = fobj.read(min(_READ_SIZE, remaining))
+        if not chunk:
+            _LOGGER.warning("unexpected end of member data")
+            break
+        remaining -= len(chunk)
+        yield chunk
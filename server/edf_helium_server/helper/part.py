@@ -0,0 +1,62 @@
+"""Helium Part Helper"""
+
+from dataclasses import dataclass
+from errno import EFBIG
+from os import ftruncate, posix_fallocate, pwrite
+from pathlib import Path
+from typing import BinaryIO
+
+from edf_fusion.helper.logging import get_logger
+
+_LOGGER = get_logger('server.helper.part', root='helium')
+
+
+def preallocate(filepath: Path, size: int):
+    """Create file and reserve size bytes (sparse if not supported)"""
+    with filepath.open('wb') as fobj:
+        if not size:
+            return
+        try:
+            posix_fallocate(fobj.fileno(), 0, size)
+        except OSError as exc:
+            _LOGGER.warning("fallocate not supported (%s)", exc)
+            ftruncate(fobj.fileno(), size)
+
+
+@dataclass(kw_only=True)
+class PartWriter:
+    """Write a part at its offset in a preallocated file
+
+    Parts of the same file can be written concurrently as long as they
+    do not overlap.
+    """
+
+    filepath: Path
+    offset: int
+    limit: int
+    size: int = 0
+    _fobj: BinaryIO | None = None
+
+    def open(self):
+        """Open file for writing"""
+        self.size = 0
+        self._fobj = self.filepath.open('r+b', buffering=0)
+
+    def write(self, chunk: bytes):
+        """Write chunk after previously written chunks"""
+        position = self.offset + self.size
+        if position + len(chunk) > self.limit:
+            raise OSError(EFBIG, "part exceeds file size", str(self.filepath))
+        view = memoryview(chunk)
+        while view:
+            written = pwrite(self._fobj.fileno(), view, position)
+            view = view[written:]
+            position += written
+            self.size += written
+
+    def close(self):
+        """Close file"""
+        if self._fobj is None:
+            return
+        self._fobj.close()
+        self._fobj = None
@@ -0,0 +1,194 @@
+"""Helium List Query Helper"""
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections.abc import AsyncIterator, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from heapq import nsmallest
+from typing import Self
+
+from aiohttp.web import Request
+from edf_helium_core.concept import (
+    Analysis,
+    Case,
+    Collection,
+    Collector,
+    OperatingSystem,
+    Status,
+)
+
+_CASE_STATUSES = {'open', 'closed'}
+
+SortKey = tuple[datetime, str]
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    dtv = datetime.fromisoformat(value)
+    if dtv.tzinfo is None:
+        dtv = dtv.replace(tzinfo=timezone.utc)
+    return dtv
+
+
+def encode_cursor(sort_key: SortKey) -> str:
+    """Encode sort key of the last item of a page"""
+    created, key = sort_key
+    return urlsafe_b64encode(f'{created.isoformat()}|{key}'.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Decode cursor, raise ValueError if invalid"""
+    try:
+        created, key = urlsafe_b64decode(cursor.encode()).decode().split('|')
+    except (BinasciiError, UnicodeDecodeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    return _parse_datetime(created), key
+
+
+def case_sort_key(case: Case) -> SortKey:
+    """Case sort key"""
+    return case.created, str(case.guid)
+
+
+def collector_sort_key(collector: Collector) -> SortKey:
+    """Collector sort key"""
+    return collector.created, str(collector.guid)
+
+
+def collection_sort_key(collection: Collection) -> SortKey:
+    """Collection sort key"""
+    return collection.created, str(collection.guid)
+
+
+def analysis_sort_key(analysis: Analysis) -> SortKey:
+    """Analysis sort key"""
+    return analysis.created, analysis.analyzer
+
+
+@dataclass(kw_only=True)
+class Query:
+    """List endpoint query: filters, pagination and projection
+
+    Items are ordered by creation date then by key, the cursor encodes the
+    sort key of the last item of the previous page.
+    """
+
+    limit: int | None = None
+    cursor: SortKey | None = None
+    hostname: str | None = None
+    tags: set[str] = field(default_factory=set)
+    opsystem: OperatingSystem | None = None
+    status: str | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+    fields: list[str] | None = None
+
+    @classmethod
+    def from_request(cls, request: Request) -> Self:
+        """Build query from request parameters, raise ValueError if invalid"""
+        params = request.query
+        limit = params.get('limit')
+        if limit is not None:
+            limit = int(limit)
+            if limit < 1:
+                raise ValueError("limit must be positive")
+        cursor = params.get('cursor')
+        opsystem = params.get('opsystem')
+        status = params.get('status')
+        if status and status not in _CASE_STATUSES:
+            status = Status(status).value
+        fields = params.get('fields')
+        return cls(
+            limit=limit,
+            cursor=decode_cursor(cursor) if cursor else None,
+            hostname=params.get('hostname'),
+            tags=set(params.getall('tag', [])),
+            opsystem=OperatingSystem(opsystem) if opsystem else None,
+            status=status,
+            created_after=_parse_datetime(params.get('created_after')),
+            created_before=_parse_datetime(params.get('created_before')),
+            fields=fields.split(',') if fields else None,
+        )
+
+    def _match_created(self, created: datetime) -> bool:
+        if self.created_after and created < self.created_after:
+            return False
+        if self.created_before and created >= self.created_before:
+            return False
+        return True
+
+    def match_case(self, case: Case) -> bool:
+        """Determine if case matches filters"""
+        if self.status and self.status != (
+            'closed' if case.closed else 'open'
+        ):
+            return False
+        return self._match_created(case.created)
+
+    def match_collector(self, collector: Collector) -> bool:
+        """Determine if collector matches filters"""
+        if self.opsystem and collector.distrib.opsystem != self.opsystem:
+            return False
+        return self._match_created(collector.created)
+
+    def match_collection(self, collection: Collection) -> bool:
+        """Determine if collection matches filters"""
+        if self.hostname and (
+            (collection.hostname or '').lower() != self.hostname.lower()
+        ):
+            return False
+        if not self.tags.issubset(collection.tags):
+            return False
+        if self.opsystem and collection.opsystem != self.opsystem:
+            return False
+        return self._match_created(collection.created)
+
+    def match_analysis(self, analysis: Analysis) -> bool:
+        """Determine if analysis matches filters"""
+        if self.status and analysis.status.value != self.status:
+            return False
+        return self._match_created(analysis.created)
+
+    def paginate(
+        self,
+        concepts: Iterable,
+        match: Callable[[object], bool],
+        sort_key: Callable[[object], SortKey],
+    ) -> list:
+        """Select the page of concepts following cursor
+
+        Concepts are consumed one at a time and at most limit of them are
+        held, memory scales with page size rather than with storage size.
+        """
+        selected = (
+            concept
+            for concept in concepts
+            if not (self.cursor and sort_key(concept) <= self.cursor)
+            and match(concept)
+        )
+        if self.limit:
+            return nsmallest(self.limit, selected, key=sort_key)
+        return sorted(selected, key=sort_key)
+
+    def project(self, dct: dict) -> dict:
+        """Keep requested fields only"""
+        if not self.fields:
+            return dct
+        return {key: dct[key] for key in self.fields if key in dct}
+
+
+async def page_of(
+    concepts: AsyncIterator, query: Query, sort_key: Callable
+) -> tuple[list[dict], str | None]:
+    """Serialize a page of concepts and compute next page cursor"""
+    data = []
+    last = None
+    async for concept in concepts:
+        data.append(query.project(concept.to_dict()))
+        last = concept
+    cursor = None
+    if last is not None and query.limit and len(data) >= query.limit:
+        cursor = encode_cursor(sort_key(last))
+    return data, cursor
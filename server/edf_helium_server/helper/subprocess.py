@@ -0,0 +1,64 @@
+"""Helium Subprocess Helper"""
+
+from asyncio import CancelledError, create_subprocess_exec, wait_for
+from asyncio.subprocess import Process
+from contextlib import suppress
+from os import environ, killpg
+from signal import SIGKILL, SIGTERM
+from subprocess import DEVNULL
+
+from edf_fusion.helper.logging import get_logger
+
+_LOGGER = get_logger('server.helper.subprocess', root='helium')
+_TERMINATE_TIMEOUT = 10
+
+
+async def _terminate(process: Process):
+    # tools such as plaso spawn workers, the whole process group is signaled
+    with suppress(ProcessLookupError):
+        killpg(process.pid, SIGTERM)
+    try:
+        await wait_for(process.wait(), _TERMINATE_TIMEOUT)
+    except TimeoutError:
+        _LOGGER.warning("killing subprocess (pid=%d)", process.pid)
+        with suppress(ProcessLookupError):
+            killpg(process.pid, SIGKILL)
+        await process.wait()
+
+
+async def create_subprocess_and_wait(argv: list[str], **kwargs) -> bool:
+    """Create subprocess and wait for termination, return True on success
+
+    Cancellation terminates the subprocess (SIGTERM then SIGKILL) and its
+    children, CancelledError is raised once the subprocess is reaped.
+    """
+    for arg in ('stdin', 'stdout', 'stderr'):
+        if arg not in kwargs:
+            kwargs[arg] = DEVNULL
+    if 'env' in kwargs:
+        env = dict(environ)
+        env.update(kwargs['env'])
+        kwargs['env'] = env
+    _LOGGER.info("starting subprocess (argv=%s)", argv)
+    process = await create_subprocess_exec(
+        *argv, start_new_session=True, **kwargs
+    )
+    _LOGGER.info("waiting for subprocess (pid=%d)", process.pid)
+    try:
+        returncode = await process.wait()
+    except CancelledError:
+        _LOGGER.warning("terminating subprocess (pid=%d)", process.pid)
+        try:
+            await _terminate(process)
+        except CancelledError:
+            # cancelled again while terminating, do not leave an orphan
+            with suppress(ProcessLookupError):
+                killpg(process.pid, SIGKILL)
+            raise
+        raise
+    _LOGGER.info(
+        "subprocess ended (pid=%d, returncode=%d)",
+        process.pid,
+        returncode,
+    )
+    return returncode == 0
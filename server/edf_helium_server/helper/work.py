@@ -0,0 +1,338 @@
+"""Helium Analysis Work Signal and Queue Helper"""
+
+from asyncio import (
+    CancelledError,
+    Task,
+    create_task,
+    current_task,
+    ensure_future,
+    sleep,
+)
+from collections.abc import Awaitable
+from contextlib import suppress
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import cached_property
+from json import JSONDecodeError, dumps, loads
+from typing import Any
+from uuid import UUID, uuid4
+
+from edf_fusion.helper.logging import get_logger
+from edf_fusion.helper.redis import Redis
+from redis.asyncio.client import PubSub
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+
+_LOGGER = get_logger('server.helper.work', root='helium')
+_CHANNEL_PREFIX = 'helium-work'
+_QUEUE_PREFIX = 'helium-queue'
+# score orders by priority then creation time (milliseconds)
+_PRIORITY_FACTOR = 10**13
+# redis time is used so that replicas do not depend on their own clocks
+_NOW = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+"""
+# KEYS: queue, leases, scores / ARGV: member, score
+_ENQUEUE = """
+if redis.call('ZSCORE', KEYS[2], ARGV[1]) then
+  return 0
+end
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+return redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+"""
+# KEYS: queue, leases, scores, owners / ARGV: ttl, owner
+_CLAIM = _NOW + """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)
+for _, member in ipairs(expired) do
+  redis.call('ZREM', KEYS[2], member)
+  redis.call('HDEL', KEYS[4], member)
+  local score = redis.call('HGET', KEYS[3], member)
+  if score then
+    redis.call('ZADD', KEYS[1], score, member)
+  end
+end
+local item = redis.call('ZPOPMIN', KEYS[1])
+if #item == 0 then
+  return false
+end
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[1]), item[1])
+redis.call('HSET', KEYS[4], item[1], ARGV[2])
+return item[1]
+"""
+# KEYS: leases, owners / ARGV: member, owner, ttl
+_EXTEND = _NOW + """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+  return 0
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[1])
+return 1
+"""
+# KEYS: leases, scores, owners / ARGV: member, owner
+_ACK = """
+if redis.call('HGET', KEYS[3], ARGV[1]) ~= ARGV[2] then
+  return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+return 1
+"""
+
+
+def work_channel(analyzer: str) -> str:
+    """Channel on which pending analyses are signaled to analyzer"""
+    return f'{_CHANNEL_PREFIX}-{analyzer}'
+
+
+async def signal_work(
+    redis: Redis, analyzer: str, case_guid: UUID, collection_guid: UUID
+):
+    """Signal a pending analysis to analyzer"""
+    message = dumps(
+        {'case_guid': str(case_guid), 'collection_guid': str(collection_guid)}
+    )
+    try:
+        await redis.publish(work_channel(analyzer), message)
+    except RedisError:
+        # analysis is found by the next reconciliation scan
+        _LOGGER.warning("failed to signal pending analysis to %s", analyzer)
+
+
+def _parse(message: dict) -> tuple[UUID, UUID] | None:
+    try:
+        dct = loads(message['data'])
+        return UUID(dct['case_guid']), UUID(dct['collection_guid'])
+    except (JSONDecodeError, KeyError, TypeError, ValueError):
+        _LOGGER.warning("ignored malformed work signal: %s", message)
+        return None
+
+
+@dataclass(kw_only=True)
+class WorkListener:
+    """Receive pending analyses signaled to an analyzer
+
+    Signals are not persisted, receive returns None once subscribed (again)
+    to let the caller scan for analyses signaled while unsubscribed.
+    """
+
+    redis: Redis
+    analyzer: str
+    _pubsub: PubSub | None = None
+
+    async def _reset(self):
+        if self._pubsub:
+            try:
+                await self._pubsub.aclose()
+            except RedisError:
+                pass
+            self._pubsub = None
+
+    async def receive(self, timeout: float) -> list[tuple[UUID, UUID]] | None:
+        """Wait up to timeout for signals, return signaled analyses"""
+        if not self._pubsub:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(work_channel(self.analyzer))
+            except RedisError:
+                _LOGGER.warning("failed to subscribe to work signals")
+                await pubsub.aclose()
+                await sleep(timeout)
+                return []
+            self._pubsub = pubsub
+            return None
+        signaled = []
+        try:
+            message = await self._pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=timeout
+            )
+            while message:
+                item = _parse(message)
+                if item and item not in signaled:
+                    signaled.append(item)
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=0.0
+                )
+        except RedisError:
+            _LOGGER.warning("work signal subscription lost")
+            await self._reset()
+        return signaled
+
+    async def close(self):
+        """Unsubscribe"""
+        await self._reset()
+
+
+class LeaseLostError(Exception):
+    """Work lease lost while work was in progress"""
+
+
+def _member(case_guid: UUID, collection_guid: UUID) -> str:
+    return f'{case_guid}/{collection_guid}'
+
+
+@dataclass(kw_only=True)
+class WorkLease:
+    """Claimed analysis, lease is extended by heartbeats until released"""
+
+    queue: 'WorkQueue'
+    case_guid: UUID
+    collection_guid: UUID
+    owner: str
+    lost: bool = False
+    _task: Task | None = None
+    _guarded: set[Task] = field(default_factory=set)
+
+    @property
+    def member(self) -> str:
+        """Queue member"""
+        return _member(self.case_guid, self.collection_guid)
+
+    async def _refresh(self):
+        while True:
+            await sleep(self.queue.lease_ttl / 3)
+            try:
+                extended = await self.queue.extend(self)
+            except RedisError:
+                _LOGGER.warning("failed to extend lease %s", self.member)
+                continue
+            if not extended:
+                # another replica may process this analysis again
+                _LOGGER.error("lease lost: %s", self.member)
+                self.lost = True
+                for task in self._guarded:
+                    task.cancel()
+                return
+
+    def start(self):
+        """Start heartbeats"""
+        self._task = create_task(self._refresh())
+
+    async def guard(self, awaitable: Awaitable) -> Any:
+        """Await awaitable, cancel it if lease is lost
+
+        Raises LeaseLostError if lease is lost, once the cancelled awaitable
+        ended so that its subprocesses are reaped before another replica
+        processes the analysis again.
+        """
+        if self.lost:
+            raise LeaseLostError(self.member)
+        task = ensure_future(awaitable)
+        self._guarded.add(task)
+        try:
+            return await task
+        except CancelledError:
+            if self.lost and not current_task().cancelling():
+                raise LeaseLostError(self.member) from None
+            raise
+        finally:
+            self._guarded.discard(task)
+
+    async def release(self):
+        """Stop heartbeats and remove work from queue"""
+        if self._task:
+            self._task.cancel()
+            with suppress(CancelledError):
+                await self._task
+            self._task = None
+        try:
+            await self.queue.ack(self)
+        except RedisError:
+            # lease expires and analysis is delivered again
+            _LOGGER.warning("failed to release lease %s", self.member)
+
+
+@dataclass(kw_only=True)
+class WorkQueue:
+    """Analysis work queue shared by analyzer replicas
+
+    Queued analyses are ordered by priority then creation time. A claim
+    atomically pops the first analysis and leases it, leases expired
+    without heartbeat are queued again on next claim so that analyses of
+    a dead replica are delivered to another one.
+    """
+
+    redis: Redis
+    analyzer: str
+    lease_ttl: int = 60
+
+    def _key(self, name: str) -> str:
+        return f'{_QUEUE_PREFIX}-{self.analyzer}-{name}'
+
+    @cached_property
+    def _scripts(self) -> dict[str, AsyncScript]:
+        return {
+            name: self.redis.register_script(script)
+            for name, script in (
+                ('enqueue', _ENQUEUE),
+                ('claim', _CLAIM),
+                ('extend', _EXTEND),
+                ('ack', _ACK),
+            )
+        }
+
+    async def enqueue(
+        self,
+        case_guid: UUID,
+        collection_guid: UUID,
+        priority: int,
+        created: datetime,
+    ) -> bool:
+        """Queue analysis unless leased, return True if newly queued
+
+        Priority of an analysis already queued is updated.
+        """
+        score = priority * _PRIORITY_FACTOR + int(created.timestamp() * 1000)
+        added = await self._scripts['enqueue'](
+            keys=[
+                self._key('queue'),
+                self._key('leases'),
+                self._key('scores'),
+            ],
+            args=[_member(case_guid, collection_guid), score],
+        )
+        return bool(added)
+
+    async def claim(self) -> WorkLease | None:
+        """Claim first queued analysis, start lease heartbeats"""
+        owner = uuid4().hex
+        member = await self._scripts['claim'](
+            keys=[
+                self._key('queue'),
+                self._key('leases'),
+                self._key('scores'),
+                self._key('owners'),
+            ],
+            args=[self.lease_ttl * 1000, owner],
+        )
+        if not member:
+            return None
+        case_guid, collection_guid = member.decode().split('/')
+        lease = WorkLease(
+            queue=self,
+            case_guid=UUID(case_guid),
+            collection_guid=UUID(collection_guid),
+            owner=owner,
+        )
+        lease.start()
+        return lease
+
+    async def extend(self, lease: WorkLease) -> bool:
+        """Extend lease, return False if lease was lost"""
+        extended = await self._scripts['extend'](
+            keys=[self._key('leases'), self._key('owners')],
+            args=[lease.member, lease.owner, self.lease_ttl * 1000],
+        )
+        return bool(extended)
+
+    async def ack(self, lease: WorkLease) -> bool:
+        """Remove leased analysis, return False if lease was lost"""
+        acked = await self._scripts['ack'](
+            keys=[
+                self._key('leases'),
+                self._key('scores'),
+                self._key('owners'),
+            ],
+            args=[lease.member, lease.owner],
+        )
+        return bool(acked)
@@ -1,6 +1,7 @@
 """Helium server entrypoint"""
 
 from argparse import ArgumentParser, Namespace
+from functools import partial
 from pathlib import Path
 
 from aiohttp.web import Application, Request, run_app
@@ -9,9 +10,7 @@ from edf_fusion.helper.config import ConfigError
 from edf_fusion.helper.logging import get_logger
 from edf_fusion.helper.redis import setup_redis
 from edf_fusion.server.auth import FusionAuthAPI, get_fusion_auth_api
-from edf_fusion.server.case import FusionCaseAPI
 from edf_fusion.server.constant import FusionConstantAPI
-from edf_fusion.server.download import FusionDownloadAPI
 from edf_fusion.server.event import FusionEventAPI
 from edf_fusion.server.info import FusionInfoAPI
 from edf_fusion.server.storage import get_fusion_storage
@@ -28,6 +27,9 @@ from .api import (
     update_case_impl,
 )
 from .config import HeliumServerConfig
+from .helper.case import HeliumCaseAPI
+from .helper.download import HeliumDownloadAPI
+from .helper.work import signal_work
 from .storage import Storage
 
 _LOGGER = get_logger('server.main', root='helium')
@@ -78,7 +80,7 @@ async def _init_app(config: HeliumServerConfig) -> Application:
     info = Info(api='helium', version=version)
     fusion_info_api = FusionInfoAPI(info=info, config=config.info_api)
     fusion_info_api.setup(webapp)
-    fusion_case_api = FusionCaseAPI(
+    fusion_case_api = HeliumCaseAPI(
         config=config.case_api,
         case_cls=Case,
         attach_case_impl=attach_case_impl,
@@ -97,10 +99,15 @@ async def _init_app(config: HeliumServerConfig) -> Application:
         config=config.constant_api, constant_cls=Constant
     )
     fusion_constant_api.setup(webapp)
-    fusion_download_api = FusionDownloadAPI(config=config.download_api)
-    fusion_download_api.setup(webapp)
+    helium_download_api = HeliumDownloadAPI(config=config.download_api)
+    helium_download_api.setup(webapp)
     setup_api(webapp)
-    storage = Storage(config=config.storage)
+    storage = Storage(
+        config=config.storage,
+        jobs=True,
+        notify=fusion_event_api.notify,
+        signal_work=partial(signal_work, redis),
+    )
     storage.setup(webapp)
     return webapp
 
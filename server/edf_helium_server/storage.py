@@ -1,36 +1,152 @@
 """Helium Storage"""
 
-from collections.abc import AsyncIterator, Iterator
-from dataclasses import dataclass
-from functools import cached_property
+from asyncio import (
+    CancelledError,
+    Lock,
+    Task,
+    create_task,
+    current_task,
+    gather,
+    get_running_loop,
+    sleep,
+    wait,
+)
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from dataclasses import dataclass, field
+from datetime import timedelta
+from functools import cached_property, partial
+from json import JSONDecodeError, dumps, loads
 from pathlib import Path
+from shutil import move, rmtree
+from sqlite3 import Connection
 from typing import Type
 from uuid import UUID
 from zipfile import BadZipFile
 
-from edf_fusion.concept import AnalyzerInfo
-from edf_fusion.helper.filesystem import GUID_GLOB, iter_guid_items
+from aiohttp import ClientPayloadError
+from edf_fusion.concept import AnalyzerInfo, Concept, ConceptType
+from edf_fusion.helper.datetime import utcnow
+from edf_fusion.helper.filesystem import GUID_GLOB
 from edf_fusion.helper.logging import get_logger
-from edf_fusion.helper.streaming import stream_to_file
-from edf_fusion.helper.zip import create_zip
 from edf_fusion.server.storage import ConceptStorage, FusionStorage
 from edf_helium_core.concept import (
     Analysis,
     Architecture,
+    ArchiveMember,
     Case,
     Collection,
+    CollectionOverview,
     Collector,
     CollectorSecrets,
     DiskUsage,
     OperatingSystem,
+    Status,
+    Upload,
 )
 from generaptor.concept import Distribution
 
-from .config import HeliumStorageConfig
-from .helper.generaptor import GCache, GConfig, Generaptor
+from .config import ArchiveConfig, HeliumStorageConfig
+from .helper.archive import (
+    ARCHIVE_ERRORS,
+    ArchiveFormat,
+    ArchiveInfo,
+    ZipStream,
+    archive_items,
+    create_archive,
+    detect_archive_format,
+)
+from .helper.blob import BlobStore
+from .helper.catalog import Catalog
+from .helper.digest import DigestWriter
+from .helper.executor import IOClass, IOExecutor
+from .helper.extract import is_extracted_member
+from .helper.fingerprint import FingerprintIndex
+from .helper.generaptor import (
+    GCache,
+    GConfig,
+    Generaptor,
+    PrivateKeyCache,
+    build_collector,
+    collector_fingerprint,
+    generate_collector_secrets,
+)
+from .helper.index import MetadataIndex, stat_etag
+from .helper.keypool import KeyPool
+from .helper.member import MemberReader, list_files, list_members
+from .helper.part import PartWriter, preallocate
+from .helper.query import (
+    Query,
+    analysis_sort_key,
+    case_sort_key,
+    collection_sort_key,
+    collector_sort_key,
+)
 
 _LOGGER = get_logger('server.storage', root='helium')
 _CHUNK_SIZE = 64 * 1024
+_WRITE_SIZE = 1024 * 1024
+_EXPIRY_PERIOD = 600
+_CatalogEntry = Callable[[Connection], None]
+Notify = Callable[[str, Case, dict | None], Awaitable[None]]
+SignalWork = Callable[[str, UUID, UUID], Awaitable[None]]
+
+
+def _load_secrets(secrets: Path) -> CollectorSecrets | None:
+    if not secrets.is_file():
+        return None
+    return CollectorSecrets.from_filepath(secrets)
+
+
+def _load_members(members: Path) -> list[ArchiveMember] | None:
+    if not members.is_file():
+        return None
+    try:
+        return [
+            ArchiveMember.from_dict(dct) for dct in loads(members.read_text())
+        ]
+    except (JSONDecodeError, KeyError):
+        _LOGGER.warning("ignored malformed member listing: %s", members)
+        return None
+
+
+def _store_members(members: Path, archive_members: list[ArchiveMember]):
+    members.write_text(dumps([member.to_dict() for member in archive_members]))
+
+
+def _collector_from_dict(dct) -> Collector:
+    return Collector(
+        profile=dct['profile'],
+        distrib=Distribution(
+            arch=Architecture(dct.get('arch', Architecture.AMD64)),
+            opsystem=OperatingSystem(dct['opsystem']),
+        ),
+        device=dct.get('device', ''),
+        memdump=dct.get('memdump', False),
+        dont_be_lazy=dct.get('dont_be_lazy'),
+        vss_analysis_age=dct.get('vss_analysis_age'),
+        use_auto_accessor=dct.get('use_auto_accessor'),
+        description=dct.get('description'),
+        status=Status.PENDING,
+    )
+
+
+def _load_analyzers(cache_dir: Path) -> list[AnalyzerInfo]:
+    return [
+        AnalyzerInfo.from_filepath(metadata)
+        for metadata in cache_dir.glob('analyzer_*.json')
+    ]
+
+
+def _load_disk_usage(disk_usage: Path) -> DiskUsage | None:
+    if not disk_usage.is_file():
+        return None
+    return DiskUsage.from_filepath(disk_usage)
+
+
+def _list_of(func: Callable, *args) -> list:
+    return list(func(*args))
 
 
 def _storage_instances(
@@ -47,26 +163,91 @@ def _storage_instances(
 
 
 @dataclass(kw_only=True)
-class AnalysisStorage(ConceptStorage):
+class ScratchConceptStorage(ConceptStorage):
+    """Concept storage which data directory may live on a scratch volume
+
+    Scratch directory mirrors concept directory on the scratch volume.
+    """
+
+    scratch: Path | None = None
+
+    @cached_property
+    def data_dir(self) -> Path:
+        """Concept data directory (on scratch volume if any)"""
+        return (self.scratch or self.directory) / 'data.d'
+
+    def remove_scratch(self):
+        """Remove scratch directory recursively"""
+        if self.scratch and self.scratch.is_dir():
+            rmtree(self.scratch)
+
+    def remove(self):
+        super().remove()
+        self.remove_scratch()
+
+
+@dataclass(kw_only=True)
+class AnalysisStorage(ScratchConceptStorage):
     """Analysis Storage"""
 
+    @cached_property
+    def output_dir(self) -> Path:
+        """Analyzer output kept as files (always on bulk storage)"""
+        return self.directory / 'data.d'
+
     @cached_property
     def log(self) -> Path:
         """Analyzer log file"""
         return self.directory / 'analysis.log'
 
-    def create_archive(self):
+    @cached_property
+    def members(self) -> Path:
+        """Analyzer output archive member listing"""
+        return self.directory / 'members.json'
+
+    def create_archive(
+        self, config: ArchiveConfig | None = None
+    ) -> ArchiveInfo:
         """Create analyzer output archive"""
-        create_zip(
+        config = config or ArchiveConfig()
+        self.members.unlink(missing_ok=True)
+        return create_archive(
             self.data,
-            self.directory,
             files=[self.log],
             directories=[self.data_dir],
+            compression=config.compression,
+            level=config.level,
+            threads=config.threads,
+            store_patterns=config.store,
+        )
+
+    def keep_output(self):
+        """Move analyzer output from scratch volume to bulk storage"""
+        if self.data_dir == self.output_dir or not self.data_dir.is_dir():
+            return
+        # output left by a previous run is replaced
+        if self.output_dir.is_dir():
+            rmtree(self.output_dir)
+        move(self.data_dir, self.output_dir)
+
+    def list_files(self) -> list[ArchiveMember]:
+        """List analyzer output files kept as-is"""
+        return list_files([self.log], [self.output_dir])
+
+    def create_stream(self, config: ArchiveConfig | None = None) -> ZipStream:
+        """Create analyzer output archive stream"""
+        config = config or ArchiveConfig()
+        items = archive_items([self.log], [self.output_dir])
+        return ZipStream.from_items(
+            items,
+            compression=config.compression,
+            level=config.level,
+            store_patterns=config.store,
         )
 
 
 @dataclass(kw_only=True)
-class CollectionStorage(ConceptStorage):
+class CollectionStorage(ScratchConceptStorage):
     """Case Storage"""
 
     @cached_property
@@ -74,6 +255,11 @@ class CollectionStorage(ConceptStorage):
         """Collection analysis directory"""
         return self.directory / 'analysis'
 
+    @cached_property
+    def members(self) -> Path:
+        """Collection archive member listing"""
+        return self.directory / 'members.json'
+
     def analyses(self) -> Iterator[AnalysisStorage]:
         """Collection analyses"""
         yield from _storage_instances(self.analysis_dir, AnalysisStorage, '*')
@@ -110,7 +296,12 @@ class CollectorStorage(ConceptStorage):
 
 
 @dataclass(kw_only=True)
-class CaseStorage(ConceptStorage):
+class UploadStorage(ConceptStorage):
+    """Upload Storage"""
+
+
+@dataclass(kw_only=True)
+class CaseStorage(ScratchConceptStorage):
     """Case Storage"""
 
     @cached_property
@@ -118,11 +309,21 @@ class CaseStorage(ConceptStorage):
         """Case Collector Directory"""
         return self.directory / 'collector'
 
+    @cached_property
+    def fingerprints(self) -> Path:
+        """Case collector fingerprint index file"""
+        return self.collector_dir / 'fingerprints.json'
+
     @cached_property
     def collection_dir(self) -> Path:
         """Case Collection Directory"""
         return self.directory / 'collection'
 
+    @cached_property
+    def upload_dir(self) -> Path:
+        """Case Upload Directory"""
+        return self.directory / 'upload'
+
     def collectors(self) -> Iterator[CollectorStorage]:
         """Case Collectors"""
         yield from _storage_instances(
@@ -141,6 +342,18 @@ class Storage(FusionStorage):
     """File System Storage"""
 
     config: HeliumStorageConfig
+    # background jobs (key pool, collector builds) run in the api server only
+    jobs: bool = False
+    notify: Notify | None = None
+    # wakes analyzers up as soon as an analysis is pending
+    signal_work: SignalWork | None = None
+    _upload_locks: dict[UUID, Lock] = field(default_factory=dict)
+    _upload_writers: dict[Path, DigestWriter] = field(default_factory=dict)
+    _upload_parts: dict[UUID, set[Task]] = field(default_factory=dict)
+    _expiry_task: Task | None = None
+    _resume_task: Task | None = None
+    _builds: dict[UUID, Task] = field(default_factory=dict)
+    _build_executor: ProcessPoolExecutor | None = None
 
     @cached_property
     def generaptor(self) -> Generaptor:
@@ -148,17 +361,297 @@ class Storage(FusionStorage):
         return Generaptor(
             cache=GCache(self.config.generaptor.cache),
             config=GConfig(self.config.generaptor.config),
+            keys=PrivateKeyCache(ttl=self.config.generaptor.key_ttl),
+        )
+
+    @cached_property
+    def key_pool(self) -> KeyPool:
+        """Collector key pair pool"""
+        return KeyPool(
+            config=self.config.key_pool, generate=generate_collector_secrets
         )
 
+    @cached_property
+    def fingerprint_index(self) -> FingerprintIndex:
+        """Collector fingerprint index"""
+        return FingerprintIndex()
+
     @cached_property
     def disk_usage(self) -> Path:
         """Disk usage file"""
         return self.cache_dir / 'disk_usage.json'
 
+    @cached_property
+    def index(self) -> MetadataIndex | None:
+        """Metadata index (if enabled)"""
+        if not self.config.index:
+            return None
+        return MetadataIndex()
+
+    @cached_property
+    def catalog(self) -> Catalog | None:
+        """Metadata catalog (if enabled)"""
+        if not self.config.catalog:
+            return None
+        return Catalog(filepath=self.config.catalog)
+
+    @cached_property
+    def blob_store(self) -> BlobStore | None:
+        """Content-addressed collection store (if enabled)"""
+        if not self.config.dedup:
+            return None
+        return BlobStore(directory=self.config.directory / 'blob')
+
+    @cached_property
+    def io(self) -> IOExecutor:
+        """Blocking i/o executor"""
+        return IOExecutor(config=self.config.io)
+
+    async def startup(self):
+        if self.catalog and await self.io.run(
+            IOClass.METADATA, self.catalog.is_stale
+        ):
+            _LOGGER.warning("catalog is new, empty or outdated, rebuilding...")
+            await self.rebuild_catalog()
+        if self.jobs:
+            self.key_pool.startup()
+            self._build_executor = ProcessPoolExecutor(
+                max_workers=self.config.build.workers
+            )
+            self._resume_task = create_task(self._resume_builds())
+        if self.config.upload_expiry:
+            self._expiry_task = create_task(self._expire_uploads_loop())
+
+    async def cleanup(self):
+        tasks = [self._expiry_task, self._resume_task]
+        tasks.extend(self._builds.values())
+        for task in filter(None, tasks):
+            task.cancel()
+            with suppress(CancelledError):
+                await task
+        # interrupted builds are resumed on next startup
+        if self._build_executor:
+            self._build_executor.shutdown(wait=False, cancel_futures=True)
+        await self.key_pool.cleanup()
+        self.io.shutdown()
+        if self.catalog:
+            self.catalog.close()
+
+    def _load_sync(
+        self, metadata: Path, concept_cls: ConceptType
+    ) -> Concept | None:
+        if self.index:
+            return self.index.load(metadata, concept_cls)
+        if not metadata.is_file():
+            return None
+        return concept_cls.from_filepath(metadata)
+
+    def _store_sync(self, metadata: Path, concept: Concept):
+        if self.index:
+            self.index.store(metadata, concept)
+            return
+        concept.to_filepath(metadata)
+
+    def _remove_sync(self, concept_storage: ConceptStorage):
+        concept_storage.remove()
+        if self.index:
+            self.index.forget(concept_storage.directory)
+
+    def _storages_sync(
+        self,
+        directory: Path,
+        storage_cls: Type[ConceptStorage],
+        pattern: str,
+    ) -> Iterator[ConceptStorage]:
+        if self.index:
+            return (
+                storage_cls(directory=item)
+                for item in self.index.listdir(directory, pattern)
+            )
+        return _storage_instances(directory, storage_cls, pattern)
+
+    def _listing_etag_sync(
+        self,
+        directory: Path,
+        storage_cls: Type[ConceptStorage],
+        pattern: str,
+        salt: str,
+    ) -> str | None:
+        storages = self._storages_sync(directory, storage_cls, pattern)
+        metadata = sorted(
+            concept_storage.metadata for concept_storage in storages
+        )
+        return stat_etag(metadata, salt=salt)
+
+    def _iter_all_sync(
+        self,
+        directory: Path,
+        storage_cls: Type[ConceptStorage],
+        concept_cls: ConceptType,
+        pattern: str,
+    ) -> Iterator[Concept]:
+        for concept_storage in self._storages_sync(
+            directory, storage_cls, pattern
+        ):
+            concept = self._load_sync(concept_storage.metadata, concept_cls)
+            if concept:
+                yield concept
+
+    def _load_all_sync(
+        self,
+        directory: Path,
+        storage_cls: Type[ConceptStorage],
+        concept_cls: ConceptType,
+        pattern: str,
+    ) -> list[Concept]:
+        return list(
+            self._iter_all_sync(directory, storage_cls, concept_cls, pattern)
+        )
+
+    async def _load(
+        self, metadata: Path, concept_cls: ConceptType
+    ) -> Concept | None:
+        return await self.io.run(
+            IOClass.METADATA, self._load_sync, metadata, concept_cls
+        )
+
+    async def _load_all(
+        self,
+        directory: Path,
+        storage_cls: Type[ConceptStorage],
+        concept_cls: ConceptType,
+        pattern: str = GUID_GLOB,
+    ) -> list[Concept]:
+        return await self.io.run(
+            IOClass.METADATA,
+            self._load_all_sync,
+            directory,
+            storage_cls,
+            concept_cls,
+            pattern,
+        )
+
+    async def _load_page(
+        self,
+        query: Query,
+        match: Callable,
+        sort_key: Callable,
+        directory: Path,
+        storage_cls: Type[ConceptStorage],
+        concept_cls: ConceptType,
+        pattern: str = GUID_GLOB,
+    ) -> list[Concept]:
+        # metadata files are still read for every page (the catalog avoids
+        # it) but concepts are streamed through the page selection within a
+        # single worker call, at most query.limit of them are held
+        return await self.io.run(
+            IOClass.METADATA,
+            query.paginate,
+            self._iter_all_sync(directory, storage_cls, concept_cls, pattern),
+            match,
+            sort_key,
+        )
+
+    async def _store(self, metadata: Path, concept: Concept):
+        await self.io.run(
+            IOClass.METADATA, self._store_sync, metadata, concept
+        )
+
+    async def _remove(self, concept_storage: ConceptStorage):
+        await self.io.run(IOClass.DELETE, self._remove_sync, concept_storage)
+
+    async def _catalog(self, method: Callable, *args):
+        await self.io.run(IOClass.METADATA, method, *args)
+
+    async def _collection_digests(
+        self, case_guid: UUID, collection_guid: UUID | None = None
+    ) -> list[str]:
+        if collection_guid:
+            collection = await self.retrieve_collection(
+                case_guid, collection_guid
+            )
+            collections = [collection] if collection else []
+        else:
+            collections = [
+                collection
+                async for collection in self.enumerate_collections(case_guid)
+            ]
+        return [
+            collection.sha256
+            for collection in collections
+            if collection.sha256
+        ]
+
+    def _digest_writer(self, filepath: Path) -> DigestWriter:
+        algorithms = {'sha256'} | set(self.config.digests)
+        return DigestWriter(filepath=filepath, algorithms=algorithms)
+
+    async def _stream_to_file(
+        self,
+        writer: DigestWriter,
+        content: AsyncIterator[bytes],
+        resume: bool = False,
+        limit: int | None = None,
+    ) -> bool:
+        """Write content using writer, return False if interrupted
+
+        Raises ValueError if content exceeds limit bytes, content received
+        before the chunk exceeding the limit is written.
+        """
+        try:
+            await self.io.run(
+                IOClass.UPLOAD, writer.resume if resume else writer.open
+            )
+            try:
+                # small chunks are coalesced to limit thread hand-offs
+                buffer = bytearray()
+                received = 0
+                async for chunk in content:
+                    received += len(chunk)
+                    if limit is not None and received > limit:
+                        if buffer:
+                            await self.io.run(
+                                IOClass.UPLOAD, writer.write, bytes(buffer)
+                            )
+                        raise ValueError("content exceeds upload size")
+                    buffer += chunk
+                    if len(buffer) < _WRITE_SIZE:
+                        continue
+                    await self.io.run(
+                        IOClass.UPLOAD, writer.write, bytes(buffer)
+                    )
+                    buffer.clear()
+                if buffer:
+                    await self.io.run(
+                        IOClass.UPLOAD, writer.write, bytes(buffer)
+                    )
+            finally:
+                await self.io.run(IOClass.UPLOAD, writer.close)
+        except (OSError, RuntimeError, ClientPayloadError):
+            _LOGGER.exception("failed to write content to %s", writer.filepath)
+            return False
+        return True
+
+    def _scratch(self, directory: Path) -> Path | None:
+        scratch_directory = self.config.scratch_directory
+        if not scratch_directory:
+            return None
+        return scratch_directory / directory.relative_to(self.config.directory)
+
     def case_storage(self, case_guid: UUID) -> CaseStorage:
         """Retrieve case storage"""
         directory = self.config.directory / str(case_guid)
-        return CaseStorage(directory=directory)
+        return CaseStorage(
+            directory=directory, scratch=self._scratch(directory)
+        )
+
+    def upload_storage(
+        self, case_guid: UUID, upload_guid: UUID
+    ) -> UploadStorage:
+        """Retrieve upload storage"""
+        case_storage = self.case_storage(case_guid)
+        directory = case_storage.upload_dir / str(upload_guid)
+        return UploadStorage(directory=directory)
 
     def collector_storage(
         self, case_guid: UUID, collector_guid: UUID
@@ -174,7 +667,9 @@ class Storage(FusionStorage):
         """Retrieve collection storage"""
         case_storage = self.case_storage(case_guid)
         directory = case_storage.collection_dir / str(collection_guid)
-        return CollectionStorage(directory=directory)
+        return CollectionStorage(
+            directory=directory, scratch=self._scratch(directory)
+        )
 
     def analysis_storage(
         self, case_guid: UUID, collection_guid: UUID, analyzer: str
@@ -184,7 +679,9 @@ class Storage(FusionStorage):
             case_guid, collection_guid
         )
         directory = collection_storage.analysis_dir / analyzer
-        return AnalysisStorage(directory=directory)
+        return AnalysisStorage(
+            directory=directory, scratch=self._scratch(directory)
+        )
 
     async def attach_case(self, case_guid: UUID, next_case_guid: UUID) -> bool:
         case = await self.retrieve_case(case_guid)
@@ -199,7 +696,9 @@ class Storage(FusionStorage):
         # rename case directory
         next_directory = case_storage.directory.parent / str(next_case_guid)
         try:
-            case_storage.directory.rename(next_directory)
+            await self.io.run(
+                IOClass.METADATA, case_storage.directory.rename, next_directory
+            )
         except FileExistsError:
             _LOGGER.warning(
                 "prevented attach logic to replace an existing case: %s => %s",
@@ -207,11 +706,19 @@ class Storage(FusionStorage):
                 next_case_guid,
             )
             return False
+        if self.index:
+            self.index.forget(case_storage.directory)
+        # extracted data is a cache, dropped instead of renamed
+        await self.io.run(IOClass.DELETE, case_storage.remove_scratch)
         # update case metadata
         case_storage = self.case_storage(next_case_guid)
         case.guid = next_case_guid
         case.managed = True
-        case.to_filepath(case_storage.metadata)
+        await self._store(case_storage.metadata, case)
+        if self.catalog:
+            entries = [partial(self.catalog.delete_case, case_guid)]
+            entries.extend(await self._catalog_entries(case))
+            await self._catalog(self._apply_catalog_entries, entries)
         return True
 
     async def create_case(self, managed: bool, dct) -> Case | None:
@@ -226,80 +733,223 @@ class Storage(FusionStorage):
                 report=dct.get('report'),
             )
         case_storage = self.case_storage(case.guid)
-        case_storage.create()
-        case.to_filepath(case_storage.metadata)
+        await self.io.run(IOClass.METADATA, case_storage.create)
+        await self._store(case_storage.metadata, case)
+        if self.catalog:
+            await self._catalog(self.catalog.upsert_case, case)
         return case
 
     async def update_case(self, case_guid: UUID, dct) -> Case | None:
         case_storage = self.case_storage(case_guid)
         metadata = case_storage.metadata
-        if not metadata.is_file():
+        case = await self._load(metadata, Case)
+        if not case:
             _LOGGER.error("case metadata not found: %s", metadata)
             return None
-        case = Case.from_filepath(metadata)
         case.update(dct)
-        case.to_filepath(metadata)
+        await self._store(metadata, case)
+        if self.catalog:
+            await self._catalog(self.catalog.upsert_case, case)
         return case
 
     async def delete_case(self, case_guid: UUID) -> bool:
         case_storage = self.case_storage(case_guid)
-        case_storage.remove()
+        digests = []
+        if self.blob_store:
+            digests = await self._collection_digests(case_guid)
+        await self._remove(case_storage)
+        if digests:
+            await self.io.run(IOClass.DELETE, self.blob_store.release, digests)
+        if self.catalog:
+            await self._catalog(self.catalog.delete_case, case_guid)
         return True
 
     async def retrieve_case(self, case_guid: UUID) -> Case | None:
         case_storage = self.case_storage(case_guid)
         metadata = case_storage.metadata
-        if not metadata.is_file():
+        case = await self._load(metadata, Case)
+        if not case:
             _LOGGER.error("case metadata not found: %s", metadata)
             return None
-        return Case.from_filepath(metadata)
+        return case
 
-    async def enumerate_cases(self) -> AsyncIterator[Case]:
-        for directory in iter_guid_items(self.config.directory):
-            if not directory.is_dir():
-                continue
-            metadata = CaseStorage(directory=directory).metadata
-            if not metadata.is_file():
-                continue
-            yield Case.from_filepath(metadata)
+    async def enumerate_cases(
+        self, query: Query | None = None
+    ) -> AsyncIterator[Case]:
+        if query and self.catalog:
+            cases = await self.io.run(
+                IOClass.METADATA, _list_of, self.catalog.enumerate_cases, query
+            )
+        elif query:
+            cases = await self._load_page(
+                query,
+                query.match_case,
+                case_sort_key,
+                self.config.directory,
+                CaseStorage,
+                Case,
+            )
+        else:
+            cases = await self._load_all(
+                self.config.directory, CaseStorage, Case
+            )
+        for case in cases:
+            yield case
 
     async def create_collector(self, case_guid: UUID, dct) -> Collector | None:
-        """Create case collector"""
-        collector = Collector(
-            profile=dct['profile'],
-            distrib=Distribution(
-                arch=Architecture(dct.get('arch', Architecture.AMD64)),
-                opsystem=OperatingSystem(dct['opsystem']),
-            ),
-            device=dct.get('device', ''),
-            memdump=dct.get('memdump', False),
-            dont_be_lazy=dct.get('dont_be_lazy'),
-            vss_analysis_age=dct.get('vss_analysis_age'),
-            use_auto_accessor=dct.get('use_auto_accessor'),
-            description=dct.get('description'),
-        )
+        """Create case collector and schedule its build"""
+        collector = _collector_from_dict(dct)
+        collector_secrets = await self.key_pool.pop()
+        await self._add_collector(case_guid, collector, collector_secrets)
+        return collector
+
+    async def create_collectors(
+        self, case_guid: UUID, dcts: list[dict]
+    ) -> list[Collector] | None:
+        """Create case collectors, return them before they are built
+
+        Every collector is validated before any is created, profiles are
+        resolved once per operating system and builds run in background in
+        parallel up to build workers.
+        """
+        try:
+            collectors = [_collector_from_dict(dct) for dct in dcts]
+        except (KeyError, ValueError, TypeError):
+            _LOGGER.warning("invalid collector in batch")
+            return None
+        opsystems = {collector.distrib.opsystem for collector in collectors}
+        for opsystem in opsystems:
+            resolution = await self.io.run(
+                IOClass.METADATA, self.generaptor.resolve, opsystem
+            )
+            profiles = resolution.profile_mapping or {}
+            for collector in collectors:
+                if collector.distrib.opsystem != opsystem:
+                    continue
+                if collector.profile not in profiles:
+                    _LOGGER.warning(
+                        "profile not found: %s (%s)",
+                        collector.profile,
+                        opsystem.value,
+                    )
+                    return None
+        secrets = await gather(*[self.key_pool.pop() for _ in collectors])
+        for collector, collector_secrets in zip(collectors, secrets):
+            await self._add_collector(case_guid, collector, collector_secrets)
+        return collectors
+
+    async def _add_collector(
+        self,
+        case_guid: UUID,
+        collector: Collector,
+        collector_secrets: CollectorSecrets,
+    ):
         collector_storage = self.collector_storage(case_guid, collector.guid)
-        collector_storage.create()
-        collector_storage.data_dir.mkdir()
-        collector_secrets = self.generaptor.generate_collector_secrets()
-        fingerprint = self.generaptor.generate_collector(
-            collector, collector_secrets, collector_storage.data_dir
-        )
-        if not fingerprint:
-            _LOGGER.error("collector generation failed")
-            collector_storage.remove()
-            return None
-        collector.fingerprint = fingerprint
-        collector_secrets.to_filepath(collector_storage.secrets)
-        collector.to_filepath(collector_storage.metadata)
+        await self.io.run(IOClass.METADATA, collector_storage.create)
+        await self.io.run(IOClass.METADATA, collector_storage.data_dir.mkdir)
+        collector.fingerprint = collector_fingerprint(collector_secrets)
+        await self.io.run(
+            IOClass.METADATA,
+            collector_secrets.to_filepath,
+            collector_storage.secrets,
+        )
+        await self._store(collector_storage.metadata, collector)
+        await self._index_fingerprint(case_guid, collector)
+        if self.catalog:
+            await self._catalog(
+                self.catalog.upsert_collector, case_guid, collector
+            )
+        self._schedule_build(case_guid, collector.guid)
+
+    def _schedule_build(self, case_guid: UUID, collector_guid: UUID):
+        task = create_task(self._build_collector(case_guid, collector_guid))
+        self._builds[collector_guid] = task
+        task.add_done_callback(
+            lambda _: self._builds.pop(collector_guid, None)
+        )
+
+    async def _set_collector_status(
+        self, case_guid: UUID, collector_guid: UUID, status: Status
+    ) -> Collector | None:
+        collector_storage = self.collector_storage(case_guid, collector_guid)
+        collector = await self._load(collector_storage.metadata, Collector)
+        if not collector:
+            _LOGGER.warning(
+                "collector removed during build: %s", collector_guid
+            )
+            return None
+        collector.status = status
+        await self._store(collector_storage.metadata, collector)
+        if self.catalog:
+            await self._catalog(
+                self.catalog.upsert_collector, case_guid, collector
+            )
+        if self.notify:
+            case = await self.retrieve_case(case_guid)
+            await self.notify(
+                f'collector_{status.value}', case, collector.to_dict()
+            )
         return collector
 
+    async def _build_collector(self, case_guid: UUID, collector_guid: UUID):
+        collector = await self._set_collector_status(
+            case_guid, collector_guid, Status.PROCESSING
+        )
+        if not collector:
+            return
+        collector_storage = self.collector_storage(case_guid, collector_guid)
+        collector_secrets = await self.retrieve_collector_secrets(
+            case_guid, collector_guid
+        )
+        fingerprint = None
+        if collector_secrets:
+            loop = get_running_loop()
+            try:
+                fingerprint = await loop.run_in_executor(
+                    self._build_executor,
+                    build_collector,
+                    self.config.generaptor.cache,
+                    self.config.generaptor.config,
+                    collector,
+                    collector_secrets,
+                    collector_storage.data_dir,
+                )
+            except Exception:  # pylint: disable=broad-exception-caught
+                # a build error must never leave the collector processing
+                _LOGGER.exception("collector build failed: %s", collector_guid)
+        if fingerprint != collector.fingerprint:
+            _LOGGER.error("collector build failed: %s", collector_guid)
+            status = Status.FAILURE
+        else:
+            _LOGGER.info("collector build succeeded: %s", collector_guid)
+            status = Status.SUCCESS
+        await self._set_collector_status(case_guid, collector_guid, status)
+
+    async def _resume_builds(self):
+        async for case in self.enumerate_cases():
+            async for collector in self.enumerate_collectors(case.guid):
+                if collector.built:
+                    continue
+                _LOGGER.info("resuming collector build: %s", collector.guid)
+                self._schedule_build(case.guid, collector.guid)
+
     async def delete_collector(
         self, case_guid: UUID, collector_guid: UUID
     ) -> bool:
         """Delete collector"""
+        build = self._builds.get(collector_guid)
+        if build:
+            build.cancel()
         collector_storage = self.collector_storage(case_guid, collector_guid)
-        collector_storage.remove()
+        await self._remove(collector_storage)
+        await self.io.run(
+            IOClass.METADATA,
+            self.fingerprint_index.remove,
+            self.case_storage(case_guid).fingerprints,
+            collector_guid,
+        )
+        if self.catalog:
+            await self._catalog(self.catalog.delete_collector, collector_guid)
         return True
 
     async def import_collector(self, case_guid: UUID, dct) -> Collector | None:
@@ -319,21 +969,40 @@ class Storage(FusionStorage):
             _LOGGER.error("missing keys in imported collector metadata")
             return None
         collector_storage = self.collector_storage(case_guid, collector.guid)
-        collector_storage.create()
-        collector_secrets.to_filepath(collector_storage.secrets)
-        collector.to_filepath(collector_storage.metadata)
+        await self.io.run(IOClass.METADATA, collector_storage.create)
+        await self.io.run(
+            IOClass.METADATA,
+            collector_secrets.to_filepath,
+            collector_storage.secrets,
+        )
+        await self._store(collector_storage.metadata, collector)
+        await self._index_fingerprint(case_guid, collector)
+        if self.catalog:
+            await self._catalog(
+                self.catalog.upsert_collector, case_guid, collector
+            )
         return collector
 
+    async def _index_fingerprint(self, case_guid: UUID, collector: Collector):
+        await self.io.run(
+            IOClass.METADATA,
+            self.fingerprint_index.add,
+            self.case_storage(case_guid).fingerprints,
+            collector.fingerprint,
+            collector.guid,
+        )
+
     async def retrieve_collector(
         self, case_guid: UUID, collector_guid: UUID
     ) -> Collector | None:
         """Retrieve case collector"""
         collector_storage = self.collector_storage(case_guid, collector_guid)
         metadata = collector_storage.metadata
-        if not metadata.is_file():
+        collector = await self._load(metadata, Collector)
+        if not collector:
             _LOGGER.error("collection metadata not found: %s", metadata)
             return None
-        return Collector.from_filepath(metadata)
+        return collector
 
     async def retrieve_collector_secrets(
         self, case_guid: UUID, collector_guid: UUID
@@ -341,28 +1010,51 @@ class Storage(FusionStorage):
         """Retrieve case collector secrets"""
         collector_storage = self.collector_storage(case_guid, collector_guid)
         secrets = collector_storage.secrets
-        if not secrets.is_file():
+        collector_secrets = await self.io.run(
+            IOClass.METADATA, _load_secrets, secrets
+        )
+        if not collector_secrets:
             _LOGGER.error("collector secrets not found: %s", secrets)
             return None
-        return CollectorSecrets.from_filepath(secrets)
+        return collector_secrets
 
     async def retrieve_collector_executable(
         self, case_guid: UUID, collector_guid: UUID
     ) -> Path | None:
         """Retrieve case collector content"""
         collector_storage = self.collector_storage(case_guid, collector_guid)
-        return collector_storage.executable
+        return await self.io.run(
+            IOClass.METADATA, getattr, collector_storage, 'executable'
+        )
 
     async def enumerate_collectors(
-        self, case_guid: UUID
+        self, case_guid: UUID, query: Query | None = None
     ) -> AsyncIterator[Collector]:
-        """Enumerate case collectors"""
-        case_storage = self.case_storage(case_guid)
-        for collector_storage in case_storage.collectors():
-            metadata = collector_storage.metadata
-            if not metadata.is_file():
-                continue
-            yield Collector.from_filepath(metadata)
+        """Enumerate case collectors (matching query if given)"""
+        if query and self.catalog:
+            collectors = await self.io.run(
+                IOClass.METADATA,
+                _list_of,
+                self.catalog.enumerate_collectors,
+                case_guid,
+                query,
+            )
+        elif query:
+            collectors = await self._load_page(
+                query,
+                query.match_collector,
+                collector_sort_key,
+                self.case_storage(case_guid).collector_dir,
+                CollectorStorage,
+                Collector,
+            )
+        else:
+            case_storage = self.case_storage(case_guid)
+            collectors = await self._load_all(
+                case_storage.collector_dir, CollectorStorage, Collector
+            )
+        for collector in collectors:
+            yield collector
 
     async def create_collection(
         self, case_guid: UUID, content: AsyncIterator[bytes]
@@ -372,19 +1064,48 @@ class Storage(FusionStorage):
         collection_storage = self.collection_storage(
             case_guid, collection.guid
         )
-        collection_storage.create()
-        data = collection_storage.data
-        size = await stream_to_file(data, content)
-        if size is None:
+        await self.io.run(IOClass.METADATA, collection_storage.create)
+        writer = self._digest_writer(collection_storage.data)
+        if not await self._stream_to_file(writer, content):
             _LOGGER.error("file upload failed")
+            await self._remove(collection_storage)
             return None
+        return await self._finalize_collection(
+            case_guid, collection_storage, collection, writer
+        )
+
+    async def _finalize_collection(
+        self,
+        case_guid: UUID,
+        collection_storage: CollectionStorage,
+        collection: Collection,
+        writer: DigestWriter,
+    ) -> Collection | None:
+        data = collection_storage.data
+        collection.size = writer.size
+        for algorithm, hexdigest in writer.hexdigests().items():
+            setattr(collection, algorithm, hexdigest)
         try:
-            self.generaptor.copy_zip_metadata(collection, data)
+            # reads the central directory and metadata.json only
+            await self.io.run(
+                IOClass.ARCHIVE,
+                self.generaptor.copy_zip_metadata,
+                collection,
+                data,
+            )
         except BadZipFile:
             _LOGGER.error("collection shall be a zip archive")
-            collection_storage.remove()
+            await self._remove(collection_storage)
             return None
-        collection.to_filepath(collection_storage.metadata)
+        if self.blob_store:
+            await self.io.run(
+                IOClass.ARCHIVE, self.blob_store.adopt, data, collection.sha256
+            )
+        await self._store(collection_storage.metadata, collection)
+        if self.catalog:
+            await self._catalog(
+                self.catalog.upsert_collection, case_guid, collection
+            )
         return collection
 
     async def update_collection(
@@ -395,12 +1116,16 @@ class Storage(FusionStorage):
             case_guid, collection_guid
         )
         metadata = collection_storage.metadata
-        if not metadata.is_file():
+        collection = await self._load(metadata, Collection)
+        if not collection:
             _LOGGER.error("collection metadata not found: %s", metadata)
             return None
-        collection = Collection.from_filepath(metadata)
         collection.update(dct)
-        collection.to_filepath(metadata)
+        await self._store(metadata, collection)
+        if self.catalog:
+            await self._catalog(
+                self.catalog.upsert_collection, case_guid, collection
+            )
         return collection
 
     async def delete_collection(
@@ -410,7 +1135,18 @@ class Storage(FusionStorage):
         collection_storage = self.collection_storage(
             case_guid, collection_guid
         )
-        collection_storage.remove()
+        digests = []
+        if self.blob_store:
+            digests = await self._collection_digests(
+                case_guid, collection_guid
+            )
+        await self._remove(collection_storage)
+        if digests:
+            await self.io.run(IOClass.DELETE, self.blob_store.release, digests)
+        if self.catalog:
+            await self._catalog(
+                self.catalog.delete_collection, collection_guid
+            )
         return True
 
     async def retrieve_collection(
@@ -421,10 +1157,36 @@ class Storage(FusionStorage):
             case_guid, collection_guid
         )
         metadata = collection_storage.metadata
-        if not metadata.is_file():
+        collection = await self._load(metadata, Collection)
+        if not collection:
             _LOGGER.error("collection metadata not found: %s", metadata)
             return None
-        return Collection.from_filepath(metadata)
+        return collection
+
+    async def collection_etag(
+        self, case_guid: UUID, collection_guid: UUID
+    ) -> str | None:
+        """Compute case collection metadata entity tag"""
+        collection_storage = self.collection_storage(
+            case_guid, collection_guid
+        )
+        return await self.io.run(
+            IOClass.METADATA, stat_etag, [collection_storage.metadata]
+        )
+
+    async def collections_etag(
+        self, case_guid: UUID, salt: str = ''
+    ) -> str | None:
+        """Compute case collections metadata entity tag"""
+        case_storage = self.case_storage(case_guid)
+        return await self.io.run(
+            IOClass.METADATA,
+            self._listing_etag_sync,
+            case_storage.collection_dir,
+            CollectionStorage,
+            GUID_GLOB,
+            salt,
+        )
 
     async def retrieve_collection_data(
         self, case_guid: UUID, collection_guid: UUID
@@ -434,11 +1196,109 @@ class Storage(FusionStorage):
             case_guid, collection_guid
         )
         data = collection_storage.data
-        if not data.is_file():
+        if not await self.io.run(IOClass.METADATA, data.is_file):
             _LOGGER.error("collection data not found: %s", data)
             return None
         return data
 
+    async def _collection_secret(
+        self, case_guid: UUID, collection: Collection, data: Path
+    ) -> str | None:
+        collector_guid = await self.find_collector_guid(
+            case_guid, collection.fingerprint
+        )
+        if not collector_guid:
+            _LOGGER.error(
+                "cannot find a collector matching collection fingerprint %s",
+                collection.fingerprint,
+            )
+            return None
+        collector_secrets = await self.retrieve_collector_secrets(
+            case_guid, collector_guid
+        )
+        if not collector_secrets:
+            return None
+        return await self.io.run(
+            IOClass.ARCHIVE,
+            self.generaptor.collection_secret,
+            collector_secrets,
+            data,
+        )
+
+    async def _collection_archive(
+        self, case_guid: UUID, collection_guid: UUID
+    ) -> tuple[Path, str | None] | None:
+        collection = await self.retrieve_collection(case_guid, collection_guid)
+        if not collection:
+            return None
+        data = await self.retrieve_collection_data(case_guid, collection_guid)
+        if not data:
+            return None
+        if not collection.fingerprint:
+            return data, None
+        secret = await self._collection_secret(case_guid, collection, data)
+        if not secret:
+            _LOGGER.error("cannot decrypt collection %s", collection_guid)
+            return None
+        return data, secret
+
+    async def retrieve_collection_members(
+        self, case_guid: UUID, collection_guid: UUID
+    ) -> list[ArchiveMember] | None:
+        """Retrieve case collection archive members (cached)"""
+        collection_storage = self.collection_storage(
+            case_guid, collection_guid
+        )
+        members = await self.io.run(
+            IOClass.METADATA, _load_members, collection_storage.members
+        )
+        if members is not None:
+            return members
+        archive = await self._collection_archive(case_guid, collection_guid)
+        if not archive:
+            return None
+        members = await self.io.run(IOClass.ARCHIVE, list_members, *archive)
+        if members is None:
+            return None
+        await self.io.run(
+            IOClass.METADATA,
+            _store_members,
+            collection_storage.members,
+            members,
+        )
+        return members
+
+    async def retrieve_collection_member(
+        self, case_guid: UUID, collection_guid: UUID, name: str
+    ) -> MemberReader | None:
+        """Retrieve case collection archive member reader"""
+        members = await self.retrieve_collection_members(
+            case_guid, collection_guid
+        )
+        member = next(
+            (member for member in members or [] if member.name == name), None
+        )
+        if not member:
+            return None
+        # reading an archive member decrypts and decompresses the archive
+        # up to the member, members already extracted are read as files
+        data_dir = self.collection_storage(case_guid, collection_guid).data_dir
+        if await self.io.run(
+            IOClass.METADATA,
+            is_extracted_member,
+            data_dir,
+            member.name,
+            member.size,
+        ):
+            return MemberReader(
+                filepath=data_dir, member=member, archive_format=None
+            )
+        archive = await self._collection_archive(case_guid, collection_guid)
+        if not archive:
+            return None
+        filepath, secret = archive
+        return MemberReader(filepath=filepath, member=member, secret=secret)
+
     async def delete_collection_cache(
         self, case_guid: UUID, collection_guid: UUID
     ) -> bool:
@@ -446,21 +1306,305 @@ class Storage(FusionStorage):
         collection_storage = self.collection_storage(
             case_guid, collection_guid
         )
-        if not collection_storage.data_dir.is_dir():
+        if not await self.io.run(
+            IOClass.METADATA, collection_storage.data_dir.is_dir
+        ):
             return False
-        collection_storage.remove_data_dir()
+        await self.io.run(IOClass.DELETE, collection_storage.remove_data_dir)
         return True
 
     async def enumerate_collections(
-        self, case_guid: UUID
+        self, case_guid: UUID, query: Query | None = None
     ) -> AsyncIterator[Collection]:
-        """Retrieve case collections"""
+        """Retrieve case collections (matching query if given)"""
+        if query and self.catalog:
+            collections = await self.io.run(
+                IOClass.METADATA,
+                _list_of,
+                self.catalog.enumerate_collections,
+                case_guid,
+                query,
+            )
+        elif query:
+            collections = await self._load_page(
+                query,
+                query.match_collection,
+                collection_sort_key,
+                self.case_storage(case_guid).collection_dir,
+                CollectionStorage,
+                Collection,
+            )
+        else:
+            case_storage = self.case_storage(case_guid)
+            collections = await self._load_all(
+                case_storage.collection_dir, CollectionStorage, Collection
+            )
+        for collection in collections:
+            yield collection
+
+    def _case_overview_sync(self, case_guid: UUID) -> list[CollectionOverview]:
         case_storage = self.case_storage(case_guid)
-        for collection_storage in case_storage.collections():
-            metadata = collection_storage.metadata
-            if not metadata.is_file():
+        overview = []
+        for collection_storage in self._storages_sync(
+            case_storage.collection_dir, CollectionStorage, GUID_GLOB
+        ):
+            collection = self._load_sync(
+                collection_storage.metadata, Collection
+            )
+            if not collection:
                 continue
-            yield Collection.from_filepath(metadata)
+            analyses = self._load_all_sync(
+                collection_storage.analysis_dir, AnalysisStorage, Analysis, '*'
+            )
+            analyses.sort(key=lambda analysis: analysis.analyzer)
+            overview.append(
+                CollectionOverview(collection=collection, analyses=analyses)
+            )
+        overview.sort(key=lambda item: collection_sort_key(item.collection))
+        return overview
+
+    async def case_overview(self, case_guid: UUID) -> list[CollectionOverview]:
+        """Retrieve case collections along with their analyses"""
+        if self.catalog:
+            return await self.io.run(
+                IOClass.METADATA,
+                _list_of,
+                self.catalog.case_overview,
+                case_guid,
+            )
+        return await self.io.run(
+            IOClass.METADATA, self._case_overview_sync, case_guid
+        )
+
+    def _upload_lock(self, upload_guid: UUID) -> Lock:
+        return self._upload_locks.setdefault(upload_guid, Lock())
+
+    def _forget_upload(self, upload_storage: UploadStorage):
+        upload_guid = UUID(upload_storage.directory.name)
+        self._upload_locks.pop(upload_guid, None)
+        self._upload_parts.pop(upload_guid, None)
+        self._upload_writers.pop(upload_storage.data, None)
+
+    async def _upload_writer(
+        self, upload_storage: UploadStorage, upload: Upload
+    ) -> DigestWriter:
+        writer = self._upload_writers.get(upload_storage.data)
+        if writer:
+            return writer
+        # digests state was lost (restart), rebuild it from file content
+        writer = self._digest_writer(upload_storage.data)
+        await self.io.run(IOClass.UPLOAD, writer.resume)
+        await self.io.run(IOClass.UPLOAD, writer.close)
+        self._upload_writers[upload_storage.data] = writer
+        if writer.size != upload.offset:
+            # persist offset so that clients resume from it
+            upload.update({'offset': writer.size})
+            await self._store(upload_storage.metadata, upload)
+        return writer
+
+    async def create_upload(self, case_guid: UUID, dct) -> Upload:
+        """Create case upload session
+
+        Parallel upload sessions accept parts at any offset, the declared
+        size is used to preallocate the file. Raises ValueError if size is
+        missing or invalid.
+        """
+        size = dct.get('size')
+        if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+            raise ValueError("upload requires a non-negative size")
+        upload = Upload(size=size, parallel=dct.get('parallel', False))
+        upload_storage = self.upload_storage(case_guid, upload.guid)
+        await self.io.run(IOClass.METADATA, upload_storage.create)
+        if upload.parallel:
+            await self.io.run(
+                IOClass.UPLOAD, preallocate, upload_storage.data, upload.size
+            )
+        else:
+            await self.io.run(IOClass.METADATA, upload_storage.data.touch)
+        await self._store(upload_storage.metadata, upload)
+        return upload
+
+    async def retrieve_upload(
+        self, case_guid: UUID, upload_guid: UUID
+    ) -> Upload | None:
+        """Retrieve case upload session"""
+        upload_storage = self.upload_storage(case_guid, upload_guid)
+        metadata = upload_storage.metadata
+        upload = await self._load(metadata, Upload)
+        if not upload:
+            _LOGGER.error("upload metadata not found: %s", metadata)
+            return None
+        return upload
+
+    async def append_upload(
+        self,
+        case_guid: UUID,
+        upload_guid: UUID,
+        offset: int,
+        content: AsyncIterator[bytes],
+    ) -> Upload | None:
+        """Append content to upload session
+
+        Returns None if upload session is not found or if offset does not
+        match the committed offset (or is out of bounds for parallel upload
+        sessions). Raises ValueError if content exceeds the declared size.
+        """
+        upload_storage = self.upload_storage(case_guid, upload_guid)
+        async with self._upload_lock(upload_guid):
+            upload = await self.retrieve_upload(case_guid, upload_guid)
+            if not upload:
+                return None
+            if upload.parallel:
+                if not 0 <= offset < upload.size:
+                    _LOGGER.warning(
+                        "upload %s offset out of bounds (%d)",
+                        upload_guid,
+                        offset,
+                    )
+                    return None
+                self._upload_parts.setdefault(upload_guid, set()).add(
+                    current_task()
+                )
+            else:
+                return await self._append_upload(
+                    upload_storage, upload, offset, content
+                )
+        # parts are written concurrently, outside of the session lock
+        writer = PartWriter(
+            filepath=upload_storage.data, offset=offset, limit=upload.size
+        )
+        try:
+            if not await self._stream_to_file(
+                writer, content, limit=upload.size - offset
+            ):
+                _LOGGER.warning("upload %s part interrupted", upload_guid)
+        finally:
+            self._upload_parts.get(upload_guid, set()).discard(current_task())
+        async with self._upload_lock(upload_guid):
+            upload = await self.retrieve_upload(case_guid, upload_guid)
+            if not upload:
+                return None
+            upload.add_range(offset, offset + writer.size)
+            await self._store(upload_storage.metadata, upload)
+        return upload
+
+    async def _append_upload(
+        self,
+        upload_storage: UploadStorage,
+        upload: Upload,
+        offset: int,
+        content: AsyncIterator[bytes],
+    ) -> Upload | None:
+        writer = await self._upload_writer(upload_storage, upload)
+        if offset != upload.offset:
+            _LOGGER.warning(
+                "upload %s offset mismatch (expected %d, got %d)",
+                upload.guid,
+                upload.offset,
+                offset,
+            )
+            return None
+        limit = None if upload.size is None else upload.size - offset
+        try:
+            if not await self._stream_to_file(
+                writer, content, resume=True, limit=limit
+            ):
+                _LOGGER.warning("upload %s interrupted", upload.guid)
+        finally:
+            # content written before an interruption or overflow is kept
+            upload.update({'offset': writer.size})
+            await self._store(upload_storage.metadata, upload)
+        return upload
+
+    async def complete_upload(
+        self, case_guid: UUID, upload_guid: UUID, dct
+    ) -> Collection | None:
+        """Turn upload session into a case collection"""
+        upload_storage = self.upload_storage(case_guid, upload_guid)
+        async with self._upload_lock(upload_guid):
+            upload = await self.retrieve_upload(case_guid, upload_guid)
+            if not upload:
+                return None
+            if upload.parallel and (
+                self._upload_parts.get(upload_guid) or not upload.received
+            ):
+                _LOGGER.error("upload %s parts are missing", upload_guid)
+                return None
+            # parallel upload sessions are hashed once assembled
+            writer = await self._upload_writer(upload_storage, upload)
+            if upload.size is not None and writer.size != upload.size:
+                _LOGGER.error(
+                    "upload %s is incomplete (%d/%d)",
+                    upload_guid,
+                    writer.size,
+                    upload.size,
+                )
+                return None
+            sha256 = dct.get('sha256')
+            if sha256 and sha256 != writer.hexdigests()['sha256']:
+                _LOGGER.error("upload %s sha256 mismatch", upload_guid)
+                return None
+            collection = Collection()
+            collection_storage = self.collection_storage(
+                case_guid, collection.guid
+            )
+            await self.io.run(IOClass.METADATA, collection_storage.create)
+            await self.io.run(
+                IOClass.METADATA,
+                upload_storage.data.replace,
+                collection_storage.data,
+            )
+            await self._remove(upload_storage)
+            self._forget_upload(upload_storage)
+        return await self._finalize_collection(
+            case_guid, collection_storage, collection, writer
+        )
+
+    async def delete_upload(self, case_guid: UUID, upload_guid: UUID) -> bool:
+        """Delete case upload session"""
+        upload_storage = self.upload_storage(case_guid, upload_guid)
+        async with self._upload_lock(upload_guid):
+            if not await self.io.run(
+                IOClass.METADATA, upload_storage.directory.is_dir
+            ):
+                return False
+            # parts are written outside of the session lock, stop them first
+            parts = self._upload_parts.pop(upload_guid, set())
+            for task in parts:
+                task.cancel()
+            if parts:
+                await wait(parts)
+            await self._remove(upload_storage)
+            self._forget_upload(upload_storage)
+        return True
+
+    async def expire_uploads(self) -> int:
+        """Delete upload sessions inactive for longer than upload expiry"""
+        expiry = timedelta(seconds=self.config.upload_expiry)
+        count = 0
+        async for case in self.enumerate_cases():
+            case_storage = self.case_storage(case.guid)
+            for upload in await self._load_all(
+                case_storage.upload_dir, UploadStorage, Upload
+            ):
+                if utcnow() - upload.updated < expiry:
+                    continue
+                if self._upload_lock(upload.guid).locked():
+                    continue
+                if self._upload_parts.get(upload.guid):
+                    continue
+                _LOGGER.info("upload %s expired", upload.guid)
+                await self.delete_upload(case.guid, upload.guid)
+                count += 1
+        return count
+
+    async def _expire_uploads_loop(self):
+        while True:
+            try:
+                await self.expire_uploads()
+            except Exception:  # pylint: disable=broad-exception-caught
+                _LOGGER.exception("failed to expire uploads")
+            await sleep(_EXPIRY_PERIOD)
 
     async def create_analysis(
         self, case_guid: UUID, collection_guid: UUID, dct
@@ -471,13 +1615,28 @@ class Storage(FusionStorage):
             case_guid, collection_guid, analysis.analyzer
         )
         metadata = analysis_storage.metadata
-        if metadata.is_file():
+        if await self.io.run(IOClass.METADATA, metadata.is_file):
             _LOGGER.error("analysis metadata found: %s", metadata)
             return None
-        analysis_storage.create()
-        analysis.to_filepath(analysis_storage.metadata)
+        await self.io.run(IOClass.METADATA, analysis_storage.create)
+        await self._store(analysis_storage.metadata, analysis)
+        if self.catalog:
+            await self._catalog(
+                self.catalog.upsert_analysis,
+                case_guid,
+                collection_guid,
+                analysis,
+            )
+        await self._signal_pending(case_guid, collection_guid, analysis)
         return analysis
 
+    async def _signal_pending(
+        self, case_guid: UUID, collection_guid: UUID, analysis: Analysis
+    ):
+        if not self.signal_work or analysis.status != Status.PENDING:
+            return
+        await self.signal_work(analysis.analyzer, case_guid, collection_guid)
+
     async def update_analysis(
         self,
         case_guid: UUID,
@@ -490,14 +1649,129 @@ class Storage(FusionStorage):
             case_guid, collection_guid, analyzer
         )
         metadata = analysis_storage.metadata
-        if not metadata.is_file():
+        analysis = await self._load(metadata, Analysis)
+        if not analysis:
             _LOGGER.error("analysis metadata not found: %s", metadata)
             return None
-        analysis = Analysis.from_filepath(metadata)
         analysis.update(dct)
-        analysis.to_filepath(metadata)
+        await self._store(metadata, analysis)
+        if self.catalog:
+            await self._catalog(
+                self.catalog.upsert_analysis,
+                case_guid,
+                collection_guid,
+                analysis,
+            )
+        await self._signal_pending(case_guid, collection_guid, analysis)
+        return analysis
+
+    async def archive_analysis(
+        self,
+        case_guid: UUID,
+        collection_guid: UUID,
+        analyzer: str,
+        config: ArchiveConfig,
+    ) -> Analysis | None:
+        """Archive analysis output and record archive properties
+
+        In stream mode, output is kept as-is and archived on download.
+        """
+        analysis_storage = self.analysis_storage(
+            case_guid, collection_guid, analyzer
+        )
+        if config.stream:
+            return await self._record_stream(
+                case_guid, collection_guid, analysis_storage, config
+            )
+        try:
+            info = await self.io.run(
+                IOClass.ARCHIVE, analysis_storage.create_archive, config
+            )
+        except ARCHIVE_ERRORS:
+            _LOGGER.exception(
+                "failed to archive analysis output: %s",
+                analysis_storage.directory,
+            )
+            return None
+        finally:
+            await self.io.run(IOClass.DELETE, analysis_storage.remove_data_dir)
+        _LOGGER.info(
+            "archived analysis output: %s (%s, %d bytes, %.1fs)",
+            analysis_storage.directory,
+            info.format.value,
+            info.size,
+            info.duration,
+        )
+        metadata = analysis_storage.metadata
+        analysis = await self._load(metadata, Analysis)
+        if not analysis:
+            _LOGGER.error("analysis metadata not found: %s", metadata)
+            return None
+        analysis.archive_format = info.format.value
+        analysis.archive_size = info.size
+        analysis.archive_duration = info.duration
+        await self._store(metadata, analysis)
+        if self.catalog:
+            await self._catalog(
+                self.catalog.upsert_analysis,
+                case_guid,
+                collection_guid,
+                analysis,
+            )
+        return analysis
+
+    async def _record_stream(
+        self,
+        case_guid: UUID,
+        collection_guid: UUID,
+        analysis_storage: AnalysisStorage,
+        config: ArchiveConfig,
+    ) -> Analysis | None:
+        try:
+            await self.io.run(IOClass.ARCHIVE, analysis_storage.keep_output)
+            stream = await self.io.run(
+                IOClass.METADATA, analysis_storage.create_stream, config
+            )
+        except ARCHIVE_ERRORS:
+            _LOGGER.exception(
+                "failed to list analysis output: %s",
+                analysis_storage.directory,
+            )
+            await self.io.run(IOClass.DELETE, analysis_storage.remove_data_dir)
+            return None
+        # archive left by a previous run would shadow streamed output
+        for filepath in (analysis_storage.data, analysis_storage.members):
+            await self.io.run(
+                IOClass.DELETE, partial(filepath.unlink, missing_ok=True)
+            )
+        metadata = analysis_storage.metadata
+        analysis = await self._load(metadata, Analysis)
+        if not analysis:
+            _LOGGER.error("analysis metadata not found: %s", metadata)
+            return None
+        analysis.archive_format = ArchiveFormat.ZIP.value
+        # unknown until streamed when members are deflated
+        analysis.archive_size = stream.size
+        analysis.archive_duration = 0.0
+        await self._store(metadata, analysis)
+        if self.catalog:
+            await self._catalog(
+                self.catalog.upsert_analysis,
+                case_guid,
+                collection_guid,
+                analysis,
+            )
         return analysis
 
+    async def delete_analysis_output(
+        self, case_guid: UUID, collection_guid: UUID, analyzer: str
+    ):
+        """Delete analysis output which was not archived"""
+        analysis_storage = self.analysis_storage(
+            case_guid, collection_guid, analyzer
+        )
+        await self.io.run(IOClass.DELETE, analysis_storage.remove_data_dir)
+
     async def delete_analysis(
         self, case_guid: UUID, collection_guid: UUID, analyzer: str
     ) -> bool:
@@ -505,7 +1779,11 @@ class Storage(FusionStorage):
         analysis_storage = self.analysis_storage(
             case_guid, collection_guid, analyzer
         )
-        analysis_storage.remove()
+        await self._remove(analysis_storage)
+        if self.catalog:
+            await self._catalog(
+                self.catalog.delete_analysis, collection_guid, analyzer
+            )
         return True
 
     async def retrieve_analysis(
@@ -516,10 +1794,38 @@ class Storage(FusionStorage):
             case_guid, collection_guid, analyzer
         )
         metadata = analysis_storage.metadata
-        if not metadata.is_file():
+        analysis = await self._load(metadata, Analysis)
+        if not analysis:
             _LOGGER.error("analysis metadata not found: %s", metadata)
             return None
-        return Analysis.from_filepath(metadata)
+        return analysis
+
+    async def analysis_etag(
+        self, case_guid: UUID, collection_guid: UUID, analyzer: str
+    ) -> str | None:
+        """Compute case collection analysis metadata entity tag"""
+        analysis_storage = self.analysis_storage(
+            case_guid, collection_guid, analyzer
+        )
+        return await self.io.run(
+            IOClass.METADATA, stat_etag, [analysis_storage.metadata]
+        )
+
+    async def analyses_etag(
+        self, case_guid: UUID, collection_guid: UUID, salt: str = ''
+    ) -> str | None:
+        """Compute case collection analyses metadata entity tag"""
+        collection_storage = self.collection_storage(
+            case_guid, collection_guid
+        )
+        return await self.io.run(
+            IOClass.METADATA,
+            self._listing_etag_sync,
+            collection_storage.analysis_dir,
+            AnalysisStorage,
+            '*',
+            salt,
+        )
 
     async def retrieve_analysis_data(
         self, case_guid: UUID, collection_guid: UUID, analyzer: str
@@ -529,36 +1835,260 @@ class Storage(FusionStorage):
             case_guid, collection_guid, analyzer
         )
         data = analysis_storage.data
-        if not data.is_file():
+        if not await self.io.run(IOClass.METADATA, data.is_file):
             _LOGGER.error("analysis data not found: %s", data)
             return None
         return data
 
+    async def retrieve_analysis_stream(
+        self,
+        case_guid: UUID,
+        collection_guid: UUID,
+        analyzer: str,
+        config: ArchiveConfig | None = None,
+    ) -> ZipStream | None:
+        """Retrieve case collection analysis output kept as files"""
+        analysis_storage = self.analysis_storage(
+            case_guid, collection_guid, analyzer
+        )
+        output_dir = analysis_storage.output_dir
+        if not await self.io.run(IOClass.METADATA, output_dir.is_dir):
+            return None
+        return await self.io.run(
+            IOClass.METADATA, analysis_storage.create_stream, config
+        )
+
+    async def _analysis_archive(
+        self, case_guid: UUID, collection_guid: UUID, analyzer: str
+    ) -> tuple[Path, ArchiveFormat | None] | None:
+        analysis_storage = self.analysis_storage(
+            case_guid, collection_guid, analyzer
+        )
+        data = analysis_storage.data
+        if await self.io.run(IOClass.METADATA, data.is_file):
+            archive_format = await self.io.run(
+                IOClass.METADATA, detect_archive_format, data
+            )
+            if not archive_format:
+                _LOGGER.error("unknown analysis archive format: %s", data)
+                return None
+            return data, archive_format
+        # output kept as files is complete only once analysis succeeded
+        analysis = await self.retrieve_analysis(
+            case_guid, collection_guid, analyzer
+        )
+        if not analysis or analysis.status != Status.SUCCESS:
+            return None
+        output_dir = analysis_storage.output_dir
+        if not await self.io.run(IOClass.METADATA, output_dir.is_dir):
+            return None
+        return analysis_storage.directory, None
+
+    async def retrieve_analysis_members(
+        self, case_guid: UUID, collection_guid: UUID, analyzer: str
+    ) -> list[ArchiveMember] | None:
+        """Retrieve case collection analysis output members (cached)"""
+        analysis_storage = self.analysis_storage(
+            case_guid, collection_guid, analyzer
+        )
+        archive = await self._analysis_archive(
+            case_guid, collection_guid, analyzer
+        )
+        if not archive:
+            return None
+        data, archive_format = archive
+        if archive_format is None:
+            return await self.io.run(
+                IOClass.METADATA, analysis_storage.list_files
+            )
+        members = await self.io.run(
+            IOClass.METADATA, _load_members, analysis_storage.members
+        )
+        if members is not None:
+            return members
+        members = await self.io.run(
+            IOClass.ARCHIVE, list_members, data, None, archive_format
+        )
+        if members is None:
+            return None
+        await self.io.run(
+            IOClass.METADATA, _store_members, analysis_storage.members, members
+        )
+        return members
+
+    async def retrieve_analysis_member(
+        self, case_guid: UUID, collection_guid: UUID, analyzer: str, name: str
+    ) -> MemberReader | None:
+        """Retrieve case collection analysis output member reader"""
+        members = await self.retrieve_analysis_members(
+            case_guid, collection_guid, analyzer
+        )
+        member = next(
+            (member for member in members or [] if member.name == name), None
+        )
+        if not member:
+            return None
+        archive = await self._analysis_archive(
+            case_guid, collection_guid, analyzer
+        )
+        if not archive:
+            return None
+        filepath, archive_format = archive
+        return MemberReader(
+            filepath=filepath, member=member, archive_format=archive_format
+        )
+
     async def enumerate_analyses(
-        self, case_guid: UUID, collection_guid: UUID
+        self,
+        case_guid: UUID,
+        collection_guid: UUID,
+        query: Query | None = None,
     ) -> AsyncIterator[Analysis]:
-        """Retrieve case collection analysis"""
-        collection_storage = self.collection_storage(
-            case_guid, collection_guid
+        """Retrieve case collection analysis (matching query if given)"""
+        if query and self.catalog:
+            analyses = await self.io.run(
+                IOClass.METADATA,
+                _list_of,
+                self.catalog.enumerate_analyses,
+                collection_guid,
+                query,
+            )
+        else:
+            collection_storage = self.collection_storage(
+                case_guid, collection_guid
+            )
+            if query:
+                analyses = await self._load_page(
+                    query,
+                    query.match_analysis,
+                    analysis_sort_key,
+                    collection_storage.analysis_dir,
+                    AnalysisStorage,
+                    Analysis,
+                    '*',
+                )
+            else:
+                analyses = await self._load_all(
+                    collection_storage.analysis_dir,
+                    AnalysisStorage,
+                    Analysis,
+                    '*',
+                )
+        for analysis in analyses:
+            yield analysis
+
+    async def find_collector_guid(
+        self, case_guid: UUID, fingerprint: str
+    ) -> UUID | None:
+        """Find case collector matching fingerprint"""
+        if self.catalog:
+            return await self.io.run(
+                IOClass.METADATA,
+                self.catalog.find_collector_guid,
+                case_guid,
+                fingerprint,
+            )
+        case_storage = self.case_storage(case_guid)
+        return await self.io.run(
+            IOClass.METADATA,
+            self.fingerprint_index.lookup,
+            case_storage.fingerprints,
+            fingerprint,
+            partial(
+                self._load_all_sync,
+                case_storage.collector_dir,
+                CollectorStorage,
+                Collector,
+                GUID_GLOB,
+            ),
         )
-        for analysis_storage in collection_storage.analyses():
-            metadata = analysis_storage.metadata
-            if not metadata.is_file():
+
+    async def find_analyses(
+        self, analyzer: str, status: Status | None = None
+    ) -> AsyncIterator[tuple[Case, Collection, Analysis]]:
+        """Find analyzer analyses in open cases"""
+        if self.catalog:
+            items = await self.io.run(
+                IOClass.METADATA,
+                _list_of,
+                self.catalog.find_analyses,
+                analyzer,
+                status,
+            )
+            for item in items:
+                yield item
+            return
+        async for case in self.enumerate_cases():
+            if case.closed:
                 continue
-            yield Analysis.from_filepath(metadata)
+            async for collection in self.enumerate_collections(case.guid):
+                analysis_storage = self.analysis_storage(
+                    case.guid, collection.guid, analyzer
+                )
+                analysis = await self._load(
+                    analysis_storage.metadata, Analysis
+                )
+                if not analysis:
+                    continue
+                if status and analysis.status != status:
+                    continue
+                yield case, collection, analysis
+
+    def _apply_catalog_entries(self, entries: list[_CatalogEntry]):
+        with self.catalog.transaction() as connection:
+            for entry in entries:
+                entry(connection)
+
+    async def _catalog_entries(self, case: Case) -> list[_CatalogEntry]:
+        entries = [partial(self.catalog.upsert_case, case)]
+        async for collector in self.enumerate_collectors(case.guid):
+            entries.append(
+                partial(self.catalog.upsert_collector, case.guid, collector)
+            )
+        async for collection in self.enumerate_collections(case.guid):
+            entries.append(
+                partial(self.catalog.upsert_collection, case.guid, collection)
+            )
+            async for analysis in self.enumerate_analyses(
+                case.guid, collection.guid
+            ):
+                entries.append(
+                    partial(
+                        self.catalog.upsert_analysis,
+                        case.guid,
+                        collection.guid,
+                        analysis,
+                    )
+                )
+        return entries
+
+    async def rebuild_catalog(self) -> bool:
+        """Rebuild catalog from metadata files"""
+        if not self.catalog:
+            _LOGGER.error("catalog is not enabled")
+            return False
+        entries = [self.catalog.clear]
+        async for case in self.enumerate_cases():
+            entries.extend(await self._catalog_entries(case))
+        await self._catalog(self._apply_catalog_entries, entries)
+        _LOGGER.info("catalog rebuilt with %d entries", len(entries))
+        return True
 
     async def register_analyzer(self, info: AnalyzerInfo):
         """Register an analyzer"""
         self.cache_dir.mkdir(parents=False, exist_ok=True)
         metadata = self.cache_dir / f'analyzer_{info.name}.json'
-        info.to_filepath(metadata)
+        await self.io.run(IOClass.METADATA, info.to_filepath, metadata)
 
     async def enumerate_analyzers(self) -> AsyncIterator[AnalyzerInfo]:
         """Enumerate registered analyzers"""
-        for metadata in self.cache_dir.glob('analyzer_*.json'):
-            yield AnalyzerInfo.from_filepath(metadata)
+        for info in await self.io.run(
+            IOClass.METADATA, _load_analyzers, self.cache_dir
+        ):
+            yield info
 
     async def retrieve_disk_usage(self) -> DiskUsage | None:
         """Retrieve disk usage"""
-        if self.disk_usage.is_file():
-            return DiskUsage.from_filepath(self.disk_usage)
+        return await self.io.run(
+            IOClass.METADATA, _load_disk_usage, self.disk_usage
+        )
@@ -9,6 +9,7 @@ from edf_fusion.concept import Case
 from edf_fusion.helper.logging import get_logger
 from edf_fusion.server.storage import SyncStorage
 from edf_fusion.server.synchronizer import FusionSynchronizer
+from edf_helium_core.concept import Status
 
 from .__version__ import version
 from .config import HeliumServerConfig
@@ -25,6 +26,17 @@ async def _sync_case_impl(storage: Storage, case: Case, directory: Path):
         collector_storage = storage.collector_storage(
             case.guid, collector.guid
         )
+        # pending or failed builds and imported collectors lack some files
+        files = (
+            collector_storage.config,
+            collector_storage.secrets,
+            collector_storage.executable,
+        )
+        if collector.status != Status.SUCCESS or not all(
+            filepath and filepath.is_file() for filepath in files
+        ):
+            _LOGGER.warning("skipped collector sync: %s", collector.guid)
+            continue
         sync_dir = sync_storage.collectors / collector_storage.config.stem
         sync_dir.mkdir(parents=True, exist_ok=True)
         collector.to_filepath(sync_dir / 'metadata.json')
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Helium Extraction Benchmark"""
+
+from argparse import ArgumentParser
+from os import urandom
+from pathlib import Path
+from shutil import rmtree
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from edf_fusion.helper.logging import get_logger
+
+from edf_helium_server.helper.extract import extract_zip_parallel
+
+_LOGGER = get_logger('extract_benchmark', root='test')
+_WORKERS = (1, 2, 4, 8)
+
+
+def _chunk(size: int) -> bytes:
+    # half random, half constant: compressible like real artifacts
+    return urandom(size // 2) + bytes(size - size // 2)
+
+
+def _many_small_files(archive: Path, count: int):
+    with ZipFile(archive, 'w', compression=ZIP_DEFLATED) as zipf:
+        for index in range(count):
+            zipf.writestr(f'dir{index % 100}/file{index}.bin', _chunk(4096))
+
+
+def _few_huge_files(archive: Path, count: int, size: int):
+    with ZipFile(archive, 'w', compression=ZIP_DEFLATED) as zipf:
+        for index in range(count):
+            with zipf.open(f'huge{index}.bin', 'w') as fobj:
+                for _ in range(size // (1024 * 1024)):
+                    fobj.write(_chunk(1024 * 1024))
+
+
+def _benchmark(archive: Path, output: Path, processes: bool):
+    baseline = None
+    for workers in _WORKERS:
+        rmtree(output, ignore_errors=True)
+        output.mkdir()
+        start = perf_counter()
+        outcome = extract_zip_parallel(archive, output, workers, processes)
+        elapsed = perf_counter() - start
+        baseline = baseline or elapsed
+        _LOGGER.info(
+            "%s workers=%d processes=%s: %.2fs (x%.2f) %s",
+            archive.name,
+            workers,
+            processes,
+            elapsed,
+            baseline / elapsed,
+            outcome.value,
+        )
+
+
+def app():
+    """Application entrypoint"""
+    parser = ArgumentParser(description="Helium Extraction Benchmark")
+    parser.add_argument('--small-count', type=int, default=50000)
+    parser.add_argument('--huge-count', type=int, default=8)
+    parser.add_argument('--huge-size', type=int, default=256, help="MiB")
+    parser.add_argument('--processes', action='store_true')
+    args = parser.parse_args()
+    with TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        small = tmpdir / 'many-small-files.zip'
+        huge = tmpdir / 'few-huge-files.zip'
+        _LOGGER.info("generating benchmark archives...")
+        _many_small_files(small, args.small_count)
+        _few_huge_files(huge, args.huge_count, args.huge_size * 1024 * 1024)
+        for archive in (small, huge):
+            _benchmark(archive, tmpdir / 'output', args.processes)
+
+
+if __name__ == '__main__':
+    app()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Helium Event Loop Lag Check
+
+Run storage operations against a temporary storage while a ticker coroutine
+measures how late the event loop wakes it up. Blocking filesystem work left
+on the event loop shows up as ticker delay. Two phases are measured:
+
+- concurrent case metadata writes
+- deletion of a collection extracted to tens of thousands of files, along
+  with metadata reads which shall not be starved by the deletion
+"""
+
+from argparse import ArgumentParser
+from asyncio import Event, create_task, gather, get_running_loop, run, sleep
+from collections.abc import Awaitable
+from io import BytesIO
+from pathlib import Path
+from sys import exit as sys_exit
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from zipfile import ZipFile
+
+from edf_fusion.helper.logging import get_logger
+
+from edf_helium_server.config import HeliumStorageConfig
+from edf_helium_server.storage import Storage
+
+_LOGGER = get_logger('loop_lag', root='test')
+_FILES_PER_DIR = 500
+
+
+async def _ticker(period: float, delays: list[float], stop: Event):
+    loop = get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + period
+        await sleep(period)
+        delays.append(loop.time() - expected)
+
+
+async def _measure(name: str, awaitable: Awaitable, period: float) -> float:
+    delays = []
+    stop = Event()
+    ticker = create_task(_ticker(period / 1000, delays, stop))
+    # ticker shall be waiting before the measured operation starts
+    await sleep(0)
+    start = perf_counter()
+    try:
+        await awaitable
+    finally:
+        stop.set()
+        await ticker
+    elapsed = perf_counter() - start
+    delays.sort()
+    max_delay = delays[-1] * 1000 if delays else 0.0
+    _LOGGER.info(
+        "%s: %.2fs, %d ticks, p99 delay %.1fms, max delay %.1fms",
+        name,
+        elapsed,
+        len(delays),
+        delays[int(len(delays) * 0.99)] * 1000 if delays else 0.0,
+        max_delay,
+    )
+    return max_delay
+
+
+async def _writer(storage: Storage, index: int, updates: int):
+    case = await storage.create_case(
+        False, {'name': f'case-{index}', 'description': 'loop lag check'}
+    )
+    for update in range(updates):
+        await storage.update_case(
+            case.guid, {'description': f'update {update}'}
+        )
+        await storage.retrieve_case(case.guid)
+    await storage.delete_case(case.guid)
+
+
+async def _writes(storage: Storage, args):
+    await gather(
+        *[_writer(storage, index, args.updates) for index in range(args.cases)]
+    )
+
+
+async def _content():
+    buffer = BytesIO()
+    with ZipFile(buffer, 'w') as zipf:
+        zipf.writestr('file.txt', 'loop lag check')
+    yield buffer.getvalue()
+
+
+def _populate(directory: Path, files: int):
+    for index in range(files):
+        subdir = directory / f'{index // _FILES_PER_DIR:04d}'
+        if index % _FILES_PER_DIR == 0:
+            subdir.mkdir(parents=True)
+        (subdir / f'{index:06d}.bin').write_bytes(b'x' * 128)
+
+
+async def _reader(storage: Storage, case_guid, done: Event):
+    while not done.is_set():
+        await storage.retrieve_case(case_guid)
+        await sleep(0)
+
+
+async def _delete(storage: Storage, case_guid, collection_guid):
+    done = Event()
+    readers = [
+        create_task(_reader(storage, case_guid, done)) for _ in range(4)
+    ]
+    try:
+        await storage.delete_collection(case_guid, collection_guid)
+    finally:
+        done.set()
+        await gather(*readers)
+    await storage.delete_case(case_guid)
+
+
+async def _check(directory: Path, args) -> dict[str, float]:
+    dct = {
+        'directory': str(directory / 'storage'),
+        'generaptor': {
+            'cache': str(directory / 'cache'),
+            'config': str(directory / 'config'),
+        },
+        'key_pool': {'size': 0},
+    }
+    if args.catalog:
+        dct['catalog'] = str(directory / 'catalog.db')
+    (directory / 'storage').mkdir()
+    storage = Storage(config=HeliumStorageConfig.from_dict(dct))
+    await storage.startup()
+    max_delays = {}
+    try:
+        max_delays['writes'] = await _measure(
+            f"{args.cases * (args.updates + 2)} writes",
+            _writes(storage, args),
+            args.period,
+        )
+        case = await storage.create_case(
+            False, {'name': 'large', 'description': 'loop lag check'}
+        )
+        collection = await storage.create_collection(case.guid, _content())
+        collection_storage = storage.collection_storage(
+            case.guid, collection.guid
+        )
+        _LOGGER.info("populating %d files...", args.files)
+        _populate(collection_storage.data_dir, args.files)
+        max_delays['delete'] = await _measure(
+            f"delete of {args.files} files",
+            _delete(storage, case.guid, collection.guid),
+            args.period,
+        )
+        if collection_storage.directory.exists():
+            raise RuntimeError("collection directory was not deleted")
+    finally:
+        await storage.cleanup()
+    return max_delays
+
+
+def app():
+    """Application entrypoint"""
+    parser = ArgumentParser(description="Helium Event Loop Lag Check")
+    parser.add_argument('--cases', type=int, default=200)
+    parser.add_argument('--updates', type=int, default=10)
+    parser.add_argument('--files', type=int, default=50000)
+    parser.add_argument('--period', type=float, default=5, help="ms")
+    parser.add_argument('--threshold', type=float, default=100, help="ms")
+    parser.add_argument('--catalog', action='store_true')
+    args = parser.parse_args()
+    with TemporaryDirectory() as tmpdir:
+        max_delays = run(_check(Path(tmpdir), args))
+    failed = False
+    for phase, max_delay in max_delays.items():
+        if max_delay > args.threshold:
+            _LOGGER.error(
+                "%s: max delay %.1fms exceeds %.1fms",
+                phase,
+                max_delay,
+                args.threshold,
+            )
+            failed = True
+    if failed:
+        sys_exit(1)
+
+
+if __name__ == '__main__':
+    app()
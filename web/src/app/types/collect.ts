@@ -35,6 +35,10 @@ export interface Collection {
   collected?: string;
   fingerprint?: string;
   description: string;
+  size?: number;
+  md5?: string;
+  sha1?: string;
+  sha256?: string;
 }
 
 export interface CollectionAnalysis {